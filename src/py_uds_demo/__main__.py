@@ -1,10 +1,13 @@
 import argparse
+import json
 import sys
 
 
 from py_uds_demo.interface.cli import Cli
 from py_uds_demo.interface.gui import Gui
 from py_uds_demo.interface.web import Web
+from py_uds_demo.core.sequence import Sequence
+from py_uds_demo.core.replay import iter_recording, replay
 import uvicorn
 
 def main():
@@ -13,20 +16,33 @@ def main():
                     "Modes available:\n"
                     "  cli - Command Line Interface mode (default)\n"
                     "  gui - Graphical User Interface mode\n"
-                    "  web - Web Server mode\n",
+                    "  web - Web Server mode\n"
+                    "  sequence - Run a diagnostic sequence file on simulated ECUs\n"
+                    "  replay - Replay a simulator log or capture and diff the responses\n",
         epilog="Example usage:\n"
                "  python -m py_uds_demo --mode cli\n"
                "  python -m py_uds_demo --mode gui\n"
                "  python -m py_uds_demo --mode web\n"
+               "  python -m py_uds_demo --mode sequence --sequence smoke.json --ecus 500 --processes 4\n"
+               "  python -m py_uds_demo --mode replay --recording _temp/logs/uds_simulator.log --speed 60\n"
                "You can also use '?' instead of --help to display this message.",
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
 
     parser.add_argument(
         "--mode",
-        choices=["cli", "gui", "web", "api"],
+        choices=["cli", "gui", "web", "api", "sequence", "replay"],
         default="cli",
-        help="Select mode to run: cli (default), gui, web, or api (FastAPI server)"
+        help="Select mode to run: cli (default), gui, web, api (FastAPI server), sequence or replay"
+    )
+    parser.add_argument("--sequence", help="sequence mode: the JSON/YAML sequence file")
+    parser.add_argument("--ecus", type=int, default=1, help="sequence mode: number of simulated ECUs")
+    parser.add_argument("--processes", type=int, default=1, help="sequence mode: number of worker processes")
+    parser.add_argument("--report", help="sequence mode: write the JSON report to this file")
+    parser.add_argument("--recording", help="replay mode: the simulator log or binary capture")
+    parser.add_argument(
+        "--speed", type=float, default=0.0,
+        help="replay mode: time scale (1 = original timing, 60 = an hour per minute, 0 = as fast as possible)"
     )
 
     if "?" in sys.argv:
@@ -50,6 +66,21 @@ def main():
         case "api":
             print("Starting FastAPI server (API Mode)...")
             uvicorn.run("py_uds_demo.interface.api:app", host="127.0.0.1", port=8000, reload=True)
+        case "sequence":
+            if not args.sequence:
+                parser.error("--mode sequence requires --sequence")
+            report = Sequence.from_file(args.sequence).run_simulated(args.ecus, args.processes)
+            print(report.format())
+            if args.report:
+                with open(args.report, "w", encoding="utf-8") as file:
+                    json.dump(report.to_dict(), file, indent=4)
+            sys.exit(0 if report.ok else 1)
+        case "replay":
+            if not args.recording:
+                parser.error("--mode replay requires --recording")
+            report = replay(iter_recording(args.recording), speed=args.speed or None)
+            print(report.format())
+            sys.exit(0 if report.ok else 1)
         case _:
             print("Unknown mode selected.")
 
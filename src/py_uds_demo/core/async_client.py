@@ -0,0 +1,195 @@
+import asyncio
+from time import monotonic
+from typing import Iterable, Sequence, Union
+from py_uds_demo.core.utils.access_matrix import SUPPRESS_POSITIVE_RESPONSE
+from py_uds_demo.core.utils.helpers import Nrc, Sfid, Sid
+from py_uds_demo.core.utils.transports import Transport
+
+
+_SID = Sid()
+_SFID = Sfid()
+_NRC = Nrc()
+
+SUBFUNCTION_SERVICES = frozenset({
+    _SID.DSC, _SID.ER, _SID.RDTCI, _SID.SA, _SID.CC, _SID.DDDI, _SID.RC, _SID.TP, _SID.ATP, _SID.CDTCS, _SID.ROE,
+    _SID.LC,
+})
+"""The services whose second byte is a sub-function with the suppress bit."""
+
+
+class UdsTimeoutError(TimeoutError):
+    """Raised when an ECU does not answer within P2/P2* after all retries."""
+
+
+class AsyncUdsClient:
+    """An asyncio tester for one ECU, over any ``Transport``.
+
+    Requests to one ECU are serialized, as UDS allows a single outstanding
+    request per ECU; requests to different ECUs (one client each) run
+    concurrently, e.g. with ``request_all``. Waiting for a response uses the
+    P2 timeout, extended to P2* by every responsePending (0x78) negative
+    response. The P2/P2* values announced in a Diagnostic Session Control
+    response replace the configured ones. ``latency`` is added to both to
+    cover the transport.
+
+    A request that times out is repeated ``retries`` times. busyRepeatRequest
+    (0x21) responses are repeated after P2 until P2* has elapsed.
+
+    Entering a non-default session starts a TesterPresent keep-alive task
+    (suppressed positive response every ``keep_alive_interval`` seconds),
+    and going back to the default session stops it.
+
+    Attributes:
+        transport (Transport): The link to the ECU.
+        p2 (float): The P2 server timeout in seconds.
+        p2_star (float): The P2* server timeout in seconds.
+        latency (float): The transport allowance added to P2 and P2*.
+        retries (int): The number of repetitions of a timed out request.
+        keep_alive_interval (float | None): The TesterPresent period, or None
+            to never send TesterPresent automatically.
+        retry_count (int): The number of requests repeated after a timeout
+            or busyRepeatRequest so far.
+    """
+    def __init__(
+        self, transport: Transport, p2: float = 0.05, p2_star: float = 5.0, latency: float = 0.1, retries: int = 1,
+        keep_alive_interval: Union[float, None] = 2.0,
+    ) -> None:
+        self.transport = transport
+        self.p2 = p2
+        self.p2_star = p2_star
+        self.latency = latency
+        self.retries = retries
+        self.keep_alive_interval = keep_alive_interval
+        self.retry_count = 0
+        self._lock = asyncio.Lock()
+        self._keep_alive: Union[asyncio.Task, None] = None
+
+    async def __aenter__(self) -> 'AsyncUdsClient':
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.close()
+
+    @staticmethod
+    def expects_response(request: Sequence[int]) -> bool:
+        """Returns False if the request suppresses its positive response."""
+        return not (
+            len(request) > 1 and request[0] in SUBFUNCTION_SERVICES and request[1] & SUPPRESS_POSITIVE_RESPONSE
+        )
+
+    async def request(self, request: Sequence[int]) -> list[int]:
+        """Sends a request and waits for its final response.
+
+        Args:
+            request: The request bytes.
+
+        Returns:
+            The response bytes; an empty list for a suppressed positive
+            response (a negative response is still returned when it arrives
+            within P2).
+
+        Raises:
+            UdsTimeoutError: If no response arrived after all retries.
+        """
+        async with self._lock:
+            response = await self._exchange(bytes(request))
+        if response and response[0] == _SID.DIAGNOSTIC_SESSION_CONTROL + 0x40 and len(response) >= 6:
+            self._on_session_change(response)
+        return response
+
+    async def _exchange(self, request: bytes) -> list[int]:
+        """Runs the send/wait/retry cycle of one request."""
+        expected = self.expects_response(request)
+        attempts = 0
+        busy_deadline = monotonic() + self.p2_star
+        while True:
+            await self.transport.send(request)
+            try:
+                response = await self._wait_response(request[0], expected)
+            except asyncio.TimeoutError:
+                attempts += 1
+                if attempts > self.retries:
+                    raise UdsTimeoutError(f"no response to service 0x{request[0]:02X}") from None
+                self.retry_count += 1
+                continue
+            busy = response[:1] == [_SID.NEGATIVE_RESPONSE] and response[2:3] == [_NRC.BUSY_REPEAT_REQUEST]
+            if not busy or monotonic() >= busy_deadline:
+                return response
+            self.retry_count += 1
+            await asyncio.sleep(self.p2)
+
+    async def _wait_response(self, sid: int, expected: bool) -> list[int]:
+        """Waits for the response to ``sid``, following responsePending."""
+        timeout = self.p2 + self.latency
+        while True:
+            try:
+                message = await asyncio.wait_for(self.transport.receive(), timeout)
+            except asyncio.TimeoutError:
+                if expected:
+                    raise
+                return []
+            response = list(message)
+            if response[:2] == [_SID.NEGATIVE_RESPONSE, sid]:
+                if response[2:3] == [_NRC.REQUEST_CORRECTLY_RECEIVED_RESPONSE_PENDING]:
+                    timeout = self.p2_star + self.latency
+                    continue
+                return response
+            if response[:1] == [sid + 0x40]:
+                return response
+            # a late response to a timed out earlier request
+
+    def _on_session_change(self, response: list[int]) -> None:
+        """Takes over the announced timings and starts or stops the keep-alive."""
+        self.p2 = (response[2] << 8 | response[3]) / 1000
+        self.p2_star = (response[4] << 8 | response[5]) / 100
+        if response[1] == _SFID.DEFAULT_SESSION:
+            self.stop_tester_present()
+        elif self.keep_alive_interval is not None:
+            self.start_tester_present(self.keep_alive_interval)
+
+    def start_tester_present(self, interval: float = 2.0) -> None:
+        """Starts (or restarts) the background TesterPresent task."""
+        self.stop_tester_present()
+        self._keep_alive = asyncio.get_running_loop().create_task(self._send_tester_present(interval))
+
+    def stop_tester_present(self) -> None:
+        """Stops the background TesterPresent task, if running."""
+        if self._keep_alive is not None:
+            self._keep_alive.cancel()
+            self._keep_alive = None
+
+    @property
+    def keeping_alive(self) -> bool:
+        """True while the TesterPresent task runs."""
+        return self._keep_alive is not None and not self._keep_alive.done()
+
+    async def _send_tester_present(self, interval: float) -> None:
+        request = bytes([_SID.TESTER_PRESENT, _SFID.ZERO_SUB_FUNCTION_SUPRESS_RESPONSE])
+        while True:
+            await asyncio.sleep(interval)
+            async with self._lock:
+                await self.transport.send(request)
+
+    async def close(self) -> None:
+        """Stops the keep-alive and closes the transport."""
+        self.stop_tester_present()
+        await self.transport.close()
+
+
+async def request_all(
+    clients: Iterable[AsyncUdsClient], request: Sequence[int], return_exceptions: bool = True
+) -> list[Union[list[int], BaseException]]:
+    """Sends the same request to many ECUs concurrently.
+
+    Args:
+        clients: One client per ECU.
+        request: The request bytes.
+        return_exceptions: If True, a failing ECU gives its exception instead
+            of aborting the whole batch.
+
+    Returns:
+        The responses, in the order of ``clients``.
+    """
+    return await asyncio.gather(
+        *(client.request(request) for client in clients), return_exceptions=return_exceptions
+    )
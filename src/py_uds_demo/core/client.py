@@ -1,5 +1,13 @@
-from typing import Union
+import asyncio
+from typing import Iterable, Sequence, Union
+import numpy as np
+from py_uds_demo.core.flashing import FlashProgrammer, FlashReport, flash_servers, simulated_key_function
 from py_uds_demo.core.server import UdsServer
+from py_uds_demo.core.async_client import AsyncUdsClient
+from py_uds_demo.core.utils.transports import InProcessTransport
+from py_uds_demo.core.utils.decoders import DidLayout
+from py_uds_demo.core.utils.image_loader import MemoryImage
+from py_uds_demo.core.utils.templates import ResponseMatcher, evaluate
 
 
 class UdsClient:
@@ -78,3 +86,166 @@ class UdsClient:
             return formatted_response
         else:
             return response
+
+    def read_data_by_identifier(self, did: int, layout: Union[DidLayout, None] = None) -> Union[dict, None]:
+        """Reads a DID and decodes its data.
+
+        Args:
+            did: The identifier.
+            layout: The layout of the response. Defaults to the layout of the
+                server's DID definition.
+
+        Returns:
+            The decoded values, or None on a negative response.
+        """
+        response = self.send_request([self.server.SID.RDBI, did >> 8, did & 0xFF], False)
+        if not response or response[0] != self.server.SID.RDBI + 0x40:
+            return None
+        if layout is None:
+            definition = self.server.memory.did_database.definitions[did]
+            layout = DidLayout.from_definition(
+                {"did": did, "name": definition.name, "codec": definition.codec}, len(response) - 3
+            )
+        return layout.decode(response)
+
+    def run_steps(
+        self, requests: Iterable[Union[bytes, np.ndarray, Sequence[int]]],
+        matchers: Union[ResponseMatcher, Sequence[ResponseMatcher]],
+    ) -> tuple[list[list], np.ndarray]:
+        """Sends pre-built requests and checks the responses in one pass.
+
+        Requests usually come from ``RequestTemplate.build``/``build_many``.
+        Steps are not logged one by one; the pass/fail evaluation runs once
+        over all responses (see ``templates.evaluate``).
+
+        Args:
+            requests: The requests, in order.
+            matchers: One matcher per request, or one matcher for all.
+
+        Returns:
+            The responses and one pass flag per step.
+        """
+        process = self.server.process_request
+        responses = [
+            process(request.tolist() if isinstance(request, np.ndarray) else list(request)) for request in requests
+        ]
+        if isinstance(matchers, ResponseMatcher):
+            passed = matchers.match_many(responses)
+        else:
+            passed = evaluate(responses, matchers)
+        self.server.logger.info(f"🧪 {int(passed.sum())}/{len(passed)} steps passed")
+        return responses, passed
+
+    def write_image(self, image: MemoryImage, block_size: int = 0x100) -> bool:
+        """Writes a flash image to the server with Write Memory By Address.
+
+        The image is split into blocks that never span a gap, and each block
+        is sent as one request. Only a summary is logged, not every block.
+
+        Args:
+            image: The image returned by ``image_loader.load_image``.
+            block_size: The maximum number of data bytes per request.
+
+        Returns:
+            True if every block was acknowledged, False on the first negative
+            response.
+        """
+        sid = self.server.SID.WRITE_MEMORY_BY_ADDRESS
+        for address, block in image.iter_blocks(block_size):
+            request = [sid, (address >> 24) & 0xFF, (address >> 16) & 0xFF, (address >> 8) & 0xFF, address & 0xFF]
+            request.extend(block)
+            response = self.server.process_request(request)
+            if not response or response[0] != sid + 0x40:
+                self.server.logger.info(f"{self.format_request(request[:5])} ... {self._format_response(response)}")
+                return False
+        self.server.logger.info(f"💾 image written: {image.size} bytes in {len(image.segments)} segment(s)")
+        return True
+
+    def flash(
+        self, image: MemoryImage, security_level: int = 1, max_block_length: Union[int, None] = None
+    ) -> FlashReport:
+        """Runs a complete programming job on the server (see ``FlashProgrammer``).
+
+        Args:
+            image: The image to program.
+            security_level: The Security Access level unlocked for programming.
+            max_block_length: An upper limit for the TransferData block size.
+
+        Returns:
+            The job report with per-phase times, throughput and retries.
+        """
+        async def program() -> FlashReport:
+            client = AsyncUdsClient(InProcessTransport(self.server), keep_alive_interval=None)
+            key_function = simulated_key_function(self.server, security_level)
+            return await FlashProgrammer(client, key_function, security_level, max_block_length).program(image)
+
+        report = asyncio.run(program())
+        outcome = "ok" if report.ok else f"failed in {report.failed_phase}"
+        self.server.logger.info(
+            f"💾 flash {outcome}: {report.bytes_transferred} bytes, {report.throughput / 1024:.1f} KiB/s"
+        )
+        return report
+
+    def flash_many(
+        self, servers: Iterable[UdsServer], image: MemoryImage, security_level: int = 1,
+        max_block_length: Union[int, None] = None,
+    ) -> list[FlashReport]:
+        """Programs an image into many servers concurrently (see ``flashing.flash_servers``)."""
+        return asyncio.run(flash_servers(servers, image, security_level, max_block_length))
+
+    def compute_keys(
+        self, seeds: Sequence[Sequence[int]], level: int = 1, server: Union[UdsServer, None] = None
+    ) -> list[bytes]:
+        """Computes Security Access keys for many seeds in one batch.
+
+        The algorithm of ``level`` is taken from the server configuration, as
+        a tester with the matching key DLL would do.
+
+        Args:
+            seeds: The seeds, all of the algorithm's seed length.
+            level: The security level.
+            server: The server whose algorithm is used. Defaults to this
+                client's server.
+
+        Returns:
+            One key per seed.
+        """
+        server = self.server if server is None else server
+        algorithm = server.security_access.levels[level].algorithm
+        keys = algorithm.compute_keys(np.asarray(seeds, dtype=np.uint8).reshape(len(seeds), -1))
+        return [key.tobytes() for key in keys]
+
+    def unlock(self, level: int = 1, servers: Union[Iterable[UdsServer], None] = None) -> list[bool]:
+        """Runs the seed/key exchange of ``level`` on one or many servers.
+
+        The seeds of all servers are requested first, then the keys are
+        computed in one ``compute_keys`` batch per algorithm (each server uses
+        its own configuration) and sent back. A server answering with an
+        all-zero seed is already unlocked and counts as unlocked.
+
+        Args:
+            level: The security level to unlock.
+            servers: The servers to unlock. Defaults to this client's server.
+
+        Returns:
+            For each server, True if it accepted the key or was already unlocked.
+        """
+        servers = [self.server] if servers is None else list(servers)
+        sid = self.server.SID.SECURITY_ACCESS
+        request_seed = 2 * level - 1
+        responses = [server.process_request([sid, request_seed]) for server in servers]
+        seeded = [index for index, response in enumerate(responses) if response and response[0] == sid + 0x40]
+        results = [False] * len(servers)
+        batches: dict[int, list[int]] = {}
+        for index in seeded:
+            if not any(responses[index][2:]):
+                results[index] = True
+                continue
+            algorithm = servers[index].security_access.levels[level].algorithm
+            batches.setdefault(id(algorithm), []).append(index)
+        for indexes in batches.values():
+            keys = self.compute_keys([responses[index][2:] for index in indexes], level, servers[indexes[0]])
+            for index, key in zip(indexes, keys):
+                response = servers[index].process_request([sid, request_seed + 1, *key])
+                results[index] = bool(response) and response[0] == sid + 0x40
+        return results
@@ -0,0 +1,264 @@
+import asyncio
+import zlib
+from time import monotonic
+from typing import Awaitable, Callable, Iterable, Union
+import numpy as np
+from py_uds_demo.core.async_client import AsyncUdsClient
+from py_uds_demo.core.server import UdsServer
+from py_uds_demo.core.utils.helpers import Sfid, Sid
+from py_uds_demo.core.utils.image_loader import MemoryImage
+from py_uds_demo.core.utils.routines import COMPLETED, IN_PROGRESS
+from py_uds_demo.core.utils.transports import InProcessTransport
+
+
+ERASE_MEMORY = 0xFF00
+CHECK_MEMORY = 0x0202
+CHECK_PROGRAMMING_DEPENDENCIES = 0xFF01
+ADDRESS_AND_LENGTH_FORMAT = 0x44
+"""4-byte memory size and 4-byte memory address."""
+NORMAL_COMMUNICATION_MESSAGES = 0x01
+"""The communicationType of Communication Control switching off normal messages."""
+
+_SID = Sid()
+_SFID = Sfid()
+
+PHASES = (
+    "extended_session", "communication_control", "dtc_setting_off", "programming_session", "security_access",
+    "erase", "download", "transfer", "transfer_exit", "check", "dependencies", "reset",
+)
+"""The phases of a programming job, in order."""
+
+
+class FlashReport:
+    """The outcome of flashing one ECU.
+
+    Attributes:
+        ok (bool): True if every phase succeeded.
+        failed_phase (str | None): The phase that failed.
+        failed_response (list[int]): The unexpected response of that phase
+            (empty after a timeout).
+        error (str | None): The error message of a failure.
+        phase_times (dict[str, float]): Per phase, the seconds spent.
+        bytes_transferred (int): The number of data bytes downloaded.
+        block_length (int): The data bytes per TransferData request, sized
+            from maxNumberOfBlockLength.
+        blocks (int): The number of TransferData requests.
+        retries (int): The requests repeated after a timeout or busyRepeatRequest.
+        duration (float): The total job time in seconds.
+    """
+    def __init__(self) -> None:
+        self.ok = False
+        self.failed_phase: Union[str, None] = None
+        self.failed_response: list[int] = []
+        self.error: Union[str, None] = None
+        self.phase_times: dict[str, float] = {phase: 0.0 for phase in PHASES}
+        self.bytes_transferred = 0
+        self.block_length = 0
+        self.blocks = 0
+        self.retries = 0
+        self.duration = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """The download throughput in bytes per second of TransferData time."""
+        transfer = self.phase_times["transfer"]
+        return self.bytes_transferred / transfer if transfer else 0.0
+
+    def to_dict(self) -> dict:
+        """The report as a JSON-serializable document."""
+        return {
+            "ok": self.ok, "failed_phase": self.failed_phase, "failed_response": self.failed_response,
+            "error": self.error, "bytes": self.bytes_transferred, "block_length": self.block_length,
+            "blocks": self.blocks, "retries": self.retries, "duration_s": round(self.duration, 6),
+            "throughput_bps": round(self.throughput, 1),
+            "phases_s": {phase: round(seconds, 6) for phase, seconds in self.phase_times.items()},
+        }
+
+
+class _PhaseFailed(Exception):
+    """Aborts a programming job with the response that failed a phase."""
+    def __init__(self, response: list[int], message: str = "unexpected response") -> None:
+        super().__init__(message)
+        self.response = response
+
+
+class FlashProgrammer:
+    """Runs the programming sequence of one ECU over an ``AsyncUdsClient``.
+
+    The sequence is the usual OEM flow: extended session, Communication
+    Control (disable non-diagnostic messages), Control DTC Setting off,
+    programming session, Security Access, then per image segment erase,
+    Request Download, Transfer Data and Request Transfer Exit, a CRC-32
+    memory check of every segment, the programming dependency check and a
+    hard reset. Security Access comes after the programming session since a
+    session change locks the ECU.
+
+    The erase, check and dependency routines run in the background on the
+    ECU, so they are polled with requestRoutineResults. The TransferData block
+    size is derived from the maxNumberOfBlockLength of every Request
+    Download response (minus the SID and block sequence counter), capped by
+    ``max_block_length``.
+
+    Attributes:
+        client (AsyncUdsClient): The link to the ECU.
+        compute_key (Callable): Returns the Security Access key of a seed.
+        security_level (int): The level unlocked for programming.
+        max_block_length (int | None): An upper limit for the block size.
+        poll_interval (float): The seconds between routine result polls.
+        phase (str): The phase running (or last run).
+    """
+    def __init__(
+        self, client: AsyncUdsClient, compute_key: Callable[[bytes], bytes], security_level: int = 1,
+        max_block_length: Union[int, None] = None, poll_interval: float = 0.005,
+    ) -> None:
+        self.client = client
+        self.compute_key = compute_key
+        self.security_level = security_level
+        self.max_block_length = max_block_length
+        self.poll_interval = poll_interval
+        self.phase = PHASES[0]
+
+    async def _expect(self, request: Union[list[int], bytes]) -> list[int]:
+        """Sends a request and fails the phase unless the response is positive."""
+        response = await self.client.request(request)
+        if not response or response[0] != request[0] + 0x40:
+            raise _PhaseFailed(response)
+        return response
+
+    async def _run_routine(self, routine_id: int, option_record: bytes = b"") -> list[int]:
+        """Starts a routine, waits for it to complete and returns its result bytes."""
+        rid = [routine_id >> 8, routine_id & 0xFF]
+        await self._expect(bytes([_SID.RC, _SFID.START_ROUTINE, *rid]) + option_record)
+        while True:
+            response = await self._expect([_SID.RC, _SFID.REQUEST_ROUTINE_RESULT, *rid])
+            if response[4] != IN_PROGRESS:
+                break
+            await asyncio.sleep(self.poll_interval)
+        if response[4] != COMPLETED:
+            raise _PhaseFailed(response, f"routine 0x{routine_id:04X} did not complete")
+        return response[6:]
+
+    async def _unlock(self) -> None:
+        seed = (await self._expect([_SID.SA, 2 * self.security_level - 1]))[2:]
+        if any(seed):
+            await self._expect(bytes([_SID.SA, 2 * self.security_level]) + self.compute_key(bytes(seed)))
+
+    async def _download(self, address: int, data: memoryview, report: FlashReport) -> None:
+        """Runs Request Download, Transfer Data and Request Transfer Exit for one segment."""
+        self.phase = "download"
+        started = monotonic()
+        response = await self._expect(bytes([_SID.RD, 0x00]) + self._memory_range(address, len(data)))
+        length_bytes = response[1] >> 4
+        block_length = int.from_bytes(bytes(response[2:2 + length_bytes]), "big") - 2
+        if self.max_block_length is not None:
+            block_length = min(block_length, self.max_block_length)
+        if block_length <= 0:
+            raise _PhaseFailed(response, "invalid maxNumberOfBlockLength")
+        report.block_length = block_length
+        report.phase_times["download"] += monotonic() - started
+
+        self.phase = "transfer"
+        started = monotonic()
+        counter = 1
+        for offset in range(0, len(data), block_length):
+            await self._expect(bytes([_SID.TD, counter]) + data[offset:offset + block_length])
+            counter = (counter + 1) & 0xFF
+            report.blocks += 1
+        report.bytes_transferred += len(data)
+        report.phase_times["transfer"] += monotonic() - started
+
+        self.phase = "transfer_exit"
+        started = monotonic()
+        await self._expect([_SID.RTE])
+        report.phase_times["transfer_exit"] += monotonic() - started
+
+    async def program(self, image: MemoryImage) -> FlashReport:
+        """Flashes an image and returns the job report (failures are reported, not raised)."""
+        report = FlashReport()
+        retries = self.client.retry_count
+        job_started = monotonic()
+
+        async def timed(name: str, step: Callable[[], Awaitable]) -> None:
+            self.phase = name
+            started = monotonic()
+            await step()
+            report.phase_times[name] += monotonic() - started
+
+        async def erase() -> None:
+            for segment in image.segments:
+                await self._run_routine(ERASE_MEMORY, self._memory_range(segment.address, len(segment.data)))
+
+        async def check() -> None:
+            for segment in image.segments:
+                crc = zlib.crc32(segment.data).to_bytes(4, "big")
+                result = await self._run_routine(
+                    CHECK_MEMORY, self._memory_range(segment.address, len(segment.data)) + crc
+                )
+                if result[:1] != [0x00]:
+                    raise _PhaseFailed(result, f"CRC mismatch at 0x{segment.address:08X}")
+
+        async def dependencies() -> None:
+            result = await self._run_routine(CHECK_PROGRAMMING_DEPENDENCIES)
+            if result[:1] != [0x00]:
+                raise _PhaseFailed(result, "programming dependencies not fulfilled")
+
+        disable_communication = [_SID.CC, _SFID.DISABLE_RX_AND_TX, NORMAL_COMMUNICATION_MESSAGES]
+        try:
+            await timed("extended_session", lambda: self._expect([_SID.DSC, _SFID.EXTENDED_SESSION]))
+            await timed("communication_control", lambda: self._expect(disable_communication))
+            await timed("dtc_setting_off", lambda: self._expect([_SID.CDTCS, _SFID.OFF]))
+            await timed("programming_session", lambda: self._expect([_SID.DSC, _SFID.PROGRAMMING_SESSION]))
+            await timed("security_access", self._unlock)
+            await timed("erase", erase)
+            for segment in image.segments:
+                await self._download(segment.address, memoryview(segment.data), report)
+            await timed("check", check)
+            await timed("dependencies", dependencies)
+            await timed("reset", lambda: self._expect([_SID.ER, _SFID.HARD_RESET]))
+            report.ok = True
+        except _PhaseFailed as failure:
+            report.failed_phase = self.phase
+            report.failed_response = failure.response
+            report.error = str(failure)
+        except (TimeoutError, ConnectionError) as error:
+            report.failed_phase = self.phase
+            report.error = repr(error)
+        report.retries = self.client.retry_count - retries
+        report.duration = monotonic() - job_started
+        return report
+
+    @staticmethod
+    def _memory_range(address: int, size: int) -> bytes:
+        return bytes([ADDRESS_AND_LENGTH_FORMAT]) + address.to_bytes(4, "big") + size.to_bytes(4, "big")
+
+
+def simulated_key_function(server: UdsServer, level: int = 1) -> Callable[[bytes], bytes]:
+    """Returns the key function of a simulated ECU's Security Access level."""
+    algorithm = server.security_access.levels[level].algorithm
+    return lambda seed: algorithm.compute_keys(np.frombuffer(seed, dtype=np.uint8).reshape(1, -1))[0].tobytes()
+
+
+async def flash_servers(
+    servers: Iterable[UdsServer], image: MemoryImage, security_level: int = 1,
+    max_block_length: Union[int, None] = None,
+) -> list[FlashReport]:
+    """Flashes an image into many simulated ECUs concurrently.
+
+    Each ECU gets its own ``AsyncUdsClient`` and ``FlashProgrammer``; the
+    jobs run interleaved in the event loop, so the routine polls of one ECU
+    overlap the transfers of the others.
+
+    Returns:
+        One report per server, in order.
+    """
+    async def flash(server: UdsServer) -> FlashReport:
+        client = AsyncUdsClient(InProcessTransport(server), keep_alive_interval=None)
+        programmer = FlashProgrammer(
+            client, simulated_key_function(server, security_level), security_level, max_block_length
+        )
+        try:
+            return await programmer.program(image)
+        finally:
+            await client.close()
+
+    return list(await asyncio.gather(*(flash(server) for server in servers)))
@@ -0,0 +1,270 @@
+import struct
+import time
+from datetime import datetime
+from typing import BinaryIO, Iterable, Iterator, Union
+from py_uds_demo.core.server import UdsServer
+
+
+REQUEST_MARK = "💉"
+POSITIVE_MARK = "🟢"
+NEGATIVE_MARK = "🔴"
+
+CAPTURE_MAGIC = b"UDSCAP1\n"
+CAPTURE_RECORD = struct.Struct(">dBI")
+"""Capture record header: timestamp (seconds), direction, payload length."""
+REQUEST = 0
+RESPONSE = 1
+
+SECURITY_ACCESS = 0x27
+
+
+class Exchange:
+    """One recorded request and the response that followed it.
+
+    Attributes:
+        timestamp (float): The time of the request in seconds.
+        request (list[int]): The request bytes.
+        response (list[int] | None): The recorded response; an empty list for
+            a suppressed response, None if none was recorded.
+    """
+    __slots__ = ("timestamp", "request", "response")
+
+    def __init__(self, timestamp: float, request: list[int], response: Union[list[int], None]) -> None:
+        self.timestamp = timestamp
+        self.request = request
+        self.response = response
+
+    def __repr__(self) -> str:
+        return f"Exchange({self.timestamp!r}, {self.request!r}, {self.response!r})"
+
+
+def _parse_log_line(line: str) -> Union[tuple[float, str, list[int]], None]:
+    """Parses a simulator log line into ``(timestamp, mark, bytes)``, or None for other lines."""
+    for mark in (REQUEST_MARK, POSITIVE_MARK, NEGATIVE_MARK):
+        position = line.find(mark)
+        if position >= 0:
+            break
+    else:
+        return None
+    payload = line[position + len(mark):].split()
+    try:
+        data = [int(token, 16) for token in payload]
+        timestamp = datetime.fromisoformat(line[:23].replace(",", ".")).timestamp()
+    except ValueError:
+        # summary lines such as "💉 3D 00 08 00 00 ... 🟢 7D" or lines without a timestamp
+        return None
+    return timestamp, mark, data
+
+
+def iter_log(lines: Union[str, Iterable[str]]) -> Iterator[Exchange]:
+    """Streams the exchanges of a simulator text log (``uds_simulator.log``).
+
+    Request lines (💉) are paired with the next response line (🟢/🔴);
+    other lines are skipped. The file is read line by line.
+
+    Args:
+        lines: The log path, or an iterable of lines (e.g. an open file).
+    """
+    if isinstance(lines, str):
+        with open(lines, encoding="utf-8", errors="replace") as file:
+            yield from iter_log(file)
+        return
+    pending: Union[Exchange, None] = None
+    for line in lines:
+        parsed = _parse_log_line(line)
+        if parsed is None:
+            continue
+        timestamp, mark, data = parsed
+        if mark == REQUEST_MARK:
+            if pending is not None:
+                yield pending
+            pending = Exchange(timestamp, data, None)
+        elif pending is not None:
+            pending.response = data
+            yield pending
+            pending = None
+    if pending is not None:
+        yield pending
+
+
+class CaptureWriter:
+    """Writes a binary capture of request and response messages.
+
+    A capture starts with ``CAPTURE_MAGIC`` followed by records of a
+    ``CAPTURE_RECORD`` header (timestamp, ``REQUEST``/``RESPONSE`` and
+    length) and the message bytes.
+
+    Attributes:
+        file (BinaryIO): The capture file.
+    """
+    def __init__(self, path: str) -> None:
+        self.file: BinaryIO = open(path, "wb")
+        self.file.write(CAPTURE_MAGIC)
+
+    def __enter__(self) -> 'CaptureWriter':
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def write(self, direction: int, payload: Iterable[int], timestamp: Union[float, None] = None) -> None:
+        """Appends one message (the current time by default)."""
+        payload = bytes(payload)
+        timestamp = time.time() if timestamp is None else timestamp
+        self.file.write(CAPTURE_RECORD.pack(timestamp, direction, len(payload)) + payload)
+
+    def close(self) -> None:
+        """Closes the capture file."""
+        self.file.close()
+
+
+def iter_capture(path: str) -> Iterator[Exchange]:
+    """Streams the exchanges of a binary capture written by ``CaptureWriter``.
+
+    Raises:
+        ValueError: If the file is not a capture or ends inside a record.
+    """
+    with open(path, "rb") as file:
+        if file.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+            raise ValueError(f"{path} is not a UDS capture")
+        pending: Union[Exchange, None] = None
+        while header := file.read(CAPTURE_RECORD.size):
+            if len(header) < CAPTURE_RECORD.size:
+                raise ValueError(f"{path} ends inside a record")
+            timestamp, direction, length = CAPTURE_RECORD.unpack(header)
+            payload = file.read(length)
+            if len(payload) < length:
+                raise ValueError(f"{path} ends inside a record")
+            if direction == REQUEST:
+                if pending is not None:
+                    yield pending
+                pending = Exchange(timestamp, list(payload), None)
+            elif pending is not None:
+                pending.response = list(payload)
+                yield pending
+                pending = None
+        if pending is not None:
+            yield pending
+
+
+def iter_recording(path: str) -> Iterator[Exchange]:
+    """Streams a text log or a binary capture, detected from its content."""
+    with open(path, "rb") as file:
+        binary = file.read(len(CAPTURE_MAGIC)) == CAPTURE_MAGIC
+    return iter_capture(path) if binary else iter_log(path)
+
+
+class ReplayReport:
+    """The result of a replay.
+
+    Attributes:
+        exchanges (int): The number of replayed requests.
+        compared (int): The number of responses compared.
+        mismatch_count (int): The number of responses that differed.
+        mismatches (list[dict]): The first ``max_mismatches`` differences:
+            index, timestamp, request, expected and actual response (hex).
+        recorded_span (float): The seconds between the first and the last
+            recorded request.
+        duration (float): The seconds the replay took.
+    """
+    def __init__(self) -> None:
+        self.exchanges = 0
+        self.compared = 0
+        self.mismatch_count = 0
+        self.mismatches: list[dict] = []
+        self.recorded_span = 0.0
+        self.duration = 0.0
+
+    @property
+    def ok(self) -> bool:
+        """True if every compared response matched."""
+        return self.mismatch_count == 0
+
+    def format(self) -> str:
+        """Formats the report as text, one line per stored mismatch."""
+        lines = [
+            f"replayed {self.exchanges} requests ({self.recorded_span:.1f} s recorded) in {self.duration:.2f} s: "
+            f"{self.compared - self.mismatch_count}/{self.compared} responses match"
+        ]
+        for mismatch in self.mismatches:
+            lines.append(
+                f"#{mismatch['index']} {mismatch['request']}: expected {mismatch['expected']}, "
+                f"got {mismatch['actual']}"
+            )
+        if self.mismatch_count > len(self.mismatches):
+            lines.append(f"... {self.mismatch_count - len(self.mismatches)} more mismatches")
+        return "\n".join(lines)
+
+
+def _hex(data: list[int]) -> str:
+    return " ".join(f"{byte:02X}" for byte in data)
+
+
+def replay(
+    exchanges: Iterable[Exchange], server: Union[UdsServer, None] = None, speed: Union[float, None] = None,
+    max_mismatches: int = 1000,
+) -> ReplayReport:
+    """Replays recorded exchanges against a server and diffs the responses.
+
+    Requests are sent at their recorded times divided by ``speed`` (1.0 is
+    real time, 60.0 plays an hour in a minute); with ``speed`` None they are
+    sent as fast as possible. Exchanges are consumed as they are read, so
+    recordings of any length run in constant memory.
+
+    Security Access is replayed against the live seeds: a requestSeed
+    response is only compared up to the sub-function and for its length, and
+    the key of a sendKey request is recomputed from the seed the server sent.
+
+    Args:
+        exchanges: The recording, e.g. from ``iter_recording``.
+        server: The server to replay against. Defaults to a new one.
+        speed: The time scale, or None for no pacing.
+        max_mismatches: The number of mismatches kept in the report.
+
+    Returns:
+        The replay report.
+    """
+    server = UdsServer() if server is None else server
+    report = ReplayReport()
+    seeds: dict[int, list[int]] = {}
+    first_timestamp = last_timestamp = None
+    started = time.monotonic()
+    for index, exchange in enumerate(exchanges):
+        if first_timestamp is None:
+            first_timestamp = exchange.timestamp
+        last_timestamp = exchange.timestamp
+        if speed:
+            delay = (exchange.timestamp - first_timestamp) / speed - (time.monotonic() - started)
+            if delay > 0:
+                time.sleep(delay)
+        request = exchange.request
+        security_level = None
+        if len(request) >= 2 and request[0] == SECURITY_ACCESS:
+            security_level = (request[1] + 1) // 2
+            if request[1] % 2 == 0 and security_level in seeds and security_level in server.security_access.levels:
+                key = server.security_access.levels[security_level].algorithm.compute_key(seeds[security_level])
+                request = [request[0], request[1], *key]
+        actual = server.process_request(list(request))
+        report.exchanges += 1
+        is_seed = security_level is not None and request[1] % 2 == 1 and actual[:1] == [SECURITY_ACCESS + 0x40]
+        if is_seed:
+            seeds[security_level] = actual[2:]
+        if exchange.response is None:
+            continue
+        report.compared += 1
+        expected = exchange.response
+        if is_seed:
+            matches = len(actual) == len(expected) and actual[:2] == expected[:2]
+        else:
+            matches = actual == expected
+        if not matches:
+            report.mismatch_count += 1
+            if len(report.mismatches) < max_mismatches:
+                report.mismatches.append({
+                    "index": index, "timestamp": exchange.timestamp, "request": _hex(exchange.request),
+                    "expected": _hex(expected), "actual": _hex(actual),
+                })
+    if first_timestamp is not None:
+        report.recorded_span = last_timestamp - first_timestamp
+    report.duration = time.monotonic() - started
+    return report
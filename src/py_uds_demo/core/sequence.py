@@ -0,0 +1,272 @@
+import json
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from time import monotonic
+from typing import Any, Union
+import numpy as np
+from py_uds_demo.core.async_client import AsyncUdsClient
+from py_uds_demo.core.server import UdsServer
+from py_uds_demo.core.utils.codecs import parse_number
+from py_uds_demo.core.utils.templates import RequestTemplate, ResponseMatcher
+from py_uds_demo.core.utils.transports import InProcessTransport
+
+
+class Step:
+    """One compiled step of a sequence: a request or a wait.
+
+    Attributes:
+        name (str): The step name shown in the report.
+        template (RequestTemplate | None): The request of a request step.
+        params (dict[str, int | str]): The slot values; strings starting
+            with ``$`` refer to captured values.
+        request (bytes | None): The request, pre-built when no slot refers
+            to a capture.
+        matcher (ResponseMatcher | None): The expected response.
+        captures (dict[str, tuple[int, int | None]]): Per variable, the
+            ``(start, stop)`` slice of the response captured as a big-endian
+            integer. Nothing is captured from a missing response or one
+            shorter than the slice.
+        wait (float): The seconds a wait step sleeps.
+    """
+    def __init__(
+        self, name: str, template: Union[RequestTemplate, None] = None, params: Union[dict, None] = None,
+        matcher: Union[ResponseMatcher, None] = None, captures: Union[dict, None] = None, wait: float = 0.0,
+    ) -> None:
+        self.name = name
+        self.template = template
+        self.params = params or {}
+        self.matcher = matcher
+        self.captures = captures or {}
+        self.wait = wait
+        dynamic = any(isinstance(value, str) for value in self.params.values())
+        self.request = template.build(**self.params) if template is not None and not dynamic else None
+
+    def build(self, variables: dict[str, int]) -> bytes:
+        """Returns the request, resolving captured slot values."""
+        if self.request is not None:
+            return self.request
+        values = {
+            name: variables[value[1:]] if isinstance(value, str) else value for name, value in self.params.items()
+        }
+        return self.template.build(**values)
+
+
+class Sequence:
+    """A declarative diagnostic sequence, compiled once for all ECUs.
+
+    A sequence document (JSON, or YAML if PyYAML is installed) has a
+    ``name`` and a ``steps`` list. A step is one of:
+
+    - a request: ``request`` (a ``RequestTemplate`` pattern), optional
+      ``params`` for its slots (numbers, or ``"$variable"`` for a captured
+      value), optional ``expect`` (a ``ResponseMatcher`` pattern), optional
+      ``capture`` mapping variable names to ``[start, stop]`` response slices
+      (left unset when the response is missing or too short, so steps using
+      them fail) and an optional ``name``;
+    - a wait: ``{"wait": seconds}``;
+    - a loop: ``{"loop": count, "steps": [...]}``, unrolled when compiled.
+
+    Attributes:
+        name (str): The sequence name.
+        steps (list[Step]): The compiled, unrolled steps.
+    """
+    def __init__(self, name: str, steps: list[Step]) -> None:
+        self.name = name
+        self.steps = steps
+
+    @classmethod
+    def from_file(cls, path: str) -> 'Sequence':
+        """Loads a sequence from a JSON or YAML document."""
+        with open(path, encoding="utf-8") as file:
+            if path.endswith((".yaml", ".yml")):
+                try:
+                    import yaml
+                except ImportError as error:
+                    raise ImportError("PyYAML is required to load YAML sequences") from error
+                document = yaml.safe_load(file)
+            else:
+                document = json.load(file)
+        return cls.from_dict(document)
+
+    @classmethod
+    def from_dict(cls, document: dict) -> 'Sequence':
+        """Compiles a sequence document."""
+        templates: dict[str, RequestTemplate] = {}
+        matchers: dict[str, ResponseMatcher] = {}
+        steps: list[Step] = []
+
+        def compile_steps(entries: list[dict], suffix: str) -> None:
+            for entry in entries:
+                if "loop" in entry:
+                    for iteration in range(parse_number(entry["loop"])):
+                        compile_steps(entry["steps"], f"{suffix}[{iteration}]")
+                elif "wait" in entry:
+                    steps.append(Step(entry.get("name", f"wait {entry['wait']}") + suffix, wait=float(entry["wait"])))
+                else:
+                    pattern = entry["request"]
+                    template = templates.setdefault(pattern, RequestTemplate(pattern))
+                    expect = entry.get("expect")
+                    matcher = None if expect is None else matchers.setdefault(expect, ResponseMatcher(expect))
+                    params = {
+                        name: value if isinstance(value, str) and value.startswith("$") else parse_number(value)
+                        for name, value in entry.get("params", {}).items()
+                    }
+                    captures = {name: tuple(bounds) for name, bounds in entry.get("capture", {}).items()}
+                    steps.append(Step(entry.get("name", pattern) + suffix, template, params, matcher, captures))
+
+        compile_steps(document["steps"], "")
+        return cls(document.get("name", "sequence"), steps)
+
+    async def run_ecu(self, client: AsyncUdsClient) -> tuple[list[list[int]], np.ndarray, list[str]]:
+        """Runs the sequence on one ECU.
+
+        Returns:
+            The response of every step (empty for waits and failed steps),
+            the step durations in seconds and the error messages.
+        """
+        variables: dict[str, int] = {}
+        responses: list[list[int]] = []
+        durations = np.zeros(len(self.steps))
+        errors: list[str] = []
+        for index, step in enumerate(self.steps):
+            start = monotonic()
+            response: list[int] = []
+            if step.template is None:
+                await asyncio.sleep(step.wait)
+            else:
+                try:
+                    response = await client.request(step.build(variables))
+                except (TimeoutError, ConnectionError, KeyError) as error:
+                    errors.append(f"{step.name}: {error!r}")
+                for variable, (first, stop) in step.captures.items():
+                    if response and len(response) >= (first + 1 if stop is None else stop):
+                        variables[variable] = int.from_bytes(bytes(response[first:stop]), "big")
+            durations[index] = monotonic() - start
+            responses.append(response)
+        return responses, durations, errors
+
+    async def run(self, clients: list[AsyncUdsClient]) -> 'SequenceReport':
+        """Runs the sequence on every client concurrently."""
+        results = await asyncio.gather(*(self.run_ecu(client) for client in clients))
+        return SequenceReport.from_results(self, results)
+
+    def run_simulated(self, ecus: int, processes: int = 1) -> 'SequenceReport':
+        """Runs the sequence on ``ecus`` simulated ECUs, sharded over processes.
+
+        Each process runs its share of the ECUs concurrently in one event
+        loop; the shard reports are merged in ECU order.
+        """
+        shards = [len(shard) for shard in np.array_split(np.arange(ecus), max(1, min(processes, ecus)))]
+        if len(shards) == 1:
+            return asyncio.run(_run_simulated_shard(self, ecus))
+        with ProcessPoolExecutor(len(shards)) as pool:
+            reports = list(pool.map(_run_simulated_shard_sync, [self] * len(shards), shards))
+        return SequenceReport.merge(reports)
+
+
+async def _run_simulated_shard(sequence: Sequence, ecus: int) -> 'SequenceReport':
+    clients = [AsyncUdsClient(InProcessTransport(UdsServer()), keep_alive_interval=None) for _ in range(ecus)]
+    try:
+        return await sequence.run(clients)
+    finally:
+        for client in clients:
+            await client.close()
+
+
+def _run_simulated_shard_sync(sequence: Sequence, ecus: int) -> 'SequenceReport':
+    return asyncio.run(_run_simulated_shard(sequence, ecus))
+
+
+class SequenceReport:
+    """The aggregated result of a sequence run over many ECUs.
+
+    Pass/fail is evaluated after the run, one ``match_many`` per step over
+    the responses of all ECUs.
+
+    Attributes:
+        name (str): The sequence name.
+        step_names (list[str]): The step names.
+        responses (list[list[list[int]]]): Per ECU, the response of every step.
+        durations (np.ndarray): ``(ecus, steps)`` step durations in seconds.
+        passed (np.ndarray): ``(ecus, steps)`` pass flags.
+        errors (list[list[str]]): Per ECU, the transport errors.
+    """
+    def __init__(
+        self, name: str, step_names: list[str], responses: list[list[list[int]]], durations: np.ndarray,
+        passed: np.ndarray, errors: list[list[str]],
+    ) -> None:
+        self.name = name
+        self.step_names = step_names
+        self.responses = responses
+        self.durations = durations
+        self.passed = passed
+        self.errors = errors
+
+    @classmethod
+    def from_results(cls, sequence: Sequence, results: list[tuple]) -> 'SequenceReport':
+        """Builds the report of ``Sequence.run_ecu`` results."""
+        responses = [result[0] for result in results]
+        steps = len(sequence.steps)
+        durations = np.array([result[1] for result in results]).reshape(len(results), steps)
+        passed = np.ones((len(results), steps), dtype=np.bool_)
+        for index, step in enumerate(sequence.steps):
+            if step.matcher is not None:
+                passed[:, index] = step.matcher.match_many(ecu_responses[index] for ecu_responses in responses)
+        return cls(
+            sequence.name, [step.name for step in sequence.steps], responses, durations, passed,
+            [result[2] for result in results],
+        )
+
+    @classmethod
+    def merge(cls, reports: list['SequenceReport']) -> 'SequenceReport':
+        """Concatenates the reports of ECU shards."""
+        first = reports[0]
+        return cls(
+            first.name, first.step_names, [ecu for report in reports for ecu in report.responses],
+            np.concatenate([report.durations for report in reports]),
+            np.concatenate([report.passed for report in reports]),
+            [ecu for report in reports for ecu in report.errors],
+        )
+
+    @property
+    def ecu_count(self) -> int:
+        """The number of ECUs."""
+        return len(self.responses)
+
+    @property
+    def ok(self) -> bool:
+        """True if every step passed on every ECU."""
+        return bool(self.passed.all())
+
+    def summary(self) -> list[dict[str, Any]]:
+        """Per step: name, passed/failed ECU counts and mean/max duration in ms."""
+        passed = self.passed.sum(axis=0)
+        mean = self.durations.mean(axis=0) * 1000 if self.ecu_count else np.zeros(len(self.step_names))
+        worst = self.durations.max(axis=0) * 1000 if self.ecu_count else np.zeros(len(self.step_names))
+        return [
+            {
+                "step": name, "passed": int(passed[index]), "failed": self.ecu_count - int(passed[index]),
+                "mean_ms": round(float(mean[index]), 3), "max_ms": round(float(worst[index]), 3),
+            }
+            for index, name in enumerate(self.step_names)
+        ]
+
+    def to_dict(self) -> dict[str, Any]:
+        """The report as a JSON-serializable document."""
+        return {
+            "sequence": self.name, "ecus": self.ecu_count, "ok": self.ok,
+            "ecus_passed": int(self.passed.all(axis=1).sum()), "steps": self.summary(),
+            "errors": {index: errors for index, errors in enumerate(self.errors) if errors},
+        }
+
+    def format(self) -> str:
+        """Formats the summary as a text table."""
+        lines = [f"sequence {self.name}: {int(self.passed.all(axis=1).sum())}/{self.ecu_count} ECUs passed"]
+        width = max((len(name) for name in self.step_names), default=4)
+        lines.append(f"{'step':<{width}}  {'pass':>6}  {'fail':>6}  {'mean ms':>9}  {'max ms':>9}")
+        for row in self.summary():
+            lines.append(
+                f"{row['step']:<{width}}  {row['passed']:>6}  {row['failed']:>6}  "
+                f"{row['mean_ms']:>9.3f}  {row['max_ms']:>9.3f}"
+            )
+        return "\n".join(lines)
@@ -1,6 +1,11 @@
 import os
 import sys
+import copy
+import pickle
 import logging
+import datetime
+import threading
+from operator import attrgetter
 
 from py_uds_demo.core.utils.services import diagnostic_and_commmunication_management
 from py_uds_demo.core.utils.services import data_transmission
@@ -10,6 +15,9 @@ from py_uds_demo.core.utils.services import remote_activation_of_routine
 from py_uds_demo.core.utils.services import upload_download
 from py_uds_demo.core.utils.responses import PositiveResponse, NegativeResponse
 from py_uds_demo.core.utils.helpers import Sid, Sfid, Nrc, Did, Memory
+from py_uds_demo.core.utils.access_matrix import AccessMatrix, SUPPRESS_POSITIVE_RESPONSE
+from py_uds_demo.core.utils.bootloader import Bootloader
+from py_uds_demo.core.utils.signal_model import Preconditions, SignalModel
 
 
 class UdsServer:
@@ -28,20 +36,58 @@ class UdsServer:
         NRC (Nrc): Negative response codes.
         did (Did): Diagnostic identifiers.
         memory (Memory): Memory map and data.
+        access_matrix (AccessMatrix): The session/security access rules,
+            checked once per request before the service handler runs.
+        bootloader (Bootloader): The boot/application personality and the
+            flash bank handling on ECU reset.
+        signals (SignalView): The vehicle signals seen by this ECU. Each
+            server has its own single-ECU model unless ``SignalModel.bind``
+            connects it to a fleet model.
+        preconditions (Preconditions): The environmental preconditions of
+            requests, checked against ``signals``.
+        request_lock (threading.RLock): Serializes request processing
+            between the tester thread and the scheduler thread, on which
+            Response On Event runs its timer events.
         positive_response (PositiveResponse): Handler for positive responses.
         negative_response (NegativeResponse): Handler for negative responses.
         ...and more attributes for each supported service.
+        SNAPSHOT_FIELDS (dict): The attributes captured by ``snapshot`` and
+            ``fork``, keyed by the (dotted) path of the owning component.
     """
+    SNAPSHOT_FIELDS = {
+        "diagnostic_session_control": (
+            "active_session", "P2_HIGH", "P2_LOW", "P2_STAR_HIGH", "P2_STAR_LOW",
+            "tester_present_active", "session_timeout",
+        ),
+        "security_access": ("levels", "unlocked_level", "pending_level"),
+        "tester_present": ("tester_present_request_received",),
+        "access_timing_parameter": ("timing_parameters",),
+        "control_dtc_setting": ("dtc_setting",),
+        "dynamically_define_data_identifier": ("definitions",),
+        "read_data_by_periodic_identifier": ("scheduled",),
+        "input_output_control_by_identifier": ("registry",),
+        "routine_control": ("routine_status",),
+        "request_download": ("transfer",),
+        "bootloader": ("entry_generation", "last_update"),
+        "memory": ("writable_dids", "did_data", "memory_map", "flash", "dtc_store", "user_defined_dtc_stores"),
+        "memory.did_database": ("records",),
+    }
+
     def __init__(self):
         # Logger
         self.DEFAULT_LOG_FILE = "_temp/logs/uds_simulator.log"
         self.logger = self._initialize_logger()
+        self.request_lock = threading.RLock()
         # Constants
         self.SID = Sid()
         self.SFID = Sfid()
         self.NRC = Nrc()
         self.did = Did()
         self.memory = Memory()
+        self.access_matrix = AccessMatrix.from_file()
+        self.signals = SignalModel().view(0)
+        self.preconditions = Preconditions.from_file()
+        self.memory.did_reader = lambda did: self.memory.did_database.read(did, self)
         # Responses
         self.positive_response = PositiveResponse()
         self.negative_response = NegativeResponse()
@@ -77,6 +123,8 @@ class UdsServer:
         self.transfer_data = upload_download.TransferData(self)
         self.request_transfer_exit = upload_download.RequestTransferExit(self)
         self.request_file_transfer = upload_download.RequestFileTransfer(self)
+        # Bootloader
+        self.bootloader = Bootloader(self)
         # Service map
         self.service_map = {
             self.SID.DIAGNOSTIC_SESSION_CONTROL: self.diagnostic_session_control,
@@ -144,10 +192,77 @@ class UdsServer:
         """
         return list(self.SID.__dict__.values())
 
+    def _capture_state(self) -> dict:
+        """Collects the live values of every field in ``SNAPSHOT_FIELDS``."""
+        return {
+            path: {field: getattr(attrgetter(path)(self), field) for field in fields}
+            for path, fields in self.SNAPSHOT_FIELDS.items()
+        }
+
+    def _apply_state(self, state: dict) -> None:
+        """Writes captured field values back and restarts the session timer."""
+        for path, fields in state.items():
+            component = attrgetter(path)(self)
+            for field, value in fields.items():
+                setattr(component, field, value)
+        self.diagnostic_session_control.last_session_change_time = datetime.datetime.now()
+
+    def snapshot(self) -> bytes:
+        """
+        Captures the complete ECU state in a compact binary form.
+
+        The snapshot covers the session, security state, timing parameters,
+        IO/routine status and the whole ``Memory`` content.
+
+        Returns:
+            bytes: The serialized state, to be passed to ``restore``.
+        """
+        return pickle.dumps(self._capture_state(), protocol=pickle.HIGHEST_PROTOCOL)
+
+    def restore(self, snapshot: bytes) -> None:
+        """
+        Restores a state previously captured with ``snapshot``.
+
+        Snapshots are pickled data: only restore snapshots you created.
+
+        Args:
+            snapshot: The bytes returned by ``snapshot``.
+        """
+        self._apply_state(pickle.loads(snapshot))
+
+    def fork(self) -> 'UdsServer':
+        """
+        Creates a new server with a copy of this server's state.
+
+        Small state is deep-copied while memory regions are shared with the
+        clone. This is copy-on-write because ``Memory.write`` replaces a
+        region with a patched copy instead of modifying it in place.
+
+        The clone is a complete server: building it costs about as much as
+        ``UdsServer()`` (a few milliseconds) and starts its own session
+        timeout thread. The thread ends when the clone is garbage collected,
+        or at once with ``close``.
+
+        Returns:
+            UdsServer: The cloned server.
+        """
+        shared_regions = {id(region): region for region in self.memory.memory_map.values()}
+        clone = UdsServer()
+        clone._apply_state(copy.deepcopy(self._capture_state(), shared_regions))
+        return clone
+
+    def close(self) -> None:
+        """Stops the session timeout thread of the server."""
+        self.diagnostic_session_control.stop()
+
     def process_request(self, data_stream: list) -> list:
         """
         Processes an incoming UDS request and returns a response.
 
+        Changes made by the request (DID writes, DTC updates) are handed to
+        Response On Event afterwards. Requests are processed one at a time,
+        whichever thread sends them.
+
         Args:
             data_stream: A list of integers representing the incoming
                 diagnostic request bytes.
@@ -155,8 +270,69 @@ class UdsServer:
         Returns:
             A list of integers representing the response to the request.
         """
+        with self.request_lock:
+            response = self._dispatch(data_stream)
+            self.process_changes()
+        return response
+
+    def process_changes(self) -> None:
+        """
+        Hands pending DID and DTC changes to Response On Event.
+
+        Requests do this on their own. Changes made outside a request (e.g.
+        ``FaultSimulation.apply_to``) are reported with the next request, or
+        right away by calling this method.
+        """
+        with self.request_lock:
+            if self.memory.dirty_dids or self.memory.dirty_dtcs:
+                self.response_on_event.process_changes()
+
+    def _dispatch(self, data_stream: list) -> list:
+        """
+        Checks a request against the access matrix and the environmental
+        preconditions and routes it.
+
+        The suppressPosRspMsgIndicationBit is removed from the sub-function
+        before the service handler sees it; a positive response is then
+        replaced by an empty one.
+
+        Args:
+            data_stream: The request bytes.
+
+        Returns:
+            The response of the service handler.
+        """
         if not data_stream:
             return self.negative_response.report_negative_response(0x00, self.NRC.GENERAL_REJECT)
+        if self.bootloader.busy:
+            return self.negative_response.report_negative_response(data_stream[0], self.NRC.BUSY_REPEAT_REQUEST)
+        nrc, suppress = self.access_matrix.check(
+            data_stream, self.diagnostic_session_control.active_session, self.security_access.security_level
+        )
+        if nrc is not None:
+            return self.negative_response.report_negative_response(data_stream[0], nrc)
+        if suppress:
+            data_stream = [data_stream[0], data_stream[1] & ~SUPPRESS_POSITIVE_RESPONSE, *data_stream[2:]]
+        nrc = self.preconditions.check(data_stream, self.signals)
+        if nrc is not None:
+            return self.negative_response.report_negative_response(data_stream[0], nrc)
+        response = self._route(data_stream)
+        if not suppress:
+            return response
+        if response and response[0] == self.SID.NEGATIVE_RESPONSE:
+            return response
+        return []
+
+    def _route(self, data_stream: list) -> list:
+        """
+        Routes a request to the handler of its service.
+
+        Args:
+            data_stream: The request bytes.
+
+        Returns:
+            The response of the service handler.
+        """
         sid = data_stream[0]
         match sid:
             # Diagnostic and communication management
@@ -0,0 +1,142 @@
+import os
+import json
+from typing import Iterable, Union
+
+from py_uds_demo.core.utils.codecs import parse_number
+from py_uds_demo.core.utils.helpers import Nrc
+
+
+DEFAULT_ACCESS_MATRIX = os.path.join(os.path.dirname(__file__), "access_matrix.json")
+
+ALL = -1
+"""A mask with every bit set: allowed in every session / no restriction."""
+
+SUPPRESS_POSITIVE_RESPONSE = 0x80
+"""The suppressPosRspMsgIndicationBit of a sub-function byte."""
+
+
+def _mask(values: Union[Iterable, None]) -> int:
+    """Compiles a list of sessions or security levels into a bit mask."""
+    if values is None:
+        return ALL
+    mask = 0
+    for value in values:
+        mask |= 1 << parse_number(value)
+    return mask
+
+
+class AccessRule:
+    """The compiled access rule of one service.
+
+    Attributes:
+        session_mask (int): Bit ``n`` is set if session ``n`` may use the service.
+        security_mask (int): Bit ``n`` is set if security level ``n`` grants
+            access. ``ALL`` means no security access is needed.
+        has_subfunction (bool): True if the second request byte is a
+            sub-function (with the suppressPosRspMsgIndicationBit).
+        subfunctions (dict[int, tuple[int, int]]): The ``(session_mask,
+            security_mask)`` of sub-functions with their own restrictions.
+    """
+    def __init__(
+        self, session_mask: int = ALL, security_mask: int = ALL, has_subfunction: bool = False,
+        subfunctions: Union[dict[int, tuple[int, int]], None] = None,
+    ) -> None:
+        self.session_mask = session_mask
+        self.security_mask = security_mask
+        self.has_subfunction = has_subfunction
+        self.subfunctions = subfunctions or {}
+
+
+class AccessMatrix:
+    """A declarative (session, security level, SID, sub-function) access matrix.
+
+    The definition is compiled into one ``AccessRule`` per service, stored in
+    a 256 entry table indexed by SID, with sessions and security levels
+    turned into bit masks. Checking a request is a table lookup and two bit
+    tests. Services without an entry are allowed everywhere.
+
+    Definition files are JSON documents with a ``services`` list. Each entry
+    has a ``sid``, an optional ``subfunction`` flag, optional ``sessions``
+    and ``security_levels`` lists (omitted means unrestricted) and optional
+    ``subfunctions`` entries with their own ``subfunction``, ``sessions`` and
+    ``security_levels``. Load another file to model another ECU variant.
+
+    Attributes:
+        NRC (Nrc): Negative response codes.
+        rules (list[AccessRule | None]): The compiled rule of every SID.
+    """
+    def __init__(self) -> None:
+        self.NRC = Nrc()
+        self.rules: list[Union[AccessRule, None]] = [None] * 256
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_ACCESS_MATRIX) -> 'AccessMatrix':
+        """Loads an access matrix from a JSON definition file.
+
+        Args:
+            path: The definition file path.
+
+        Returns:
+            The compiled access matrix.
+        """
+        with open(path, encoding="utf-8") as file:
+            return cls.from_dict(json.load(file))
+
+    @classmethod
+    def from_dict(cls, document: dict) -> 'AccessMatrix':
+        """Compiles an access matrix from a definition document."""
+        matrix = cls()
+        for entry in document["services"]:
+            matrix.add(entry)
+        return matrix
+
+    def add(self, entry: dict) -> AccessRule:
+        """Adds (or replaces) the rule of one service from its definition entry."""
+        rule = AccessRule(
+            _mask(entry.get("sessions")),
+            _mask(entry.get("security_levels")),
+            entry.get("subfunction", False),
+            {
+                parse_number(sub_entry["subfunction"]) & ~SUPPRESS_POSITIVE_RESPONSE: (
+                    _mask(sub_entry.get("sessions")), _mask(sub_entry.get("security_levels"))
+                )
+                for sub_entry in entry.get("subfunctions", ())
+            },
+        )
+        self.rules[parse_number(entry["sid"])] = rule
+        return rule
+
+    def check(self, data_stream: list, session: int, security_level: int) -> tuple[Union[int, None], bool]:
+        """Checks a request against the matrix.
+
+        The checks follow the order of ISO 14229-1: service in active session,
+        service security, sub-function in active session, sub-function
+        security. A security level of 0 means locked.
+
+        Args:
+            data_stream: The request bytes.
+            session: The active diagnostic session.
+            security_level: The unlocked security level.
+
+        Returns:
+            The negative response code (None if access is granted) and whether
+            the suppressPosRspMsgIndicationBit is set.
+        """
+        rule = self.rules[data_stream[0]]
+        if rule is None:
+            return None, False
+        if not rule.session_mask >> session & 1:
+            return self.NRC.SERVICE_NOT_SUPPORTED_IN_ACTIVE_SESSION, False
+        if rule.security_mask != ALL and not rule.security_mask >> security_level & 1:
+            return self.NRC.SECURITY_ACCESS_DENIED, False
+        if not rule.has_subfunction or len(data_stream) < 2:
+            return None, False
+        suppress = bool(data_stream[1] & SUPPRESS_POSITIVE_RESPONSE)
+        sub_rule = rule.subfunctions.get(data_stream[1] & ~SUPPRESS_POSITIVE_RESPONSE)
+        if sub_rule is not None:
+            session_mask, security_mask = sub_rule
+            if not session_mask >> session & 1:
+                return self.NRC.SUB_FUNCTION_NOT_SUPPORTED_IN_ACTIVE_SESSION, suppress
+            if security_mask != ALL and not security_mask >> security_level & 1:
+                return self.NRC.SECURITY_ACCESS_DENIED, suppress
+        return None, suppress
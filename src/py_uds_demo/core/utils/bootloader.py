@@ -0,0 +1,81 @@
+from time import monotonic
+from typing import TYPE_CHECKING, Union
+
+if TYPE_CHECKING:
+    from py_uds_demo.core.server import UdsServer
+
+
+SWAPPED = "swapped"
+ROLLED_BACK = "rolled_back"
+
+
+class Bootloader:
+    """Simulates the bootloader/application split of a flashable ECU.
+
+    The programming session runs in the "boot" personality: the flash bank
+    address then maps to the inactive bank, so erase, download and check
+    memory requests work on the next application while the current one stays
+    intact. A hard reset that ends a programming session in which the
+    inactive bank was modified commits the update when every sector of that
+    bank passed a memory check: the banks are swapped by switching the active
+    bank index. Otherwise the update is rolled back and the ECU keeps running
+    the active bank.
+
+    With a ``boot_time``, the ECU answers every request with
+    busyRepeatRequest until the emulated reboot after an ECU reset is over.
+
+    Attributes:
+        uds_server (UdsServer): The server owning the bootloader.
+        boot_time (float): The emulated reboot time in seconds.
+        booting_until (float): The monotonic time at which the reboot ends.
+        entry_generation (int | None): The generation of the inactive bank
+            when the programming session was entered.
+        last_update (str | None): ``SWAPPED`` or ``ROLLED_BACK`` after a hard
+            reset ended a programming session that modified the inactive bank.
+    """
+    def __init__(self, uds_server: 'UdsServer', boot_time: float = 0.0) -> None:
+        self.uds_server = uds_server
+        self.boot_time = boot_time
+        self.booting_until = 0.0
+        self.entry_generation: Union[int, None] = None
+        self.last_update: Union[str, None] = None
+        uds_server.diagnostic_session_control.session_listeners.append(self._on_session_change)
+
+    @property
+    def personality(self) -> str:
+        """``"boot"`` in the programming session, ``"application"`` otherwise."""
+        if self.uds_server.diagnostic_session_control.active_session == self.uds_server.SFID.PROGRAMMING_SESSION:
+            return "boot"
+        return "application"
+
+    @property
+    def busy(self) -> bool:
+        """True while the emulated reboot is in progress."""
+        return monotonic() < self.booting_until
+
+    def _on_session_change(self, session: int) -> None:
+        """Maps the inactive bank while programming and aborts running transfers."""
+        flash = self.uds_server.memory.flash
+        programming = session == self.uds_server.SFID.PROGRAMMING_SESSION
+        if programming and not flash.program_inactive_bank and flash.banks:
+            self.entry_generation = flash.banks[flash.inactive_bank].generation
+        flash.program_inactive_bank = programming
+        self.uds_server.request_download.transfer = None
+
+    def reset(self, reset_type: int) -> None:
+        """Performs an ECU reset: commits or rolls back a pending update and reboots.
+
+        Args:
+            reset_type: The ECU Reset sub-function.
+        """
+        flash = self.uds_server.memory.flash
+        if reset_type == self.uds_server.SFID.HARD_RESET and flash.program_inactive_bank and flash.banks:
+            bank = flash.banks[flash.inactive_bank]
+            if bank.generation != self.entry_generation:
+                if bank.verified.all():
+                    flash.swap_banks()
+                    self.last_update = SWAPPED
+                else:
+                    self.last_update = ROLLED_BACK
+                self.uds_server.logger.info(f"bootloader: update {self.last_update}, active bank {flash.active_bank}")
+        self.booting_until = monotonic() + self.boot_time
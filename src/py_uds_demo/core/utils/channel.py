@@ -0,0 +1,49 @@
+import asyncio
+from typing import AsyncIterator, Callable
+
+
+class FrameChannel:
+    """Delivers frames sent by the server outside of a request/response pair.
+
+    Frames can be consumed with callbacks, which run on the thread that
+    publishes the frame, or with the ``frames`` async iterator. Publishing
+    copies nothing: every subscriber receives the same list object.
+    """
+    def __init__(self) -> None:
+        self._callbacks: tuple[Callable[[list], None], ...] = ()
+
+    def subscribe(self, callback: Callable[[list], None]) -> None:
+        """Registers a callback called with every published frame."""
+        self._callbacks = self._callbacks + (callback,)
+
+    def unsubscribe(self, callback: Callable[[list], None]) -> None:
+        """Removes a callback registered with ``subscribe``."""
+        self._callbacks = tuple(registered for registered in self._callbacks if registered is not callback)
+
+    def publish(self, frame: list) -> None:
+        """Sends a frame to every subscriber."""
+        for callback in self._callbacks:
+            callback(frame)
+
+    async def frames(self) -> AsyncIterator[list]:
+        """Yields published frames in the running event loop.
+
+        Frames published from other threads are handed over to the loop with
+        ``call_soon_threadsafe``. The subscription ends when the iterator is
+        closed.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+
+        def forward(frame: list) -> None:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, frame)
+            except RuntimeError:
+                self.unsubscribe(forward)
+
+        self.subscribe(forward)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self.unsubscribe(forward)
@@ -0,0 +1,176 @@
+import struct
+from typing import Any, Callable
+
+
+_STRUCT_FORMATS = {(1, False): "B", (2, False): "H", (4, False): "I", (8, False): "Q",
+                   (1, True): "b", (2, True): "h", (4, True): "i", (8, True): "q"}
+
+
+def parse_number(value: Any) -> Any:
+    """Converts a definition value such as ``"0xF190"`` into a number.
+
+    Definition files use strings for hexadecimal numbers since JSON has no
+    hex literal. Numbers and non-numeric strings are returned unchanged.
+    """
+    if isinstance(value, str):
+        try:
+            return int(value, 0)
+        except ValueError:
+            return value
+    return value
+
+
+def compile_encoder(codec: dict) -> Callable[[Any], bytes]:
+    """Compiles a codec definition into an encoder callable.
+
+    Supported ``type`` values:
+        - ``uint`` / ``int``: integers with optional ``length`` (bytes; the
+          minimal length is used when omitted), ``byteorder`` (``"big"`` by
+          default) and linear scaling ``physical = raw * factor + offset``.
+          An ``enum`` mapping raw values to labels also accepts the labels.
+        - ``bits``: an integer of ``length`` bytes made of the bitfields of
+          ``fields`` (names mapped to ``[lsb, width]``); the value is the
+          integer or a mapping of bitfield names to values.
+        - ``ascii``: text padded with ``padding`` to ``length`` bytes.
+        - ``bcd``: packed binary coded decimal of ``length`` bytes.
+        - ``bytes``: raw data given as a list of ints or a hex string.
+
+    Args:
+        codec: The codec definition.
+
+    Returns:
+        A function converting a value into its encoded bytes.
+
+    Raises:
+        ValueError: If the codec type is unknown.
+    """
+    data_type = codec.get("type", "bytes")
+    length = codec.get("length")
+    if data_type in ("uint", "int") and "enum" in codec:
+        encode_raw = compile_encoder({key: value for key, value in codec.items() if key != "enum"})
+        labels = {label: parse_number(raw) for raw, label in codec["enum"].items()}
+        return lambda value: encode_raw(labels.get(value, value))
+    match data_type:
+        case "uint" | "int":
+            signed = data_type == "int"
+            byteorder = codec.get("byteorder", "big")
+            factor = codec.get("factor", 1)
+            offset = codec.get("offset", 0)
+            scaled = factor != 1 or offset != 0
+            if length is None:
+                def encode(value: Any) -> bytes:
+                    raw = round((value - offset) / factor) if scaled else int(value)
+                    return raw.to_bytes((raw.bit_length() + 7 + signed) // 8, byteorder, signed=signed)
+                return encode
+            fmt = _STRUCT_FORMATS.get((length, signed))
+            if fmt is not None:
+                pack = struct.Struct(("<" if byteorder == "little" else ">") + fmt).pack
+                if not scaled:
+                    return lambda value: pack(int(value))
+                return lambda value: pack(round((value - offset) / factor))
+            return lambda value: (round((value - offset) / factor) if scaled else int(value)).to_bytes(
+                length, byteorder, signed=signed
+            )
+        case "ascii":
+            padding = codec.get("padding", " ").encode("ascii")
+            if length is None:
+                return lambda value: str(value).encode("ascii")
+            return lambda value: str(value).encode("ascii")[:length].ljust(length, padding)
+        case "bcd":
+            def encode(value: Any) -> bytes:
+                text = str(value)
+                return bytes.fromhex(text.rjust(2 * length if length else len(text) + len(text) % 2, "0"))
+            return encode
+        case "bits":
+            byteorder = codec.get("byteorder", "big")
+            bitfields = {
+                name: tuple(parse_number(item) for item in position) for name, position in codec["fields"].items()
+            }
+            def encode(value: Any) -> bytes:
+                if isinstance(value, dict):
+                    value = sum(
+                        (parse_number(field_value) & ((1 << bitfields[name][1]) - 1)) << bitfields[name][0]
+                        for name, field_value in value.items()
+                    )
+                return int(value).to_bytes(length, byteorder)
+            return encode
+        case "bytes":
+            def encode(value: Any) -> bytes:
+                if isinstance(value, str):
+                    return bytes.fromhex(value)
+                return bytes(value)
+            return encode
+        case _:
+            raise ValueError(f"unknown codec type: {data_type}")
+
+
+SCALING_UNSIGNED_NUMERIC = 0x00
+SCALING_SIGNED_NUMERIC = 0x10
+SCALING_BIT_MAPPED = 0x20
+SCALING_BCD = 0x40
+SCALING_ASCII = 0x60
+SCALING_STATE_ENCODED = 0x50
+SCALING_FORMULA = 0x90
+SCALING_UNIT = 0xA0
+
+FORMULA_LINEAR = 0x00
+"""Formula identifier 0: ``y = C0 * x + C1``."""
+
+_SCALING_TYPES = {"uint": SCALING_UNSIGNED_NUMERIC, "int": SCALING_SIGNED_NUMERIC, "bcd": SCALING_BCD,
+                  "ascii": SCALING_ASCII, "bytes": SCALING_UNSIGNED_NUMERIC, "bits": SCALING_BIT_MAPPED}
+
+
+def encode_scaling_constant(value: float) -> bytes:
+    """Encodes a formula constant as a 4-bit exponent and a 12-bit mantissa.
+
+    The constant is ``mantissa * 10 ** exponent``, both signed; the pair
+    closest to ``value`` is used, preferring the largest exponent.
+
+    Args:
+        value: The constant.
+
+    Returns:
+        The 2 constant bytes.
+    """
+    if value == 0:
+        return b"\x00\x00"
+    best = None
+    tolerance = 1e-9 * max(abs(value), 1)
+    for exponent in range(7, -9, -1):
+        mantissa = max(-2048, min(2047, round(value / 10 ** exponent)))
+        error = abs(mantissa * 10 ** exponent - value)
+        if best is None or error < best[0] - tolerance:
+            best = (error, exponent, mantissa)
+    _, exponent, mantissa = best
+    return (((exponent & 0x0F) << 12) | (mantissa & 0x0FFF)).to_bytes(2, "big")
+
+
+def compile_scaling(codec: dict, length: int) -> bytes:
+    """Builds the scalingByte/scalingByteExtension record of a codec.
+
+    The data type becomes one scaling byte per 15 data bytes (ISO 14229-1
+    Annex C); an ``enum`` is a state encoded variable. A linear scaling adds
+    a formula 0 (``C0 * x + C1``) record and an optional ``unit_code`` a
+    unit/format record.
+
+    Args:
+        codec: The codec definition (see ``compile_encoder``).
+        length: The number of data bytes.
+
+    Returns:
+        The encoded scaling record.
+    """
+    scaling_type = SCALING_STATE_ENCODED if "enum" in codec else _SCALING_TYPES[codec.get("type", "bytes")]
+    record = bytearray()
+    remaining = length
+    while remaining > 0:
+        record.append(scaling_type | min(remaining, 15))
+        remaining -= 15
+    factor = codec.get("factor", 1)
+    offset = codec.get("offset", 0)
+    if factor != 1 or offset != 0:
+        record += bytes([SCALING_FORMULA | 5, FORMULA_LINEAR])
+        record += encode_scaling_constant(factor) + encode_scaling_constant(offset)
+    if "unit_code" in codec:
+        record += bytes([SCALING_UNIT | 1, parse_number(codec["unit_code"])])
+    return bytes(record)
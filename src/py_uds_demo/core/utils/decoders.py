@@ -0,0 +1,239 @@
+import struct
+from typing import Any, Iterable, Union
+
+import numpy as np
+
+from py_uds_demo.core.utils.codecs import parse_number
+
+
+_STRUCT_CODES = {(1, False): "B", (2, False): "H", (4, False): "I", (8, False): "Q",
+                 (1, True): "b", (2, True): "h", (4, True): "i", (8, True): "q"}
+
+READ_DATA_BY_IDENTIFIER_RESPONSE = 0x62
+
+
+class _Field:
+    """One fixed-length field of a layout, compiled for both decoders.
+
+    ``struct_code`` is the field's part of the layout ``struct.Struct``
+    format and ``convert`` turns the unpacked item into values; ``dtype`` is
+    the field's part of the layout NumPy dtype and ``convert_array`` does the
+    same for a whole column of records.
+
+    Attributes:
+        name (str): The field name.
+        kind (str): The codec type.
+        length (int): The number of bytes.
+        outputs (list[str]): The names of the decoded values.
+    """
+    def __init__(self, name: str, codec: dict) -> None:
+        self.name = name
+        self.kind = codec.get("type", "bytes")
+        if self.kind not in ("uint", "int", "bits", "ascii", "bcd", "bytes"):
+            raise ValueError(f"unknown codec type: {self.kind}")
+        self.length = codec.get("length")
+        if not self.length:
+            raise ValueError(f"field {name} needs a fixed length")
+        self.signed = self.kind == "int"
+        self.little = codec.get("byteorder", "big") == "little"
+        self.factor = codec.get("factor", 1)
+        self.offset = codec.get("offset", 0)
+        self.scaled = self.factor != 1 or self.offset != 0
+        self.enum = {parse_number(key): value for key, value in codec.get("enum", {}).items()}
+        self.padding = codec.get("padding", " ")
+        self.bits = {
+            bit_name: tuple(parse_number(item) for item in position)
+            for bit_name, position in codec.get("fields", {}).items()
+        }
+        self.outputs = list(self.bits) if self.kind == "bits" else [name]
+        self.integer = self.kind in ("uint", "int", "bits")
+        self.native = self.integer and (self.length, self.signed) in _STRUCT_CODES
+        if self.integer and self.length > 8:
+            raise ValueError(f"field {name} is wider than 8 bytes")
+
+    # --- struct decoder ---------------------------------------------------
+
+    def struct_code(self, little: bool) -> str:
+        """The format code, given the byte order of the layout struct."""
+        if self.native and (self.length == 1 or self.little == little):
+            return _STRUCT_CODES[(self.length, self.signed)]
+        return f"{self.length}s"
+
+    def convert(self, item: Any) -> dict[str, Any]:
+        """Converts an unpacked struct item into the decoded values."""
+        if self.integer:
+            raw = item if isinstance(item, int) else int.from_bytes(
+                item, "little" if self.little else "big", signed=self.signed
+            )
+            if self.kind == "bits":
+                return {name: raw >> lsb & ((1 << width) - 1) for name, (lsb, width) in self.bits.items()}
+            if self.enum:
+                return {self.name: self.enum.get(raw, raw)}
+            return {self.name: raw * self.factor + self.offset if self.scaled else raw}
+        if self.kind == "ascii":
+            return {self.name: item.decode("ascii").rstrip(self.padding + "\x00")}
+        if self.kind == "bcd":
+            return {self.name: item.hex()}
+        return {self.name: item}
+
+    # --- NumPy decoder ----------------------------------------------------
+
+    @property
+    def dtype(self) -> Union[np.dtype, tuple]:
+        """The field type of the layout dtype."""
+        if self.native:
+            order = "<" if self.little else ">"
+            return np.dtype(f"{order}{'i' if self.signed else 'u'}{self.length}")
+        if self.kind == "ascii":
+            return np.dtype(f"S{self.length}")
+        return np.dtype((np.uint8, (self.length,)))
+
+    def convert_array(self, column: np.ndarray) -> dict[str, np.ndarray]:
+        """Converts the field column of many records into the decoded values."""
+        if self.integer:
+            if self.native:
+                raw = column.astype(np.int64)
+            else:
+                weights = 1 << (8 * np.arange(self.length, dtype=np.int64))
+                raw = column.astype(np.int64) @ (weights if self.little else weights[::-1])
+                if self.signed:
+                    sign = np.int64(1) << (8 * self.length - 1)
+                    raw = np.where(raw >= sign, raw - 2 * sign, raw)
+            if self.kind == "bits":
+                return {name: raw >> lsb & ((1 << width) - 1) for name, (lsb, width) in self.bits.items()}
+            if self.enum:
+                keys = np.array(sorted(self.enum), dtype=np.int64)
+                labels = np.array([self.enum[key] for key in keys], dtype=object)
+                index = np.minimum(np.searchsorted(keys, raw), len(keys) - 1)
+                known = keys[index] == raw
+                values = raw.astype(object)
+                values[known] = labels[index[known]]
+                return {self.name: values}
+            return {self.name: raw * self.factor + self.offset if self.scaled else raw}
+        if self.kind == "ascii":
+            text = np.char.decode(column, "ascii")
+            return {self.name: np.char.rstrip(text, self.padding)}
+        if self.kind == "bcd":
+            digits = np.stack([column >> 4, column & 0x0F], axis=-1).reshape(len(column), -1)
+            return {self.name: digits.astype(str).astype(object).sum(axis=1).astype(str)}
+        return {self.name: column}
+
+
+class DidLayout:
+    """The typed layout of a DID record, compiled for fast decoding.
+
+    A layout is a list of fixed-length fields, each described by a codec of
+    the DID database (see ``codecs.compile_encoder``):
+
+    - ``uint``/``int`` of any ``length`` up to 8 bytes and either
+      ``byteorder``, scaled to ``raw * factor + offset``;
+    - an ``enum`` mapping raw values to labels (unknown values stay raw);
+    - ``bits``: an integer split into the bitfields of ``fields``, a mapping
+      of names to ``[lsb, width]``; each bitfield is a decoded value;
+    - ``ascii`` (stripped of ``padding``), ``bcd`` (the digit string) and
+      ``bytes``.
+
+    The layout is compiled once into a ``struct.Struct`` for single records
+    and into a NumPy structured dtype, so that ``decode_many`` decodes any
+    number of records with one ``np.frombuffer`` pass and vectorized column
+    conversions.
+
+    With a ``did``, records are whole positive Read Data By Identifier
+    responses (``0x62``, the DID, then the fields) and their header is
+    checked.
+
+    Attributes:
+        did (int | None): The DID of the response records.
+        fields (list[_Field]): The compiled fields.
+        header_length (int): The number of header bytes of a record.
+        size (int): The number of bytes of a record.
+        struct (struct.Struct): The single record decoder.
+        dtype (np.dtype): The record type of ``decode_many``.
+    """
+    def __init__(self, fields: list[dict], did: Union[int, None] = None) -> None:
+        self.did = did
+        self.fields = [_Field(field.get("name", f"field_{index}"), field) for index, field in enumerate(fields)]
+        self.header_length = 0 if did is None else 3
+        integers = [field for field in self.fields if field.integer and field.length > 1]
+        little = bool(integers) and integers[0].little
+        header = "" if did is None else "B2s"
+        self.struct = struct.Struct(("<" if little else ">") + header + "".join(
+            field.struct_code(little) for field in self.fields
+        ))
+        dtype = [] if did is None else [("_sid", np.uint8), ("_did", ">u2")]
+        self.dtype = np.dtype(dtype + [(f"_{index}", field.dtype) for index, field in enumerate(self.fields)])
+        self.size = self.dtype.itemsize
+        if self.struct.size != self.size:
+            raise ValueError("layout struct and dtype disagree on the record size")
+
+    @classmethod
+    def from_definition(cls, entry: dict, length: Union[int, None] = None, response: bool = True) -> 'DidLayout':
+        """Builds the layout of a DID database entry.
+
+        Args:
+            entry: The definition entry (``did``, ``name``, ``codec``).
+            length: The data length, for codecs without a ``length``.
+            response: True to decode whole responses, False for bare data.
+        """
+        did = parse_number(entry["did"])
+        codec = dict(entry.get("codec", {"type": "bytes"}))
+        codec.setdefault("length", length)
+        codec["name"] = entry.get("name", f"DID_{did:04X}")
+        return cls([codec], did if response else None)
+
+    @property
+    def names(self) -> list[str]:
+        """The names of the decoded values."""
+        return [name for field in self.fields for name in field.outputs]
+
+    def _check_header(self, sid: Any, did: Any) -> None:
+        if np.any(sid != READ_DATA_BY_IDENTIFIER_RESPONSE) or np.any(did != self.did):
+            raise ValueError(f"record is not a positive response for DID 0x{self.did:04X}")
+
+    def decode(self, record: Union[bytes, bytearray, list[int]]) -> dict[str, Any]:
+        """Decodes one record.
+
+        Raises:
+            ValueError: If the record has the wrong length or header.
+        """
+        record = bytes(record)
+        if len(record) != self.size:
+            raise ValueError(f"expected {self.size} bytes, got {len(record)}")
+        items = self.struct.unpack(record)
+        if self.did is not None:
+            self._check_header(items[0], int.from_bytes(items[1], "big"))
+            items = items[2:]
+        values = {}
+        for field, item in zip(self.fields, items):
+            values.update(field.convert(item))
+        return values
+
+    def decode_many(
+        self, records: Union[bytes, bytearray, memoryview, np.ndarray, Iterable[Union[bytes, list[int]]]]
+    ) -> dict[str, np.ndarray]:
+        """Decodes many records in one vectorized pass.
+
+        Args:
+            records: The concatenated records as one buffer, or an iterable
+                of records.
+
+        Returns:
+            One array per decoded value, with one item per record.
+
+        Raises:
+            ValueError: If a record has the wrong length or header.
+        """
+        if not isinstance(records, (bytes, bytearray, memoryview, np.ndarray)):
+            records = [bytes(record) for record in records]
+            if any(len(record) != self.size for record in records):
+                raise ValueError(f"every record must have {self.size} bytes")
+            records = b"".join(records)
+        if len(records) % self.size:
+            raise ValueError(f"buffer is not a whole number of {self.size}-byte records")
+        table = np.frombuffer(records, dtype=self.dtype)
+        if self.did is not None:
+            self._check_header(table["_sid"], table["_did"])
+        values = {}
+        for index, field in enumerate(self.fields):
+            values.update(field.convert_array(table[f"_{index}"]))
+        return values
@@ -0,0 +1,191 @@
+import os
+import json
+from operator import attrgetter
+from typing import TYPE_CHECKING, Any, Callable, Union
+
+from py_uds_demo.core.utils.codecs import compile_encoder, compile_scaling, parse_number
+
+if TYPE_CHECKING:
+    from py_uds_demo.core.server import UdsServer
+
+
+DEFAULT_DID_DATABASE = os.path.join(os.path.dirname(__file__), "did_database.json")
+
+
+class DidDefinition:
+    """A single Data Identifier described by a definition file.
+
+    Attributes:
+        did (int): The 2-byte identifier.
+        name (str): The symbolic name of the DID.
+        codec (dict): The codec definition (see ``codecs.compile_encoder``).
+        writable (bool): True if Write Data By Identifier may change the DID.
+        source (str | None): For dynamic DIDs, the dotted attribute path on
+            the server that provides the value.
+        signal (str | None): For DIDs backed by the signal model, the name of
+            the signal whose physical value is encoded.
+        encode (Callable): The compiled encoder.
+        prefix (bytes): The DID as the 2 bytes that start every record.
+    """
+    def __init__(
+        self, did: int, name: str, codec: dict, encode: Callable[[Any], bytes],
+        writable: bool = False, source: Union[str, None] = None, signal: Union[str, None] = None,
+    ) -> None:
+        self.did = did
+        self.name = name
+        self.codec = codec
+        self.encode = encode
+        self.writable = writable
+        self.source = source
+        self.signal = signal
+        self.prefix = did.to_bytes(2, "big")
+
+
+class DidDatabase:
+    """A registry of Data Identifiers loaded from a declarative definition.
+
+    Static DIDs are encoded once when they are added: ``records`` holds the
+    ready-to-send ``DID + data`` bytes. Dynamic DIDs hold a compiled provider
+    that builds the record from the live server state. A read is a single
+    dictionary lookup in either case.
+
+    Definition files are JSON (or YAML, if PyYAML is installed) documents with
+    a ``dids`` list. Each entry has ``did``, ``name``, ``codec`` and either a
+    static ``value``, a dynamic ``source`` or a ``signal`` of the server's
+    signal model (encoded through the codec scaling), plus an optional
+    ``writable`` flag. Numbers may be written as hex strings, e.g. ``"0xF190"``.
+
+    The scaling data served by Read Scaling Data By Identifier is built from
+    the codec when a DID is added: the data length comes from the codec
+    ``length``, or from the encoded value of a static DID.
+
+    Attributes:
+        definitions (dict[int, DidDefinition]): All known DIDs.
+        records (dict[int, bytes]): Pre-encoded records of static DIDs.
+        providers (dict[int, Callable]): Record builders of dynamic DIDs.
+        scaling_records (dict[int, bytes]): Pre-encoded ``DID + scaling
+            data`` records.
+    """
+    def __init__(self) -> None:
+        self.definitions: dict[int, DidDefinition] = {}
+        self.records: dict[int, bytes] = {}
+        self.providers: dict[int, Callable[['UdsServer'], bytes]] = {}
+        self.scaling_records: dict[int, bytes] = {}
+        self._encoders: dict[tuple, Callable[[Any], bytes]] = {}
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_DID_DATABASE) -> 'DidDatabase':
+        """Loads a database from a JSON or YAML definition file.
+
+        Args:
+            path: The definition file path.
+
+        Returns:
+            The loaded database.
+        """
+        with open(path, encoding="utf-8") as file:
+            if path.endswith((".yaml", ".yml")):
+                try:
+                    import yaml
+                except ImportError as error:
+                    raise ImportError("PyYAML is required to load YAML DID definitions") from error
+                document = yaml.safe_load(file)
+            else:
+                document = json.load(file)
+        database = cls()
+        for entry in document["dids"]:
+            database.add(entry)
+        return database
+
+    def add(self, entry: dict) -> DidDefinition:
+        """Adds (or replaces) one DID from its definition entry.
+
+        Args:
+            entry: The definition entry.
+
+        Returns:
+            The compiled DID definition.
+        """
+        did = parse_number(entry["did"])
+        codec = entry.get("codec", {"type": "bytes"})
+        key = json.dumps(codec, sort_keys=True)
+        encode = self._encoders.get(key)
+        if encode is None:
+            encode = self._encoders[key] = compile_encoder(codec)
+        definition = DidDefinition(
+            did, entry.get("name", f"DID_{did:04X}"), codec, encode,
+            writable=entry.get("writable", False), source=entry.get("source"), signal=entry.get("signal"),
+        )
+        self.definitions[did] = definition
+        self.records.pop(did, None)
+        self.providers.pop(did, None)
+        self.scaling_records.pop(did, None)
+        if definition.signal is not None:
+            signal = definition.signal
+            prefix = definition.prefix
+            self.providers[did] = lambda uds_server: prefix + encode(uds_server.signals.value(signal))
+        elif definition.source is not None:
+            getter = attrgetter(definition.source)
+            prefix = definition.prefix
+            self.providers[did] = lambda uds_server: prefix + encode(getter(uds_server))
+        else:
+            self.records[did] = definition.prefix + encode(parse_number(entry.get("value", b"")))
+        length = codec.get("length")
+        if length is None and did in self.records:
+            length = len(self.records[did]) - 2
+        if length:
+            self.scaling_records[did] = definition.prefix + compile_scaling(codec, length)
+        return definition
+
+    def add_provider(self, did: int, provider: Callable[['UdsServer'], bytes], name: Union[str, None] = None) -> None:
+        """Registers a dynamic DID whose data is built by ``provider``.
+
+        Args:
+            did: The identifier.
+            provider: A callable returning the DID data (without the DID).
+            name: The symbolic name of the DID.
+        """
+        prefix = did.to_bytes(2, "big")
+        self.definitions[did] = DidDefinition(did, name or f"DID_{did:04X}", {"type": "bytes"}, bytes)
+        self.records.pop(did, None)
+        self.scaling_records.pop(did, None)
+        self.providers[did] = lambda uds_server: prefix + provider(uds_server)
+
+    def remove(self, did: int) -> None:
+        """Removes a DID from the database, if present."""
+        self.definitions.pop(did, None)
+        self.records.pop(did, None)
+        self.providers.pop(did, None)
+        self.scaling_records.pop(did, None)
+
+    def read(self, did: int, uds_server: 'UdsServer') -> Union[bytes, None]:
+        """Returns the ``DID + data`` record of a DID.
+
+        Args:
+            did: The identifier.
+            uds_server: The server providing state for dynamic DIDs.
+
+        Returns:
+            The encoded record, or None if the DID is not defined.
+        """
+        record = self.records.get(did)
+        if record is not None:
+            return record
+        provider = self.providers.get(did)
+        if provider is not None:
+            return provider(uds_server)
+        return None
+
+    def write(self, did: int, data: bytes) -> None:
+        """Replaces the data of a static DID.
+
+        Args:
+            did: The identifier.
+            data: The new raw data.
+        """
+        self.records[did] = self.definitions[did].prefix + bytes(data)
+
+    @property
+    def writable_dids(self) -> list[int]:
+        """The identifiers of all writable DIDs."""
+        return [did for did, definition in self.definitions.items() if definition.writable]
@@ -0,0 +1,464 @@
+from typing import Callable, Iterable, Iterator, Union
+
+import numpy as np
+
+
+# DTC status bits (ISO 14229-1 D.2)
+TEST_FAILED = 0x01
+TEST_FAILED_THIS_OPERATION_CYCLE = 0x02
+PENDING_DTC = 0x04
+CONFIRMED_DTC = 0x08
+TEST_NOT_COMPLETED_SINCE_LAST_CLEAR = 0x10
+TEST_FAILED_SINCE_LAST_CLEAR = 0x20
+TEST_NOT_COMPLETED_THIS_OPERATION_CYCLE = 0x40
+WARNING_INDICATOR_REQUESTED = 0x80
+
+STATUS_AFTER_CLEAR = TEST_NOT_COMPLETED_SINCE_LAST_CLEAR | TEST_NOT_COMPLETED_THIS_OPERATION_CYCLE
+"""The status byte of a DTC right after it was cleared (0x50)."""
+
+ALL_GROUPS = 0xFFFFFF
+"""The groupOfDTC value selecting every DTC."""
+
+OCCURRENCE_COUNTER_RECORD = 0x01
+"""The extended data record counting how often a DTC failed."""
+
+AGING_COUNTER_RECORD = 0x02
+"""The extended data record counting the operation cycles a DTC has been aging."""
+
+
+class RecordRing:
+    """A fixed number of record slots that are overwritten round-robin.
+
+    Record numbers are the slot numbers (1 to ``capacity``). Once all slots
+    are used, a new record replaces the oldest one.
+
+    Attributes:
+        slots (list): The record data of each slot, None while unused.
+        next_slot (int): The slot written by the next ``append``.
+    """
+    def __init__(self, capacity: int) -> None:
+        self.slots: list[Union[bytes, None]] = [None] * capacity
+        self.next_slot = 0
+
+    def append(self, data: bytes) -> int:
+        """Stores a record and returns its record number."""
+        slot = self.next_slot
+        self.slots[slot] = data
+        self.next_slot = (slot + 1) % len(self.slots)
+        return slot + 1
+
+    def get(self, record_number: int) -> Union[bytes, None]:
+        """Returns the data of a record, or None if it is not stored."""
+        if 1 <= record_number <= len(self.slots):
+            return self.slots[record_number - 1]
+        return None
+
+    def items(self) -> Iterator[tuple[int, bytes]]:
+        """Yields ``(record_number, data)`` of the stored records."""
+        for slot, data in enumerate(self.slots):
+            if data is not None:
+                yield slot + 1, data
+
+
+class DtcStore:
+    """A column store for Diagnostic Trouble Codes and their status bytes.
+
+    Every supported DTC owns one row. DTC numbers live in a ``uint32`` array
+    and status bytes in a ``uint8`` array, so status mask filtering is a
+    single vectorized operation over all rows. Severity, functional unit,
+    fault detection counter and permanent flag are further columns. Rows are
+    indexed by DTC number and by group for O(1) lookups. Clearing a DTC
+    resets its row instead of removing it: the set of supported DTCs never
+    shrinks.
+
+    Snapshot records are kept in a ``RecordRing`` per DTC and extended data
+    records in a dictionary per DTC; both only exist for DTCs that have
+    records. The first and most recent DTCs that failed or were confirmed are
+    tracked as row pointers updated on every status change.
+
+    The records are captured where statuses change: when the testFailed bit
+    of a DTC rises, a snapshot of ``snapshot_dids`` is recorded (read through
+    ``did_reader``) and its occurrence counter record is incremented; when
+    the confirmedDTC bit rises, the DTC is flagged permanent.
+
+    Attributes:
+        status_availability_mask (int): The status bits supported by the
+            server, reported by Read DTC Information.
+        group_mask (int): The bits of a DTC number that form its default
+            group (by default the DTC high byte).
+        snapshot_records_per_dtc (int): The ring size of snapshot records.
+        extended_data_record_lengths (dict[int, int]): The supported extended
+            data record numbers and their data lengths.
+        snapshot_dids (list[int]): The DIDs frozen in the snapshot record of
+            a failing DTC.
+        first_failed (int | None): The row of the first DTC that failed.
+        most_recent_failed (int | None): The row of the last DTC that failed.
+        first_confirmed (int | None): The row of the first confirmed DTC.
+        most_recent_confirmed (int | None): The row of the last confirmed DTC.
+        listener (Callable | None): Called with ``(dtc, old_status,
+            new_status)`` for every status change. Not part of the pickled
+            state.
+        did_reader (Callable | None): Returns the ``DID + data`` record of a
+            DID (or None) for snapshot records. Not part of the pickled state.
+    """
+    def __init__(
+        self, status_availability_mask: int = 0xFF, group_mask: int = 0xFF0000, capacity: int = 64,
+        snapshot_records_per_dtc: int = 2, extended_data_record_lengths: Union[dict[int, int], None] = None,
+        snapshot_dids: Iterable[int] = (),
+    ) -> None:
+        self.status_availability_mask = status_availability_mask
+        self.group_mask = group_mask
+        self.snapshot_records_per_dtc = snapshot_records_per_dtc
+        self.extended_data_record_lengths = (
+            {0x01: 1, 0x02: 1} if extended_data_record_lengths is None else extended_data_record_lengths
+        )
+        self.snapshot_dids = list(snapshot_dids)
+        self.listener: Union[Callable[[int, int, int], None], None] = None
+        self.did_reader: Union[Callable[[int], Union[bytes, None]], None] = None
+        self.first_failed: Union[int, None] = None
+        self.most_recent_failed: Union[int, None] = None
+        self.first_confirmed: Union[int, None] = None
+        self.most_recent_confirmed: Union[int, None] = None
+        self._numbers = np.zeros(capacity, dtype=np.uint32)
+        self._status = np.zeros(capacity, dtype=np.uint8)
+        self._severity = np.zeros(capacity, dtype=np.uint8)
+        self._functional_unit = np.zeros(capacity, dtype=np.uint8)
+        self._fault_detection_counter = np.zeros(capacity, dtype=np.int8)
+        self._permanent = np.zeros(capacity, dtype=np.bool_)
+        self._count = 0
+        self._index: dict[int, int] = {}
+        self._groups: dict[int, list[int]] = {}
+        self._group_rows: dict[int, np.ndarray] = {}
+        self._snapshots: dict[int, RecordRing] = {}
+        self._extended_data: dict[int, dict[int, bytes]] = {}
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state["listener"] = None
+        state["did_reader"] = None
+        state["_group_rows"] = {}
+        return state
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, dtc: int) -> bool:
+        return dtc in self._index
+
+    @property
+    def numbers(self) -> np.ndarray:
+        """The DTC numbers of all rows (a view, do not resize)."""
+        return self._numbers[:self._count]
+
+    @property
+    def status(self) -> np.ndarray:
+        """The status bytes of all rows (a view, do not resize)."""
+        return self._status[:self._count]
+
+    @property
+    def severity(self) -> np.ndarray:
+        """The severity bytes of all rows (a view, do not resize)."""
+        return self._severity[:self._count]
+
+    @property
+    def fault_detection_counter(self) -> np.ndarray:
+        """The signed fault detection counters of all rows (a view, do not resize)."""
+        return self._fault_detection_counter[:self._count]
+
+    @property
+    def permanent(self) -> np.ndarray:
+        """The permanent flags of all rows (a view, do not resize)."""
+        return self._permanent[:self._count]
+
+    @property
+    def groups(self) -> list[int]:
+        """The known DTC groups."""
+        return list(self._groups)
+
+    @property
+    def snapshot_dtcs(self) -> list[int]:
+        """The rows of DTCs with snapshot records, in order of first capture."""
+        return list(self._snapshots)
+
+    def _grow(self, needed: int) -> None:
+        """Resizes the columns so that ``needed`` rows fit."""
+        capacity = max(len(self._numbers), 1)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        self._numbers = np.resize(self._numbers, capacity)
+        self._status = np.resize(self._status, capacity)
+        self._severity = np.resize(self._severity, capacity)
+        self._functional_unit = np.resize(self._functional_unit, capacity)
+        self._fault_detection_counter = np.resize(self._fault_detection_counter, capacity)
+        self._permanent = np.resize(self._permanent, capacity)
+
+    def add(
+        self, dtc: int, status: int = 0x00, group: Union[int, None] = None,
+        severity: int = 0x00, functional_unit: int = 0x00,
+    ) -> int:
+        """Adds a supported DTC, or updates the status of an existing one.
+
+        Args:
+            dtc: The 3-byte DTC number.
+            status: The initial status byte.
+            group: The DTC group. Defaults to ``dtc & group_mask``.
+            severity: The DTC severity byte.
+            functional_unit: The DTC functional unit.
+
+        Returns:
+            The row of the DTC.
+        """
+        row = self._index.get(dtc)
+        if row is not None:
+            self.set_status(dtc, status)
+            return row
+        rows = self.add_many([dtc], [status], None if group is None else [group], [severity], [functional_unit])
+        return int(rows[0])
+
+    def add_many(
+        self, dtcs: Iterable[int], statuses: Iterable[int], groups: Union[Iterable[int], None] = None,
+        severities: Union[Iterable[int], int] = 0x00, functional_units: Union[Iterable[int], int] = 0x00,
+    ) -> np.ndarray:
+        """Adds many new DTCs at once.
+
+        Args:
+            dtcs: The DTC numbers, none of which may exist yet.
+            statuses: The status byte of each DTC.
+            groups: The group of each DTC. Defaults to ``dtc & group_mask``.
+            severities: The severity of each DTC, or one for all.
+            functional_units: The functional unit of each DTC, or one for all.
+
+        Returns:
+            The rows of the new DTCs.
+        """
+        numbers = np.asarray(dtcs, dtype=np.uint32)
+        start, stop = self._count, self._count + len(numbers)
+        self._grow(stop)
+        self._numbers[start:stop] = numbers
+        self._status[start:stop] = np.asarray(statuses, dtype=np.uint8)
+        self._severity[start:stop] = np.asarray(severities, dtype=np.uint8)
+        self._functional_unit[start:stop] = np.asarray(functional_units, dtype=np.uint8)
+        self._fault_detection_counter[start:stop] = 0
+        self._permanent[start:stop] = False
+        self._count = stop
+        groups = numbers & self.group_mask if groups is None else np.asarray(groups, dtype=np.uint32)
+        for row, (dtc, group) in enumerate(zip(numbers.tolist(), groups.tolist()), start):
+            if dtc in self._index:
+                raise ValueError(f"DTC 0x{dtc:06X} already exists")
+            self._index[dtc] = row
+            self._groups.setdefault(group, []).append(row)
+            self._group_rows.pop(group, None)
+        return np.arange(start, stop)
+
+    def row_of(self, dtc: int) -> Union[int, None]:
+        """Returns the row of a DTC, or None if it is not supported."""
+        return self._index.get(dtc)
+
+    def rows_of_group(self, group: int) -> np.ndarray:
+        """Returns the rows of every DTC of a group (empty if unknown)."""
+        rows = self._group_rows.get(group)
+        if rows is None:
+            rows = self._group_rows[group] = np.asarray(self._groups.get(group, ()), dtype=np.intp)
+        return rows
+
+    def select(self, group_of_dtc: int) -> Union[np.ndarray, None]:
+        """Resolves a groupOfDTC parameter into rows.
+
+        A supported DTC number takes precedence over a group of the same value.
+
+        Args:
+            group_of_dtc: ``ALL_GROUPS``, a single DTC number or a group.
+
+        Returns:
+            The selected rows, or None if the value matches nothing.
+        """
+        if group_of_dtc == ALL_GROUPS:
+            return np.arange(self._count)
+        row = self._index.get(group_of_dtc)
+        if row is not None:
+            return np.asarray([row], dtype=np.intp)
+        if group_of_dtc in self._groups:
+            return self.rows_of_group(group_of_dtc)
+        return None
+
+    def get_status(self, dtc: int) -> Union[int, None]:
+        """Returns the status byte of a DTC, or None if it is not supported."""
+        row = self._index.get(dtc)
+        return None if row is None else int(self._status[row])
+
+    def set_status(self, dtc: int, status: int) -> None:
+        """Sets the status byte of one DTC."""
+        self.set_rows_status(np.asarray([self._index[dtc]], dtype=np.intp), status)
+
+    def set_rows_status(self, rows: np.ndarray, statuses: Union[np.ndarray, int]) -> None:
+        """Sets the status bytes of many rows at once.
+
+        The first/most recent pointers are moved to rows whose testFailed or
+        confirmedDTC bit rises. Rows whose testFailed bit rises get a snapshot
+        record and their occurrence counter incremented, rows whose
+        confirmedDTC bit rises are flagged permanent. The listener, if any, is
+        only called for rows whose status changed.
+
+        Args:
+            rows: The rows to update.
+            statuses: One status byte per row, or a single byte for all rows.
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        old = self._status[rows]
+        self._status[rows] = statuses
+        new = self._status[rows]
+        rising = new & ~old
+        failed = np.flatnonzero(rising & TEST_FAILED)
+        if len(failed):
+            if self.first_failed is None:
+                self.first_failed = int(rows[failed[0]])
+            self.most_recent_failed = int(rows[failed[-1]])
+            self._capture_failures(rows[failed])
+        confirmed = np.flatnonzero(rising & CONFIRMED_DTC)
+        if len(confirmed):
+            if self.first_confirmed is None:
+                self.first_confirmed = int(rows[confirmed[0]])
+            self.most_recent_confirmed = int(rows[confirmed[-1]])
+            self._permanent[rows[confirmed]] = True
+        if self.listener is not None:
+            for position in np.flatnonzero(old != new).tolist():
+                self.listener(int(self._numbers[rows[position]]), int(old[position]), int(new[position]))
+
+    def _capture_failures(self, rows: np.ndarray) -> None:
+        """Records the snapshot and counts the occurrence of rows that just failed."""
+        count_occurrences = self.extended_data_record_lengths.get(OCCURRENCE_COUNTER_RECORD) == 1
+        capture = bool(self.snapshot_dids) and self.did_reader is not None
+        for row in rows.tolist():
+            dtc = int(self._numbers[row])
+            if capture:
+                records = (self.did_reader(did) for did in self.snapshot_dids)
+                self.record_snapshot(dtc, [record for record in records if record is not None])
+            if count_occurrences:
+                occurrences = self.extended_data_of(row).get(OCCURRENCE_COUNTER_RECORD, b"\x00")[0]
+                self.set_extended_data(dtc, OCCURRENCE_COUNTER_RECORD, bytes([min(occurrences + 1, 0xFF)]))
+
+    def set_fault_detection_counter(self, dtc: int, value: int) -> None:
+        """Sets the fault detection counter (-128 to 127) of one DTC."""
+        self._fault_detection_counter[self._index[dtc]] = value
+
+    def set_permanent(self, dtc: int, permanent: bool = True) -> None:
+        """Flags a DTC as permanent. Permanent DTCs survive ``clear_rows``."""
+        self._permanent[self._index[dtc]] = permanent
+
+    def severity_of(self, row: int) -> tuple[int, int]:
+        """Returns the ``(severity, functional_unit)`` of a row."""
+        return int(self._severity[row]), int(self._functional_unit[row])
+
+    def record_snapshot(self, dtc: int, identifiers: Iterable[bytes]) -> int:
+        """Stores a snapshot record for a DTC.
+
+        Args:
+            dtc: The DTC number.
+            identifiers: The ``DID + data`` records frozen in the snapshot.
+
+        Returns:
+            The snapshot record number.
+        """
+        row = self._index[dtc]
+        identifiers = list(identifiers)
+        ring = self._snapshots.get(row)
+        if ring is None:
+            ring = self._snapshots[row] = RecordRing(self.snapshot_records_per_dtc)
+        return ring.append(bytes([len(identifiers)]) + b"".join(identifiers))
+
+    def snapshots_of(self, row: int) -> Union[RecordRing, None]:
+        """Returns the snapshot records of a row, or None if it has none."""
+        return self._snapshots.get(row)
+
+    def set_extended_data(self, dtc: int, record_number: int, data: bytes) -> None:
+        """Stores an extended data record for a DTC.
+
+        Raises:
+            ValueError: If the record number is not supported or the data has
+                the wrong length.
+        """
+        length = self.extended_data_record_lengths.get(record_number)
+        if length is None or len(data) != length:
+            raise ValueError(f"invalid extended data record 0x{record_number:02X}")
+        self._extended_data.setdefault(self._index[dtc], {})[record_number] = bytes(data)
+
+    def extended_data_of(self, row: int) -> dict[int, bytes]:
+        """Returns the extended data records of a row (empty if none)."""
+        return self._extended_data.get(row, {})
+
+    def clear_rows(self, rows: np.ndarray) -> None:
+        """Clears the diagnostic information of the given rows.
+
+        The status is set to ``STATUS_AFTER_CLEAR``, the fault detection
+        counter, snapshot and extended data records are reset, and pointers
+        into the cleared rows are dropped. The permanent flag is kept.
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        self.set_rows_status(rows, STATUS_AFTER_CLEAR)
+        self._fault_detection_counter[rows] = 0
+        cleared = set(rows.tolist())
+        for row in cleared:
+            self._snapshots.pop(row, None)
+            self._extended_data.pop(row, None)
+        for pointer in ("first_failed", "most_recent_failed", "first_confirmed", "most_recent_confirmed"):
+            if getattr(self, pointer) in cleared:
+                setattr(self, pointer, None)
+
+    def rows_by_status_mask(self, status_mask: int) -> np.ndarray:
+        """Returns the rows whose status matches ``status_mask``.
+
+        A DTC matches when ``status & status_mask & status_availability_mask``
+        is not zero, as specified for Read DTC Information.
+        """
+        return np.flatnonzero(self.status & (status_mask & self.status_availability_mask))
+
+    def count_by_status_mask(self, status_mask: int) -> int:
+        """Returns the number of DTCs matching ``status_mask``."""
+        return int(np.count_nonzero(self.status & (status_mask & self.status_availability_mask)))
+
+    def rows_by_severity_mask(self, severity_mask: int, status_mask: int) -> np.ndarray:
+        """Returns the rows matching both ``severity_mask`` and ``status_mask``."""
+        status_matches = (self.status & (status_mask & self.status_availability_mask)) != 0
+        return np.flatnonzero(((self.severity & severity_mask) != 0) & status_matches)
+
+    def rows_prefailed(self) -> np.ndarray:
+        """Returns the rows whose fault detection counter is between 1 and 126."""
+        counter = self.fault_detection_counter
+        return np.flatnonzero((counter > 0) & (counter < 127))
+
+    def encode_rows(self, rows: Union[np.ndarray, None] = None) -> bytes:
+        """Encodes rows as ``DTCHigh DTCMid DTCLow status`` records.
+
+        Args:
+            rows: The rows to encode. Defaults to all rows.
+
+        Returns:
+            The concatenated 4-byte records.
+        """
+        numbers = self.numbers if rows is None else self._numbers[rows]
+        records = np.empty((len(numbers), 4), dtype=np.uint8)
+        records[:, 0] = numbers >> 16
+        records[:, 1] = numbers >> 8
+        records[:, 2] = numbers
+        records[:, 3] = self.status if rows is None else self._status[rows]
+        return records.tobytes()
+
+    def encode_severity_rows(self, rows: np.ndarray) -> bytes:
+        """Encodes rows as ``severity functionalUnit DTC status`` records."""
+        records = np.empty((len(rows), 6), dtype=np.uint8)
+        records[:, 0] = self._severity[rows]
+        records[:, 1] = self._functional_unit[rows]
+        records[:, 2:] = np.frombuffer(self.encode_rows(rows), dtype=np.uint8).reshape(-1, 4)
+        return records.tobytes()
+
+    def encode_fault_detection_counters(self, rows: np.ndarray) -> bytes:
+        """Encodes rows as ``DTC faultDetectionCounter`` records."""
+        numbers = self._numbers[rows]
+        records = np.empty((len(rows), 4), dtype=np.uint8)
+        records[:, 0] = numbers >> 16
+        records[:, 1] = numbers >> 8
+        records[:, 2] = numbers
+        records[:, 3] = self._fault_detection_counter[rows].view(np.uint8)
+        return records.tobytes()
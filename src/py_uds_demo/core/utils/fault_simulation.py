@@ -0,0 +1,238 @@
+from typing import Iterable, Union
+
+import numpy as np
+
+from py_uds_demo.core.utils.dtc_store import (
+    AGING_COUNTER_RECORD, CONFIRMED_DTC, OCCURRENCE_COUNTER_RECORD, PENDING_DTC, STATUS_AFTER_CLEAR, TEST_FAILED,
+    TEST_FAILED_SINCE_LAST_CLEAR, TEST_FAILED_THIS_OPERATION_CYCLE, TEST_NOT_COMPLETED_SINCE_LAST_CLEAR,
+    TEST_NOT_COMPLETED_THIS_OPERATION_CYCLE, WARNING_INDICATOR_REQUESTED, DtcStore,
+)
+
+FDC_MAX = 127
+FDC_MIN = -128
+
+
+class FaultSimulation:
+    """Simulates the DTC status lifecycle of a fleet of ECUs.
+
+    The state of every DTC of every ECU lives in ``(ecus, dtcs)`` arrays and
+    each step updates all of them at once. The status bits follow the
+    lifecycle of ISO 14229-1 Annex D:
+
+    - A monitor result moves the fault detection counter (FDC) up by
+      ``step_up`` (prefailed) or down by ``step_down`` (prepassed). The test
+      fails when the FDC reaches +127 and passes when it reaches -128.
+    - A failed test sets testFailed, testFailedThisOperationCycle,
+      pendingDTC and testFailedSinceLastClear. After failing in
+      ``confirmation_threshold`` operation cycles in a row the DTC becomes
+      confirmed, and warningIndicatorRequested is set for DTCs with a
+      warning indicator.
+    - A new operation cycle clears testFailedThisOperationCycle, sets
+      testNotCompletedThisOperationCycle and resets the FDC.
+    - An operation cycle that completed the test without failing clears
+      pendingDTC, counts towards healing (clearing warningIndicatorRequested
+      after ``healing_threshold`` cycles) and aging (clearing confirmedDTC
+      after ``aging_threshold`` cycles).
+
+    One ignition (drive) cycle is one operation cycle. ``run_cycles``
+    fast-forwards whole cycles: faults appear and disappear as a Markov
+    process and every monitor reports the same result for all samples of a
+    cycle, so the FDC of a cycle is computed in closed form.
+
+    Attributes:
+        dtcs (np.ndarray): The DTC numbers (the columns).
+        status (np.ndarray): The ``(ecus, dtcs)`` status bytes.
+        fault_detection_counter (np.ndarray): The ``(ecus, dtcs)`` FDCs.
+        fault_present (np.ndarray): True where a fault is currently present.
+        pending_cycles (np.ndarray): Consecutive operation cycles that failed.
+        occurrence_counter (np.ndarray): How often the test failed (the
+            testFailed bit rose) since the last clear.
+        aging_counter (np.ndarray): Passed cycles since the last failure of
+            a confirmed DTC.
+        healing_counter (np.ndarray): Passed cycles since the warning
+            indicator was requested.
+        warning_indicator (np.ndarray): Per DTC, True if it requests the
+            warning indicator when confirmed.
+        fault_rate (np.ndarray | float): Per cycle probability of a fault
+            appearing (per DTC or for all).
+        repair_rate (np.ndarray | float): Per cycle probability of a present
+            fault disappearing.
+        test_rate (np.ndarray | float): Per cycle probability of a monitor
+            running.
+        step_up (int): FDC increment of a prefailed sample.
+        step_down (int): FDC decrement of a prepassed sample.
+        confirmation_threshold (int): Failed cycles needed to confirm.
+        aging_threshold (int): Passed cycles after which a DTC is aged out.
+        healing_threshold (int): Passed cycles after which the warning
+            indicator is switched off.
+        operation_cycles (int): The number of operation cycles run so far.
+    """
+    def __init__(
+        self, ecus: int, dtcs: Iterable[int], fault_rate: Union[np.ndarray, float] = 0.01,
+        repair_rate: Union[np.ndarray, float] = 0.1, test_rate: Union[np.ndarray, float] = 1.0,
+        step_up: int = 32, step_down: int = 32, confirmation_threshold: int = 1,
+        aging_threshold: int = 40, healing_threshold: int = 3,
+        warning_indicator: Union[Iterable[bool], bool] = True, seed: Union[int, None] = None,
+    ) -> None:
+        self.dtcs = np.asarray(list(dtcs), dtype=np.uint32)
+        shape = (ecus, len(self.dtcs))
+        self.status = np.full(shape, STATUS_AFTER_CLEAR, dtype=np.uint8)
+        self.fault_detection_counter = np.zeros(shape, dtype=np.int8)
+        self.fault_present = np.zeros(shape, dtype=np.bool_)
+        self.pending_cycles = np.zeros(shape, dtype=np.uint16)
+        self.occurrence_counter = np.zeros(shape, dtype=np.uint16)
+        self.aging_counter = np.zeros(shape, dtype=np.uint16)
+        self.healing_counter = np.zeros(shape, dtype=np.uint16)
+        self.warning_indicator = np.broadcast_to(np.asarray(warning_indicator, dtype=np.bool_), shape[1:]).copy()
+        self.fault_rate = fault_rate
+        self.repair_rate = repair_rate
+        self.test_rate = test_rate
+        self.step_up = step_up
+        self.step_down = step_down
+        self.confirmation_threshold = confirmation_threshold
+        self.aging_threshold = aging_threshold
+        self.healing_threshold = healing_threshold
+        self.operation_cycles = 0
+        self._rng = np.random.default_rng(seed)
+
+    @classmethod
+    def for_store(cls, dtc_store: DtcStore, ecus: int = 1, **kwargs) -> 'FaultSimulation':
+        """Creates a simulation for the DTCs of a ``DtcStore``.
+
+        Every ECU starts with the current status bytes of the store.
+
+        Args:
+            dtc_store: The store whose DTCs (and row order) are simulated.
+            ecus: The number of ECUs.
+            **kwargs: Further ``FaultSimulation`` arguments.
+
+        Returns:
+            The simulation.
+        """
+        simulation = cls(ecus, dtc_store.numbers, **kwargs)
+        simulation.status[:] = dtc_store.status
+        return simulation
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """The ``(ecus, dtcs)`` shape of the state arrays."""
+        return self.status.shape
+
+    def clear(self, ecus: Union[np.ndarray, slice] = slice(None)) -> None:
+        """Clears the DTCs of some ECUs (all by default), as service 0x14 does."""
+        self.status[ecus] = STATUS_AFTER_CLEAR
+        self.fault_detection_counter[ecus] = 0
+        self.pending_cycles[ecus] = 0
+        self.occurrence_counter[ecus] = 0
+        self.aging_counter[ecus] = 0
+        self.healing_counter[ecus] = 0
+
+    def start_operation_cycle(self) -> None:
+        """Starts a new operation cycle on every ECU."""
+        self.status &= ~np.uint8(TEST_FAILED_THIS_OPERATION_CYCLE)
+        self.status |= TEST_NOT_COMPLETED_THIS_OPERATION_CYCLE
+        self.fault_detection_counter[:] = 0
+
+    def monitor(self, failing: np.ndarray, tested: Union[np.ndarray, bool] = True, samples: int = 1) -> None:
+        """Feeds monitor results into the debouncing and status logic.
+
+        Args:
+            failing: ``(ecus, dtcs)`` booleans, True for prefailed samples.
+            tested: Where the monitors ran (all by default).
+            samples: The number of identical samples each monitor reported.
+        """
+        failing = np.asarray(failing, dtype=np.bool_)
+        tested = np.broadcast_to(np.asarray(tested, dtype=np.bool_), self.shape)
+        step = np.where(failing, self.step_up * samples, -self.step_down * samples)
+        counter = np.clip(self.fault_detection_counter.astype(np.int32) + step, FDC_MIN, FDC_MAX)
+        counter = np.where(tested, counter, self.fault_detection_counter)
+        self.fault_detection_counter[:] = counter
+        failed = tested & failing & (counter == FDC_MAX)
+        passed = tested & ~failing & (counter == FDC_MIN)
+
+        confirmed = failed & (self.pending_cycles >= self.confirmation_threshold - 1)
+        status = self.status
+        self.occurrence_counter += failed & ((status & TEST_FAILED) == 0)
+        status &= ~(
+            (failed | passed) * np.uint8(TEST_NOT_COMPLETED_SINCE_LAST_CLEAR | TEST_NOT_COMPLETED_THIS_OPERATION_CYCLE)
+            | passed * np.uint8(TEST_FAILED)
+        )
+        failed_bits = TEST_FAILED | TEST_FAILED_THIS_OPERATION_CYCLE | PENDING_DTC | TEST_FAILED_SINCE_LAST_CLEAR
+        status |= (
+            failed * np.uint8(failed_bits)
+            | confirmed * np.uint8(CONFIRMED_DTC)
+            | (confirmed & self.warning_indicator) * np.uint8(WARNING_INDICATOR_REQUESTED)
+        )
+        self.aging_counter *= ~failed
+        self.healing_counter *= ~failed
+
+    def end_operation_cycle(self) -> None:
+        """Ends the operation cycle: updates pending, aging and healing."""
+        status = self.status
+        failed = (status & TEST_FAILED_THIS_OPERATION_CYCLE) != 0
+        passed = ~failed & ((status & TEST_NOT_COMPLETED_THIS_OPERATION_CYCLE) == 0)
+        self.pending_cycles += failed
+        self.pending_cycles *= ~passed
+
+        healing = passed & ((status & WARNING_INDICATOR_REQUESTED) != 0)
+        self.healing_counter += healing
+        healed = healing & (self.healing_counter >= self.healing_threshold)
+        self.healing_counter *= ~healed
+
+        aging = passed & ((status & CONFIRMED_DTC) != 0)
+        self.aging_counter += aging
+        aged = aging & (self.aging_counter >= self.aging_threshold)
+        self.aging_counter *= ~aged
+
+        status &= ~(
+            passed * np.uint8(PENDING_DTC)
+            | healed * np.uint8(WARNING_INDICATOR_REQUESTED)
+            | aged * np.uint8(CONFIRMED_DTC)
+        )
+        self.operation_cycles += 1
+
+    def run_cycles(self, cycles: int, samples_per_cycle: int = 4) -> None:
+        """Fast-forwards whole operation cycles with random faults.
+
+        Args:
+            cycles: The number of operation cycles to run.
+            samples_per_cycle: The monitor samples reported in each cycle.
+        """
+        for _ in range(cycles):
+            random = self._rng.random((3, *self.shape))
+            appearing = ~self.fault_present & (random[0] < self.fault_rate)
+            repaired = self.fault_present & (random[1] < self.repair_rate)
+            self.fault_present ^= appearing | repaired
+            self.start_operation_cycle()
+            self.monitor(self.fault_present, random[2] < self.test_rate, samples_per_cycle)
+            self.end_operation_cycle()
+
+    def apply_to(self, dtc_store: DtcStore, ecu: int = 0) -> None:
+        """Writes the state of one ECU into a ``DtcStore``.
+
+        The store must hold the simulated DTCs in the same row order (see
+        ``for_store``). Status changes go through ``set_rows_status``, so the
+        first/most recent pointers and Response On Event see them, a DTC
+        whose testFailed bit rises gets a snapshot record and a confirmed DTC
+        is flagged permanent; the onDTCStatusChange events fire with the next
+        request the server processes, or at once with
+        ``UdsServer.process_changes``. Every DTC that failed since the last
+        clear gets the occurrence and aging counters of the simulation as
+        extended data records, where the store supports them.
+
+        Args:
+            dtc_store: The store to update.
+            ecu: The ECU whose state is written.
+        """
+        rows = np.arange(len(self.dtcs))
+        dtc_store.set_rows_status(rows, self.status[ecu])
+        dtc_store.fault_detection_counter[rows] = self.fault_detection_counter[ecu]
+        counters = {
+            OCCURRENCE_COUNTER_RECORD: self.occurrence_counter[ecu],
+            AGING_COUNTER_RECORD: self.aging_counter[ecu],
+        }
+        for row in np.flatnonzero(self.status[ecu] & TEST_FAILED_SINCE_LAST_CLEAR).tolist():
+            for record_number, counter in counters.items():
+                if dtc_store.extended_data_record_lengths.get(record_number) == 1:
+                    value = bytes([min(int(counter[row]), 0xFF)])
+                    dtc_store.set_extended_data(int(self.dtcs[row]), record_number, value)
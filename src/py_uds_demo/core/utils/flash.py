@@ -0,0 +1,317 @@
+import zlib
+from binascii import crc_hqx
+from bisect import bisect_left
+from typing import Callable, Iterator, Union
+
+import numpy as np
+
+
+ERASED = 0xFF
+"""The value of an erased flash byte."""
+
+CRC_CHUNK_SIZE = 0x10000
+"""The number of bytes checksummed per step of an incremental CRC."""
+
+
+class FlashError(ValueError):
+    """Raised when a flash operation violates the flash semantics."""
+
+
+def _crc32(data: memoryview, crc: int) -> int:
+    return zlib.crc32(data, crc)
+
+
+def _crc16(data: memoryview, crc: int) -> int:
+    return crc_hqx(data, crc)
+
+
+CRC_ALGORITHMS: dict[str, tuple[Callable[[memoryview, int], int], int, int]] = {
+    "crc32": (_crc32, 0, 4),
+    "crc16": (_crc16, 0xFFFF, 2),
+}
+"""The checksums: name -> ``(update function, initial value, length in bytes)``.
+
+``crc32`` is the zlib (ISO-HDLC) CRC-32, ``crc16`` is CRC-16/CCITT-FALSE.
+"""
+
+
+class FlashRegion:
+    """A flash region made of equally sized sectors.
+
+    Flash is erased sector by sector to 0xFF. A byte can be programmed once
+    between two erases: programming it again raises ``FlashError``, as a real
+    flash controller would refuse to program a non-erased cell.
+
+    Every byte outside the programmed ranges is 0xFF, so the content buffer
+    is only allocated when first used, and a pickled or copied region (e.g.
+    in a server snapshot or fork) carries the programmed ranges only.
+
+    Attributes:
+        address (int): The start address of the region.
+        size (int): The size of the region in bytes.
+        sector_size (int): The size of one sector in bytes.
+        data (bytearray): The region content.
+        programmed (list[tuple[int, int]]): The sorted, disjoint ``(start,
+            stop)`` offset ranges programmed since the last erase of their
+            sectors; adjacent ranges are merged.
+        erase_counts (np.ndarray): The number of erases of every sector.
+        write_counts (np.ndarray): The number of program operations that
+            touched every sector.
+        verified (np.ndarray): Per sector, False once the sector was erased
+            or programmed and True again after a successful memory check.
+        generation (int): Incremented by every erase and program operation.
+    """
+    def __init__(self, address: int, size: int, sector_size: int = 0x1000) -> None:
+        if size <= 0 or size % sector_size:
+            raise FlashError("region size must be a positive multiple of the sector size")
+        sectors = size // sector_size
+        self.address = address
+        self.size = size
+        self.sector_size = sector_size
+        self._data: Union[bytearray, None] = None
+        self.programmed: list[tuple[int, int]] = []
+        self.erase_counts = np.zeros(sectors, dtype=np.uint32)
+        self.write_counts = np.zeros(sectors, dtype=np.uint32)
+        self.verified = np.ones(sectors, dtype=np.bool_)
+        self.generation = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        data = state.pop("_data")
+        programmed = self.programmed if data is not None else []
+        state["_programmed_data"] = [bytes(data[start:stop]) for start, stop in programmed]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        programmed_data = state.pop("_programmed_data")
+        self.__dict__.update(state)
+        self._data = None
+        for (start, stop), content in zip(self.programmed, programmed_data):
+            self.data[start:stop] = content
+
+    @property
+    def data(self) -> bytearray:
+        """The region content, allocated erased on first use."""
+        if self._data is None:
+            self._data = bytearray([ERASED]) * self.size
+        return self._data
+
+    @property
+    def end_address(self) -> int:
+        """The first address after the region."""
+        return self.address + self.size
+
+    @property
+    def sector_count(self) -> int:
+        """The number of sectors."""
+        return len(self.erase_counts)
+
+    def contains(self, address: int, size: int) -> bool:
+        """Returns True if the region fully contains an address range."""
+        return self.address <= address and address + size <= self.end_address
+
+    def _offsets(self, address: int, size: int) -> tuple[int, int]:
+        """Converts an address range into region offsets."""
+        if size < 0 or not self.contains(address, size):
+            raise FlashError(f"range 0x{address:08X}+{size} is outside the flash region")
+        offset = address - self.address
+        return offset, offset + size
+
+    def is_programmed(self, start: int, stop: int) -> bool:
+        """Returns True if any byte of an offset range was programmed since its last erase."""
+        if start >= stop:
+            return False
+        index = bisect_left(self.programmed, (start,))
+        if index > 0 and self.programmed[index - 1][1] > start:
+            return True
+        return index < len(self.programmed) and self.programmed[index][0] < stop
+
+    def _mark_programmed(self, start: int, stop: int) -> None:
+        """Adds an offset range to ``programmed``, merging adjacent ranges."""
+        first = bisect_left(self.programmed, (start,))
+        if first > 0 and self.programmed[first - 1][1] == start:
+            first -= 1
+            start = self.programmed[first][0]
+        last = first
+        while last < len(self.programmed) and self.programmed[last][0] <= stop:
+            stop = max(stop, self.programmed[last][1])
+            last += 1
+        self.programmed[first:last] = [(start, stop)]
+
+    def _mark_erased(self, start: int, stop: int) -> None:
+        """Removes an offset range from ``programmed``."""
+        kept = []
+        for span_start, span_stop in self.programmed:
+            if span_start < start:
+                kept.append((span_start, min(span_stop, start)))
+            if span_stop > stop:
+                kept.append((max(span_start, stop), span_stop))
+        self.programmed = kept
+
+    def sectors_of(self, address: int, size: int) -> range:
+        """The indexes of the sectors touched by an address range."""
+        start, stop = self._offsets(address, size)
+        if start == stop:
+            return range(0)
+        return range(start // self.sector_size, (stop - 1) // self.sector_size + 1)
+
+    def erase(self, address: Union[int, None] = None, size: Union[int, None] = None) -> range:
+        """Erases every sector touched by a range (the whole region by default).
+
+        Returns:
+            The indexes of the erased sectors.
+        """
+        if address is None:
+            address, size = self.address, self.size
+        sectors = self.sectors_of(address, size)
+        start, stop = sectors.start * self.sector_size, sectors.stop * self.sector_size
+        if self._data is not None:
+            self._data[start:stop] = bytes([ERASED]) * (stop - start)
+        self._mark_erased(start, stop)
+        self.erase_counts[sectors.start:sectors.stop] += 1
+        self.verified[sectors.start:sectors.stop] = False
+        self.generation += 1
+        return sectors
+
+    def write(self, address: int, data: bytes) -> None:
+        """Programs bytes into erased flash.
+
+        Raises:
+            FlashError: If the range is outside the region or any of its
+                bytes was already programmed since the last erase.
+        """
+        start, stop = self._offsets(address, len(data))
+        if self.is_programmed(start, stop):
+            raise FlashError(f"flash at 0x{address:08X} must be erased before it is programmed")
+        self.data[start:stop] = data
+        if start < stop:
+            self._mark_programmed(start, stop)
+        sectors = self.sectors_of(address, len(data))
+        self.write_counts[sectors.start:sectors.stop] += 1
+        self.verified[sectors.start:sectors.stop] = False
+        self.generation += 1
+
+    def read(self, address: int, size: int) -> memoryview:
+        """Returns a read-only view of a range (no copy)."""
+        start, stop = self._offsets(address, size)
+        return memoryview(self.data).toreadonly()[start:stop]
+
+    def iter_crc(
+        self, address: int, size: int, algorithm: str = "crc32", chunk_size: int = CRC_CHUNK_SIZE
+    ) -> Iterator[tuple[int, int]]:
+        """Computes a CRC incrementally over ``memoryview`` slices.
+
+        Yields:
+            ``(bytes done, CRC so far)`` after every chunk; the last value is
+            the CRC of the whole range.
+        """
+        update, crc, _ = CRC_ALGORITHMS[algorithm]
+        view = self.read(address, size)
+        yield 0, crc
+        for start in range(0, size, chunk_size):
+            crc = update(view[start:start + chunk_size], crc)
+            yield min(start + chunk_size, size), crc
+
+    def crc(self, address: int, size: int, algorithm: str = "crc32") -> int:
+        """Computes the CRC of a range."""
+        for _, crc in self.iter_crc(address, size, algorithm):
+            pass
+        return crc
+
+    def mark_verified(self, address: int, size: int) -> None:
+        """Marks the sectors touched by a successfully checked range as verified."""
+        sectors = self.sectors_of(address, size)
+        self.verified[sectors.start:sectors.stop] = True
+
+
+class FlashMemory:
+    """The flash regions of the ECU.
+
+    Besides plain regions, the flash may have two banks (A/B) of the same
+    geometry mapped at the same address. Only one bank is addressed at a
+    time: the active one, or the inactive one while ``program_inactive_bank``
+    is set (the bootloader downloads the next application there). Switching
+    banks swaps an index, no data is copied.
+
+    Attributes:
+        regions (list[FlashRegion]): The plain regions, sorted by address.
+        banks (list[FlashRegion]): The two banks, or an empty list.
+        active_bank (int): The index of the bank the application runs from.
+        program_inactive_bank (bool): True if the inactive bank is addressed.
+    """
+    def __init__(
+        self, regions: Union[list[FlashRegion], None] = None, banks: Union[list[FlashRegion], None] = None
+    ) -> None:
+        self.regions: list[FlashRegion] = []
+        self.banks: list[FlashRegion] = []
+        self.active_bank = 0
+        self.program_inactive_bank = False
+        for region in regions or ():
+            self.add_region(region)
+        if banks:
+            self.set_banks(*banks)
+
+    def _check_overlap(self, address: int, end_address: int) -> None:
+        """Raises ``FlashError`` if an address range overlaps a region or the banks."""
+        for other in self.regions + self.banks[:1]:
+            if address < other.end_address and other.address < end_address:
+                raise FlashError(f"flash range 0x{address:08X} overlaps 0x{other.address:08X}")
+
+    def add_region(self, region: FlashRegion) -> FlashRegion:
+        """Adds a region.
+
+        Raises:
+            FlashError: If it overlaps an existing region.
+        """
+        self._check_overlap(region.address, region.end_address)
+        self.regions.append(region)
+        self.regions.sort(key=lambda item: item.address)
+        return region
+
+    def set_banks(self, bank_a: FlashRegion, bank_b: FlashRegion) -> None:
+        """Installs the two banks; bank A becomes the active one.
+
+        Raises:
+            FlashError: If the banks differ in geometry or overlap a region.
+        """
+        if (bank_a.address, len(bank_a), bank_a.sector_size) != (bank_b.address, len(bank_b), bank_b.sector_size):
+            raise FlashError("both flash banks must have the same address and geometry")
+        self.banks = []
+        self._check_overlap(bank_a.address, bank_a.end_address)
+        self.banks = [bank_a, bank_b]
+        self.active_bank = 0
+
+    @property
+    def inactive_bank(self) -> int:
+        """The index of the bank that is not active."""
+        return self.active_bank ^ 1
+
+    @property
+    def addressed_bank(self) -> Union[FlashRegion, None]:
+        """The bank currently mapped at the bank address, or None without banks."""
+        if not self.banks:
+            return None
+        return self.banks[self.inactive_bank if self.program_inactive_bank else self.active_bank]
+
+    def swap_banks(self) -> None:
+        """Makes the inactive bank the active one."""
+        self.active_bank = self.inactive_bank
+
+    def find(self, address: int, size: int) -> Union[FlashRegion, None]:
+        """Returns the region (or addressed bank) fully containing an address range, or None."""
+        for region in self.regions:
+            if region.contains(address, size):
+                return region
+        bank = self.addressed_bank
+        if bank is not None and bank.contains(address, size):
+            return bank
+        return None
+
+    @property
+    def verified(self) -> bool:
+        """True if every sector of every region and of the addressed bank is verified."""
+        bank = self.addressed_bank
+        return all(region.verified.all() for region in self.regions) and (bank is None or bank.verified.all())
@@ -1,3 +1,11 @@
+from typing import TYPE_CHECKING, Callable, Union
+from py_uds_demo.core.utils.did_database import DidDatabase
+from py_uds_demo.core.utils.dtc_store import DtcStore
+from py_uds_demo.core.utils.flash import FlashMemory, FlashRegion
+if TYPE_CHECKING:
+    from py_uds_demo.core.utils.image_loader import MemoryImage
+
+
 def split_integer_to_bytes(value: int) -> list[int]:
     """Splits an integer into a list of bytes (little-endian).
 
@@ -113,6 +121,11 @@ class Sfid:
         self.VERIFY_MODE_TRANSITION_WITH_FIXED_PARAMETER = self.VMTWFP = 0x01
         self.VERIFY_MODE_TRANSITION_WITH_SPECIFIC_PARAMETER = self.VMTWSP = 0x02
         self.TRANSITION_MODE = self.TM = 0x03
+        # read_data_by_periodic_identifier (transmission modes)
+        self.SEND_AT_SLOW_RATE = self.SASR = 0x01
+        self.SEND_AT_MEDIUM_RATE = self.SAMR = 0x02
+        self.SEND_AT_FAST_RATE = self.SAFR = 0x03
+        self.STOP_SENDING = self.SS = 0x04
         # dynamically_define_data_identifier
         self.DEFINE_BY_IDENTIFIER = self.DBID = 0x01
         self.DEFINE_BY_MEMORY_ADDRESS = self.DBMA = 0x02
@@ -231,84 +244,225 @@ class Memory:
     data like DTCs and writable DIDs.
 
     Attributes:
+        did_database (DidDatabase): The DID registry, loaded from the default
+            definition file.
         writable_dids (list): A list of DIDs that are writable.
         did_data (dict): A dictionary to store data for DIDs.
-        memory_map (dict): A dictionary representing the memory layout.
-        dtcs (list): A list of Diagnostic Trouble Codes.
+        memory_map (dict): A dictionary representing the memory layout. Values
+            are byte lists, or immutable ``bytes`` for regions loaded from an image.
+        flash (FlashMemory): The erasable, programmable flash of the ECU, used
+            by the erase, check memory and programming routines. The
+            application lives in two banks at 0x00080000 (see ``Bootloader``).
+        dtc_store (DtcStore): The supported Diagnostic Trouble Codes and their
+            status bytes. Status changes are reported to ``mark_dtc_changed``
+            and failing DTCs freeze ``SNAPSHOT_DIDS`` in a snapshot record.
+        user_defined_dtc_stores (dict[int, DtcStore]): Additional DTC memories
+            keyed by their memory selection byte.
+        track_changes (bool): True while someone (Response On Event) needs
+            ``dirty_dids`` and ``dirty_dtcs`` to be filled.
+        dirty_dids (set): DIDs changed since the changes were last consumed.
+        dirty_dtcs (dict): DTCs changed since the changes were last consumed,
+            mapped to ``(status_before, status_now)``.
+        did_reader (Callable | None): Reads the ``DID + data`` record of a
+            DID with the state of the server, set by the server. The DTC
+            stores read their snapshot records through it.
     """
+    # engine speed, vehicle speed, coolant temperature and control module voltage
+    SNAPSHOT_DIDS = (0xF40C, 0xF40D, 0xF405, 0xF442)
+
     def __init__(self) -> None:
-        self.writable_dids = [0xF198, 0xF199]  # Example: Repair Shop Code and Programming Date
+        self.did_database = DidDatabase.from_file()
+        self.writable_dids = self.did_database.writable_dids
         self.did_data = {}
         self.memory_map = {
             0x1000: [0x11, 0x22, 0x33, 0x44],
             0x2000: [0xAA, 0xBB, 0xCC, 0xDD],
         }
-        self.dtcs = [
-            [0x9A, 0x01, 0x01], # Example DTC 1
-            [0x9A, 0x02, 0x01], # Example DTC 2
-        ]
+        self.flash = FlashMemory(banks=[FlashRegion(0x00080000, 0x40000), FlashRegion(0x00080000, 0x40000)])
+        self.track_changes = False
+        self.dirty_dids = set()
+        self.dirty_dtcs = {}
+        self.did_reader: Union[Callable[[int], Union[bytes, None]], None] = None
+        self.dtc_store = DtcStore(snapshot_dids=self.SNAPSHOT_DIDS)
+        self.dtc_store.add(0x9A0101, 0x01) # Example DTC 1, testFailed
+        self.dtc_store.add(0x9A0201, 0x01) # Example DTC 2, testFailed
+        self.user_defined_dtc_stores = {}
+
+    @property
+    def dtc_store(self) -> DtcStore:
+        """The DTC store. Setting it (e.g. on restore) re-attaches the change listener and DID reader."""
+        return self._dtc_store
+
+    @dtc_store.setter
+    def dtc_store(self, dtc_store: DtcStore) -> None:
+        self._dtc_store = dtc_store
+        self._attach(dtc_store)
+
+    @property
+    def user_defined_dtc_stores(self) -> dict[int, DtcStore]:
+        """The user-defined DTC memories. Setting them re-attaches the change listeners and DID readers."""
+        return self._user_defined_dtc_stores
+
+    @user_defined_dtc_stores.setter
+    def user_defined_dtc_stores(self, dtc_stores: dict[int, DtcStore]) -> None:
+        self._user_defined_dtc_stores = dtc_stores
+        for dtc_store in dtc_stores.values():
+            self._attach(dtc_store)
+
+    def add_user_defined_dtc_store(self, memory_selection: int, dtc_store: Union[DtcStore, None] = None) -> DtcStore:
+        """Registers a user-defined DTC memory.
+
+        Args:
+            memory_selection: The memory selection byte addressing it.
+            dtc_store: The store to register. A new one is created if omitted.
+
+        Returns:
+            The registered store.
+        """
+        dtc_store = DtcStore(snapshot_dids=self.SNAPSHOT_DIDS) if dtc_store is None else dtc_store
+        self._attach(dtc_store)
+        self._user_defined_dtc_stores[memory_selection] = dtc_store
+        return dtc_store
+
+    def _attach(self, dtc_store: DtcStore) -> None:
+        """Connects a DTC store to the change tracking and the DID reader."""
+        dtc_store.listener = self.mark_dtc_changed
+        dtc_store.did_reader = self.read_did
+
+    def read_did(self, did: int) -> Union[bytes, None]:
+        """Returns the ``DID + data`` record of a DID, or None if it cannot be read."""
+        return None if self.did_reader is None else self.did_reader(did)
+
+    def mark_did_changed(self, did: int) -> None:
+        """Flags a DID whose value was changed by a write path."""
+        if self.track_changes:
+            self.dirty_dids.add(did)
+
+    def mark_dtc_changed(self, dtc: int, old_status: int, new_status: int) -> None:
+        """Flags a DTC whose status byte changed.
+
+        When a DTC changes several times before the changes are consumed, the
+        oldest ``old_status`` is kept.
+        """
+        if self.track_changes and old_status != new_status:
+            previous = self.dirty_dtcs.get(dtc)
+            self.dirty_dtcs[dtc] = (old_status if previous is None else previous[0], new_status)
+
+    def load_image(self, image: 'MemoryImage') -> None:
+        """Maps every segment of a flash image into the memory map.
+
+        Each segment becomes one region keyed by its start address. The segment
+        data is stored as-is (no copy).
+
+        Args:
+            image: The image returned by ``image_loader.load_image``.
+        """
+        for segment in image.segments:
+            self.memory_map[segment.address] = segment.data
+
+    def write(self, address: int, data: list) -> None:
+        """Writes bytes into the memory map.
+
+        A write inside an existing region replaces that region with a patched
+        copy, so regions shared with a forked server are never modified in
+        place. Any other write maps a new region at ``address``.
+
+        Args:
+            address: The address of the first byte.
+            data: The bytes to write.
+        """
+        location = self.find_region(address, len(data))
+        if location is None:
+            self.memory_map[address] = list(data)
+            return
+        region_address, offset = location
+        region = self.memory_map[region_address]
+        patched = bytearray(region)
+        patched[offset:offset + len(data)] = bytes(data)
+        self.memory_map[region_address] = bytes(patched) if isinstance(region, bytes) else list(patched)
+
+    def _did_value(self, did: int) -> list:
+        """Returns the current data of a static DID as a list of bytes."""
+        return list(self.did_database.records[did][2:])
+
+    def find_region(self, address: int, size: int) -> Union[tuple[int, int], None]:
+        """Finds the memory region that fully contains an address range.
+
+        Args:
+            address: The start address of the range.
+            size: The length of the range in bytes.
+
+        Returns:
+            A ``(region_address, offset)`` tuple, or None if no single region
+            covers the whole range.
+        """
+        for region_address, region in self.memory_map.items():
+            offset = address - region_address
+            if 0 <= offset and offset + size <= len(region):
+                return region_address, offset
+        return None
 
     @property
     def vehicle_identification_number(self):
         """The vehicle identification number (VIN)."""
-        return split_integer_to_bytes(0x1234567890)
+        return self._did_value(0xF190)
 
     @property
     def manufacturer_spare_part_number(self):
         """The manufacturer's spare part number."""
-        return split_integer_to_bytes(0x1111111111)
+        return self._did_value(0xF187)
 
     @property
     def manufacturer_ecu_software_number(self):
         """The manufacturer's ECU software number."""
-        return split_integer_to_bytes(0x20250801)
+        return self._did_value(0xF188)
 
     @property
     def manufacturer_ecu_software_version(self):
         """The manufacturer's ECU software version."""
-        return split_integer_to_bytes(0x202508010203)
+        return self._did_value(0xF189)
 
     @property
     def ecu_manufacturing_date(self):
         """The ECU manufacturing date."""
-        return split_integer_to_bytes(0x20250801)
+        return self._did_value(0xF18B)
 
     @property
     def ecu_serial_number(self):
         """The ECU serial number."""
-        return split_integer_to_bytes(0x1234567890)
+        return self._did_value(0xF18C)
 
     @property
     def supported_functional_units(self):
         """The supported functional units."""
-        return split_integer_to_bytes(0x00000001)
+        return self._did_value(0xF18D)
 
     @property
     def system_supplier_ecu_software_number(self):
         """The system supplier's ECU software number."""
-        return split_integer_to_bytes(0x20250801)
+        return self._did_value(0xF194)
 
     @property
     def system_supplier_ecu_software_version(self):
         """The system supplier's ECU software version."""
-        return split_integer_to_bytes(0x202508010203)
+        return self._did_value(0xF195)
 
     @property
     def programming_date(self):
         """The programming date."""
-        return split_integer_to_bytes(0x20250801)
+        return self._did_value(0xF199)
 
     @property
     def repair_shop_code(self):
         """The repair shop code."""
-        return split_integer_to_bytes(0x123456)
+        return self._did_value(0xF198)
 
     @property
     def exhaust_regulation_type_approval_number(self):
         """The exhaust regulation type approval number."""
-        return split_integer_to_bytes(0x123456)
+        return self._did_value(0xF196)
 
     @property
     def ecu_installation_date(self):
         """The ECU installation date."""
-        return split_integer_to_bytes(0x20250801)
+        return self._did_value(0xF19D)
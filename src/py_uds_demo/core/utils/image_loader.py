@@ -0,0 +1,380 @@
+import os
+import struct
+from binascii import unhexlify, Error as BinasciiError
+from typing import Iterator, Union
+
+
+class ImageFormatError(ValueError):
+    """Raised when a flash image file is malformed."""
+
+
+_HEX_RECORD_DATA_LENGTHS = {0x01: 0, 0x02: 2, 0x03: 4, 0x04: 2, 0x05: 4}
+"""The fixed data lengths of the Intel HEX record types other than data."""
+
+_ELF_HEADER_SIZES = {1: 52, 2: 64}
+"""The ELF header size per ELF class (ELFCLASS32, ELFCLASS64)."""
+
+
+class Segment:
+    """A contiguous block of image data.
+
+    Attributes:
+        address (int): The start address of the segment.
+        data (bytes): The segment content.
+    """
+    def __init__(self, address: int, data: bytes) -> None:
+        self.address = address
+        self.data = data
+
+    @property
+    def end_address(self) -> int:
+        """The first address after the segment."""
+        return self.address + len(self.data)
+
+    def __repr__(self) -> str:
+        return f"Segment(address=0x{self.address:08X}, size={len(self.data)})"
+
+
+class MemoryImage:
+    """A sparse memory image made of non-overlapping, sorted segments.
+
+    The image is built from raw ``(address, data)`` chunks as they are parsed.
+    Adjacent chunks are coalesced into a single segment, gaps between segments
+    are kept as holes, and chunks that overlap already loaded data are recorded
+    in ``overlaps``. Overlapping bytes take the value of the chunk that starts
+    last, or of the one parsed last when both start at the same address.
+
+    Attributes:
+        segments (list[Segment]): The sorted image segments.
+        overlaps (list[tuple[int, int]]): ``(start, end)`` ranges that were
+            written more than once while loading.
+        start_address (int | None): The execution start address, if the file
+            provided one.
+    """
+    def __init__(self) -> None:
+        self.segments: list[Segment] = []
+        self.overlaps: list[tuple[int, int]] = []
+        self.start_address: Union[int, None] = None
+
+    @classmethod
+    def from_chunks(cls, chunks: list[tuple[int, bytes]]) -> 'MemoryImage':
+        """Builds an image from ``(address, data)`` chunks in any order.
+
+        Args:
+            chunks: The parsed data chunks.
+
+        Returns:
+            The coalesced memory image.
+        """
+        image = cls()
+        pending: list[tuple[int, bytearray]] = []
+        for address, data in sorted(chunks, key=lambda chunk: chunk[0]):
+            if not data:
+                continue
+            if pending:
+                last_address, last_data = pending[-1]
+                last_end = last_address + len(last_data)
+                if address == last_end:
+                    last_data += data
+                    continue
+                if address < last_end:
+                    overlap_end = min(last_end, address + len(data))
+                    image.overlaps.append((address, overlap_end))
+                    offset = address - last_address
+                    last_data[offset:offset + len(data)] = data
+                    continue
+            pending.append((address, bytearray(data)))
+        image.segments = [Segment(address, bytes(data)) for address, data in pending]
+        return image
+
+    @property
+    def gaps(self) -> list[tuple[int, int]]:
+        """``(start, end)`` ranges between consecutive segments."""
+        return [
+            (previous.end_address, current.address)
+            for previous, current in zip(self.segments, self.segments[1:])
+        ]
+
+    @property
+    def size(self) -> int:
+        """The number of bytes carried by the image (holes excluded)."""
+        return sum(len(segment.data) for segment in self.segments)
+
+    @property
+    def min_address(self) -> Union[int, None]:
+        """The lowest address covered by the image."""
+        return self.segments[0].address if self.segments else None
+
+    @property
+    def max_address(self) -> Union[int, None]:
+        """The first address after the highest segment."""
+        return self.segments[-1].end_address if self.segments else None
+
+    def to_bytes(self, fill: int = 0xFF) -> bytes:
+        """Flattens the image into one contiguous buffer.
+
+        Args:
+            fill: The byte value used for holes between segments.
+
+        Returns:
+            The image content from ``min_address`` to ``max_address``.
+        """
+        if not self.segments:
+            return b""
+        buffer = bytearray([fill]) * (self.max_address - self.min_address)
+        for segment in self.segments:
+            offset = segment.address - self.min_address
+            buffer[offset:offset + len(segment.data)] = segment.data
+        return bytes(buffer)
+
+    def iter_blocks(self, block_size: int) -> Iterator[tuple[int, memoryview]]:
+        """Yields ``(address, block)`` pairs of at most ``block_size`` bytes.
+
+        Blocks never span a gap and are zero-copy views on the segment data.
+
+        Args:
+            block_size: The maximum block length.
+        """
+        if block_size <= 0:
+            raise ValueError("block_size must be positive")
+        for segment in self.segments:
+            view = memoryview(segment.data)
+            for offset in range(0, len(view), block_size):
+                yield segment.address + offset, view[offset:offset + block_size]
+
+
+def parse_intel_hex(content: Union[bytes, str]) -> MemoryImage:
+    """Parses an Intel HEX file.
+
+    Every record is decoded with a single ``unhexlify`` call and validated by
+    summing the decoded bytes, so no Python code runs per character.
+
+    Args:
+        content: The file content.
+
+    Returns:
+        The parsed memory image.
+
+    Raises:
+        ImageFormatError: If a record is malformed or has a bad checksum.
+    """
+    if isinstance(content, str):
+        content = content.encode("ascii")
+    chunks: list[tuple[int, bytes]] = []
+    # Records of consecutive addresses are joined here before being stored.
+    run_address = 0
+    run_parts: list[bytes] = []
+    run_end = 0
+    base = 0
+    start_address = None
+    for line_number, line in enumerate(content.splitlines(), 1):
+        line = line.strip()
+        if not line:
+            continue
+        if line[:1] != b":":
+            raise ImageFormatError(f"line {line_number}: record does not start with ':'")
+        try:
+            record = unhexlify(line[1:])
+        except BinasciiError as error:
+            raise ImageFormatError(f"line {line_number}: {error}") from None
+        if len(record) < 5 or len(record) != record[0] + 5:
+            raise ImageFormatError(f"line {line_number}: invalid record length")
+        if sum(record) & 0xFF:
+            raise ImageFormatError(f"line {line_number}: checksum mismatch")
+        record_type = record[3]
+        if record[0] != _HEX_RECORD_DATA_LENGTHS.get(record_type, record[0]):
+            raise ImageFormatError(f"line {line_number}: invalid data length for record type 0x{record_type:02X}")
+        if record_type == 0x00:
+            address = base + ((record[1] << 8) | record[2])
+            data = record[4:-1]
+            if run_parts and address == run_end:
+                run_parts.append(data)
+            else:
+                if run_parts:
+                    chunks.append((run_address, b"".join(run_parts)))
+                run_address, run_parts = address, [data]
+            run_end = address + len(data)
+        elif record_type == 0x01:
+            break
+        elif record_type == 0x02:
+            base = int.from_bytes(record[4:6], "big") << 4
+        elif record_type == 0x03:
+            start_address = (int.from_bytes(record[4:6], "big") << 4) + int.from_bytes(record[6:8], "big")
+        elif record_type == 0x04:
+            base = int.from_bytes(record[4:6], "big") << 16
+        elif record_type == 0x05:
+            start_address = int.from_bytes(record[4:8], "big")
+        else:
+            raise ImageFormatError(f"line {line_number}: unknown record type 0x{record_type:02X}")
+    if run_parts:
+        chunks.append((run_address, b"".join(run_parts)))
+    image = MemoryImage.from_chunks(chunks)
+    image.start_address = start_address
+    return image
+
+
+def parse_srecord(content: Union[bytes, str]) -> MemoryImage:
+    """Parses a Motorola S-record (S19/S28/S37) file.
+
+    Args:
+        content: The file content.
+
+    Returns:
+        The parsed memory image.
+
+    Raises:
+        ImageFormatError: If a record is malformed or has a bad checksum.
+    """
+    if isinstance(content, str):
+        content = content.encode("ascii")
+    address_lengths = {b"1": 2, b"2": 3, b"3": 4, b"5": 2, b"6": 3, b"7": 4, b"8": 3, b"9": 2}
+    chunks: list[tuple[int, bytes]] = []
+    run_address = 0
+    run_parts: list[bytes] = []
+    run_end = 0
+    start_address = None
+    for line_number, line in enumerate(content.splitlines(), 1):
+        line = line.strip()
+        if not line:
+            continue
+        if line[:1] != b"S":
+            raise ImageFormatError(f"line {line_number}: record does not start with 'S'")
+        record_type = line[1:2]
+        try:
+            record = unhexlify(line[2:])
+        except BinasciiError as error:
+            raise ImageFormatError(f"line {line_number}: {error}") from None
+        if not record or len(record) != record[0] + 1:
+            raise ImageFormatError(f"line {line_number}: invalid record length")
+        if sum(record) & 0xFF != 0xFF:
+            raise ImageFormatError(f"line {line_number}: checksum mismatch")
+        if record_type in (b"0", b"4"):
+            continue
+        address_length = address_lengths.get(record_type)
+        if address_length is None:
+            raise ImageFormatError(f"line {line_number}: unknown record type S{record_type.decode()}")
+        address = int.from_bytes(record[1:1 + address_length], "big")
+        if record_type in (b"1", b"2", b"3"):
+            data = record[1 + address_length:-1]
+            if run_parts and address == run_end:
+                run_parts.append(data)
+            else:
+                if run_parts:
+                    chunks.append((run_address, b"".join(run_parts)))
+                run_address, run_parts = address, [data]
+            run_end = address + len(data)
+        elif record_type in (b"7", b"8", b"9"):
+            start_address = address
+    if run_parts:
+        chunks.append((run_address, b"".join(run_parts)))
+    image = MemoryImage.from_chunks(chunks)
+    image.start_address = start_address
+    return image
+
+
+def parse_binary(content: bytes, base_address: int = 0) -> MemoryImage:
+    """Wraps a raw binary blob into a single-segment image.
+
+    Args:
+        content: The file content.
+        base_address: The address of the first byte.
+
+    Returns:
+        The memory image.
+    """
+    return MemoryImage.from_chunks([(base_address, bytes(content))])
+
+
+def parse_elf(content: bytes, use_physical_address: bool = True) -> MemoryImage:
+    """Extracts the ``PT_LOAD`` segments of an ELF file.
+
+    Only the file-backed part (``p_filesz``) of each segment is loaded; the
+    zero-initialised tail (``.bss``) is not part of a flash image.
+
+    Args:
+        content: The file content.
+        use_physical_address: Place segments at ``p_paddr`` (load address)
+            instead of ``p_vaddr``.
+
+    Returns:
+        The memory image.
+
+    Raises:
+        ImageFormatError: If the file is not a valid ELF file.
+    """
+    if content[:4] != b"\x7fELF" or len(content) < 6:
+        raise ImageFormatError("not an ELF file")
+    elf_class, elf_data = content[4], content[5]
+    if elf_class not in (1, 2) or elf_data not in (1, 2):
+        raise ImageFormatError("unsupported ELF class or data encoding")
+    if len(content) < _ELF_HEADER_SIZES[elf_class]:
+        raise ImageFormatError("truncated ELF header")
+    endian = "<" if elf_data == 1 else ">"
+    if elf_class == 1:
+        entry, phoff = struct.unpack_from(endian + "II", content, 24)
+        phentsize, phnum = struct.unpack_from(endian + "HH", content, 42)
+        program_header = struct.Struct(endian + "IIIIIIII")
+    else:
+        entry, phoff = struct.unpack_from(endian + "QQ", content, 24)
+        phentsize, phnum = struct.unpack_from(endian + "HH", content, 54)
+        program_header = struct.Struct(endian + "IIQQQQQQ")
+    if phnum and (phentsize < program_header.size or phoff + phnum * phentsize > len(content)):
+        raise ImageFormatError("program header table points outside the file")
+    view = memoryview(content)
+    chunks: list[tuple[int, bytes]] = []
+    for index in range(phnum):
+        fields = program_header.unpack_from(content, phoff + index * phentsize)
+        if elf_class == 1:
+            p_type, p_offset, p_vaddr, p_paddr, p_filesz = fields[:5]
+        else:
+            p_type, _, p_offset, p_vaddr, p_paddr, p_filesz = fields[:6]
+        if p_type != 1 or not p_filesz:
+            continue
+        if p_offset + p_filesz > len(content):
+            raise ImageFormatError(f"program header {index} points outside the file")
+        address = p_paddr if use_physical_address else p_vaddr
+        chunks.append((address, bytes(view[p_offset:p_offset + p_filesz])))
+    image = MemoryImage.from_chunks(chunks)
+    image.start_address = entry
+    return image
+
+
+def load_image(path: str, image_format: Union[str, None] = None, base_address: int = 0) -> MemoryImage:
+    """Loads a flash image from disk.
+
+    Args:
+        path: The image file path.
+        image_format: One of ``"hex"``, ``"srec"``, ``"elf"`` or ``"bin"``. If
+            omitted, the format is guessed from the extension and content.
+        base_address: The load address for raw binary images.
+
+    Returns:
+        The parsed memory image.
+    """
+    with open(path, "rb") as file:
+        content = file.read()
+    if image_format is None:
+        extension = os.path.splitext(path)[1].lower()
+        if content[:4] == b"\x7fELF":
+            image_format = "elf"
+        elif extension in (".hex", ".ihex", ".ihx"):
+            image_format = "hex"
+        elif extension in (".s19", ".s28", ".s37", ".srec", ".mot"):
+            image_format = "srec"
+        elif content[:1] == b":":
+            image_format = "hex"
+        elif content[:2] in (b"S0", b"S1", b"S2", b"S3"):
+            image_format = "srec"
+        else:
+            image_format = "bin"
+    match image_format:
+        case "hex":
+            return parse_intel_hex(content)
+        case "srec":
+            return parse_srecord(content)
+        case "elf":
+            return parse_elf(content)
+        case "bin":
+            return parse_binary(content, base_address)
+        case _:
+            raise ValueError(f"unknown image format: {image_format}")
@@ -0,0 +1,199 @@
+import os
+import json
+from typing import Iterable, Union
+
+import numpy as np
+
+from py_uds_demo.core.utils.codecs import parse_number
+from py_uds_demo.core.utils.signal_model import COLUMNS, SIGNALS, SignalView
+
+
+DEFAULT_IO_REGISTRY = os.path.join(os.path.dirname(__file__), "io_registry.json")
+
+RETURN_CONTROL_TO_ECU = 0x00
+RESET_TO_DEFAULT = 0x01
+FREEZE_CURRENT_STATE = 0x02
+SHORT_TERM_ADJUSTMENT = 0x03
+
+
+class IoRegistry:
+    """The IO points that Input Output Control By Identifier can take over.
+
+    Every IO DID has one or more elements (several elements make a
+    packeted DID, addressed with a controlEnableMask). Each element is one
+    row of a set of columns:
+
+    - the codec: ``length`` bytes, ``signed``, physical = raw * ``factor`` +
+      ``offset``, limited to ``minimum`` .. ``maximum``;
+    - the ``signal`` column of the signal model the element drives, or -1
+      for a plain output whose ECU-driven value is ``ecu_values``;
+    - the ``defaults`` used by resetToDefault;
+    - the control state: ``controlled`` and the tester's ``states``.
+
+    Controlling signal elements pins the signal in the model (see
+    ``SignalModel.override``). ``adjust`` and ``return_control`` work on
+    arrays of rows, so scripts can move thousands of IO points at once.
+
+    The columns are numpy arrays with room for more rows than ``size``;
+    rows past ``size`` are unused.
+
+    Attributes:
+        dids (dict[int, tuple[int, int, int]]): Per IO DID, the
+            ``(first row, row count, control option mask)``.
+        names (list[str]): The element names.
+        size (int): The number of elements.
+    """
+    COLUMN_TYPES = {
+        "did": np.uint16, "length": np.uint8, "signed": np.bool_, "factor": np.float64, "offset": np.float64,
+        "minimum": np.float64, "maximum": np.float64, "signal": np.intp, "defaults": np.float64,
+        "ecu_values": np.float64, "states": np.float64, "controlled": np.bool_,
+    }
+    """The element columns and their types."""
+
+    def __init__(self, capacity: int = 16) -> None:
+        self.dids: dict[int, tuple[int, int, int]] = {}
+        self.names: list[str] = []
+        self.size = 0
+        for name, dtype in self.COLUMN_TYPES.items():
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_IO_REGISTRY) -> 'IoRegistry':
+        """Loads a registry from a JSON definition file.
+
+        The document has an ``io_dids`` list. Each entry has a ``did``, an
+        optional ``options`` list of supported inputOutputControlParameters
+        (all four by default) and an ``elements`` list. Elements have a
+        ``name`` and either a ``signal`` or a ``default`` value, plus an
+        optional ``codec`` (``uint``/``int`` with ``length``, ``factor`` and
+        ``offset``) and ``min``/``max`` limits.
+        """
+        with open(path, encoding="utf-8") as file:
+            document = json.load(file)
+        registry = cls()
+        for entry in document["io_dids"]:
+            registry.add(
+                parse_number(entry["did"]), entry["elements"],
+                [parse_number(option) for option in entry.get("options", range(4))],
+            )
+        return registry
+
+    def _grow(self, needed: int) -> None:
+        """Resizes the columns so that ``needed`` rows fit."""
+        capacity = max(len(self.did), 1)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in self.COLUMN_TYPES:
+            setattr(self, name, np.resize(getattr(self, name), capacity))
+
+    def add(self, did: int, elements: list[dict], options: Iterable[int] = range(4)) -> range:
+        """Registers an IO DID.
+
+        Args:
+            did: The identifier.
+            elements: The element definitions (see ``from_file``).
+            options: The supported inputOutputControlParameters.
+
+        Returns:
+            The rows of the elements.
+        """
+        if did in self.dids:
+            raise ValueError(f"IO DID 0x{did:04X} is already registered")
+        first = self.size
+        self._grow(first + len(elements))
+        for row, element in enumerate(elements, start=first):
+            codec = element.get("codec", {})
+            length = codec.get("length", 1)
+            signed = codec.get("type", "uint") == "int"
+            factor = codec.get("factor", 1)
+            offset = codec.get("offset", 0)
+            raw_min = -(1 << (8 * length - 1)) if signed else 0
+            raw_max = (1 << (8 * length - int(signed))) - 1
+            signal = element.get("signal")
+            column = -1 if signal is None else COLUMNS[signal]
+            minimum = max(raw_min * factor + offset, SIGNALS[column].minimum if signal else -np.inf)
+            maximum = min(raw_max * factor + offset, SIGNALS[column].maximum if signal else np.inf)
+            default = element.get("default", SIGNALS[column].initial if signal else 0)
+            values = {
+                "did": did, "length": length, "signed": signed, "factor": factor, "offset": offset,
+                "minimum": element.get("min", minimum), "maximum": element.get("max", maximum),
+                "signal": column, "defaults": default, "ecu_values": default, "states": default, "controlled": False,
+            }
+            for name, value in values.items():
+                getattr(self, name)[row] = value
+            self.names.append(element.get("name", f"IO_{did:04X}_{row - first}"))
+        self.size = first + len(elements)
+        mask = 0
+        for option in options:
+            mask |= 1 << option
+        self.dids[did] = (first, len(elements), mask)
+        return range(first, self.size)
+
+    def rows_of(self, did: int) -> range:
+        """The element rows of an IO DID."""
+        first, count, _ = self.dids[did]
+        return range(first, first + count)
+
+    def supports(self, did: int, option: int) -> bool:
+        """Returns True if the DID supports an inputOutputControlParameter."""
+        return option < 8 and bool(self.dids[did][2] >> option & 1)
+
+    def current_values(self, rows: Union[np.ndarray, range], signals: SignalView) -> np.ndarray:
+        """The present physical values of elements: signal, controlled state or ECU value."""
+        rows = np.asarray(rows, dtype=np.intp)
+        columns = self.signal[rows]
+        values = np.where(self.controlled[rows], self.states[rows], self.ecu_values[rows])
+        from_signal = columns >= 0
+        if from_signal.any():
+            values[from_signal] = signals.row()[columns[from_signal]]
+        return values
+
+    def adjust(self, rows: Union[np.ndarray, range], values: Union[np.ndarray, float], signals: SignalView) -> None:
+        """Puts elements under tester control with the given physical values."""
+        rows = np.asarray(rows, dtype=np.intp)
+        self.states[rows] = np.clip(values, self.minimum[rows], self.maximum[rows])
+        self.controlled[rows] = True
+        self.apply(signals, rows)
+
+    def return_control(self, signals: SignalView, rows: Union[np.ndarray, range, None] = None) -> None:
+        """Gives elements (all by default) back to the ECU."""
+        rows = np.arange(self.size) if rows is None else np.asarray(rows, dtype=np.intp)
+        self.controlled[rows] = False
+        self.apply(signals, rows)
+
+    def apply(self, signals: SignalView, rows: Union[np.ndarray, None] = None) -> None:
+        """Writes the control state of elements (all by default) into the signal model."""
+        rows = np.arange(self.size) if rows is None else rows
+        rows = rows[self.signal[rows] >= 0]
+        model, ecu = signals.model, signals.ecu
+        columns = self.signal[rows]
+        controlled = self.controlled[rows]
+        model.overridden[ecu, columns] = controlled
+        model.override_values[ecu, columns[controlled]] = self.states[rows[controlled]]
+        model.values[ecu, columns[controlled]] = self.states[rows[controlled]]
+
+    def encode(self, rows: Union[np.ndarray, range], values: np.ndarray) -> bytes:
+        """Encodes physical values of elements into their control state bytes."""
+        rows = np.asarray(rows, dtype=np.intp)
+        values = np.clip(values, self.minimum[rows], self.maximum[rows])
+        raw = np.rint((values - self.offset[rows]) / self.factor[rows]).astype(np.int64)
+        return b"".join(
+            int(value).to_bytes(int(length), "big", signed=bool(signed))
+            for value, length, signed in zip(raw, self.length[rows], self.signed[rows])
+        )
+
+    def decode(self, rows: Union[np.ndarray, range], data: bytes) -> np.ndarray:
+        """Decodes control state bytes into the physical values of elements."""
+        rows = np.asarray(rows, dtype=np.intp)
+        raw = []
+        position = 0
+        for length, signed in zip(self.length[rows], self.signed[rows]):
+            raw.append(int.from_bytes(data[position:position + length], "big", signed=bool(signed)))
+            position += int(length)
+        return np.asarray(raw, dtype=np.float64) * self.factor[rows] + self.offset[rows]
+
+    def state_length(self, rows: Union[np.ndarray, range]) -> int:
+        """The number of control state bytes of elements."""
+        return int(self.length[np.asarray(rows, dtype=np.intp)].sum())
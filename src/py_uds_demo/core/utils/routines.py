@@ -0,0 +1,256 @@
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Union
+
+from py_uds_demo.core.utils.flash import CRC_ALGORITHMS, FlashRegion
+
+if TYPE_CHECKING:
+    from py_uds_demo.core.server import UdsServer
+
+
+# routine states reported by requestRoutineResults
+COMPLETED = 0x00
+IN_PROGRESS = 0x01
+STOPPED = 0x02
+FAILED = 0x03
+
+_executor: Union[ThreadPoolExecutor, None] = None
+_executor_lock = threading.Lock()
+
+
+def executor() -> ThreadPoolExecutor:
+    """Returns the thread pool running the routines of every server."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="uds-routine")
+        return _executor
+
+
+class RoutineContext:
+    """The handle a running routine uses to talk to the engine.
+
+    Attributes:
+        uds_server (UdsServer): The server running the routine.
+        option_record (list): The routineControlOptionRecord of the start request.
+        progress (int): The progress in percent, reported in the results.
+    """
+    def __init__(self, uds_server: 'UdsServer', option_record: list) -> None:
+        self.uds_server = uds_server
+        self.option_record = option_record
+        self.progress = 0
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        """True once stopRoutine was requested. Routines should then return."""
+        return self._cancel.is_set()
+
+    def cancel(self) -> None:
+        """Asks the routine to stop."""
+        self._cancel.set()
+
+    def wait(self, seconds: float) -> bool:
+        """Sleeps, waking up early on cancellation. Returns ``cancelled``."""
+        return self._cancel.wait(seconds)
+
+
+class RoutineRun:
+    """One execution of a routine.
+
+    Attributes:
+        state (int): ``IN_PROGRESS``, ``COMPLETED``, ``STOPPED`` or ``FAILED``.
+        result (bytes): The routineStatusRecord returned by the routine.
+        context (RoutineContext | None): The context of a running routine.
+    """
+    def __init__(self, context: Union[RoutineContext, None] = None) -> None:
+        self.state = IN_PROGRESS
+        self.result = b""
+        self.context = context
+
+    @property
+    def progress(self) -> int:
+        """The progress in percent."""
+        if self.state == COMPLETED:
+            return 100
+        return 0 if self.context is None else self.context.progress
+
+    def __getstate__(self) -> dict:
+        # A snapshot cannot resume a thread: a running routine is restored as stopped.
+        return {
+            "state": STOPPED if self.state == IN_PROGRESS else self.state,
+            "result": self.result,
+            "context": None,
+        }
+
+
+class Routine:
+    """A registered routine.
+
+    Attributes:
+        routine_id (int): The 2-byte routine identifier.
+        name (str): The symbolic name.
+        function (Callable): Runs the routine with a ``RoutineContext`` and
+            returns its result bytes.
+        stoppable (bool): True if stopRoutine is supported.
+        validate (Callable | None): Checks the option record of a start
+            request before the routine is started; False is reported as
+            requestOutOfRange.
+    """
+    def __init__(
+        self, routine_id: int, name: str, function: Callable[[RoutineContext], bytes], stoppable: bool = True,
+        validate: Union[Callable[['UdsServer', list], bool], None] = None,
+    ) -> None:
+        self.routine_id = routine_id
+        self.name = name
+        self.function = function
+        self.stoppable = stoppable
+        self.validate = validate
+
+    def accepts(self, uds_server: 'UdsServer', option_record: list) -> bool:
+        """Returns True if the routine can be started with an option record."""
+        return self.validate is None or self.validate(uds_server, option_record)
+
+    def start(self, uds_server: 'UdsServer', option_record: list) -> RoutineRun:
+        """Submits the routine to the shared executor and returns at once."""
+        run = RoutineRun(RoutineContext(uds_server, option_record))
+        future = executor().submit(self.function, run.context)
+        future.add_done_callback(lambda done: self._finish(run, done))
+        return run
+
+    def _finish(self, run: RoutineRun, future: Future) -> None:
+        """Records the outcome of a run."""
+        error = future.exception()
+        if error is not None:
+            logging.getLogger(__name__).error("routine 0x%04X failed: %s", self.routine_id, error)
+            run.state = FAILED
+        elif run.context.cancelled:
+            run.state = STOPPED
+            run.result = bytes(future.result() or b"")
+        else:
+            run.state = COMPLETED
+            run.result = bytes(future.result() or b"")
+
+
+DEFAULT_ROUTINES: dict[int, Routine] = {}
+"""The built-in routines, copied into every server's ``RoutineControl``."""
+
+
+def routine(
+    routine_id: int, name: str, stoppable: bool = True,
+    validate: Union[Callable[['UdsServer', list], bool], None] = None,
+) -> Callable:
+    """Decorator registering a built-in routine function."""
+    def register(function: Callable[[RoutineContext], bytes]) -> Callable[[RoutineContext], bytes]:
+        DEFAULT_ROUTINES[routine_id] = Routine(routine_id, name, function, stoppable, validate)
+        return function
+    return register
+
+
+def _parse_memory_range(option_record: list) -> tuple[int, int, list]:
+    """Parses ``addressAndLengthFormatIdentifier, address, size`` from an option record.
+
+    Returns:
+        The address, the size and the option record bytes after the range.
+
+    Raises:
+        ValueError: If the option record is too short.
+    """
+    if not option_record:
+        raise ValueError("missing memory range")
+    size_length, address_length = option_record[0] >> 4, option_record[0] & 0x0F
+    end = 1 + address_length + size_length
+    if not (address_length and size_length) or len(option_record) < end:
+        raise ValueError("invalid memory range")
+    address = int.from_bytes(bytes(option_record[1:1 + address_length]), "big")
+    size = int.from_bytes(bytes(option_record[1 + address_length:end]), "big")
+    return address, size, list(option_record[end:])
+
+
+def _flash_range(uds_server: 'UdsServer', option_record: list) -> tuple[FlashRegion, int, int, list]:
+    """Parses a memory range and finds the flash region containing it."""
+    address, size, rest = _parse_memory_range(option_record)
+    region = uds_server.memory.flash.find(address, size)
+    if region is None or size == 0:
+        raise ValueError("memory range not in flash")
+    return region, address, size, rest
+
+
+def _valid_erase_request(uds_server: 'UdsServer', option_record: list) -> bool:
+    if not option_record:
+        return True
+    try:
+        return not _flash_range(uds_server, option_record)[3]
+    except ValueError:
+        return False
+
+
+@routine(0xFF00, "ERASE_MEMORY", validate=_valid_erase_request)
+def erase_memory(context: RoutineContext) -> bytes:
+    """Erases flash sectors to 0xFF and reports 0x00.
+
+    The option record is an optional ``addressAndLengthFormatIdentifier,
+    address, size`` range; every sector it touches is erased. Without it the
+    whole flash is erased: the plain regions and the addressed bank.
+    """
+    flash = context.uds_server.memory.flash
+    if context.option_record:
+        region, address, size, _ = _flash_range(context.uds_server, context.option_record)
+        ranges = [(region, sector) for sector in region.sectors_of(address, size)]
+    else:
+        regions = flash.regions + ([flash.addressed_bank] if flash.banks else [])
+        ranges = [(region, sector) for region in regions for sector in range(region.sector_count)]
+    for index, (region, sector) in enumerate(ranges):
+        if context.cancelled:
+            return b""
+        region.erase(region.address + sector * region.sector_size, region.sector_size)
+        context.progress = 100 * (index + 1) // len(ranges)
+    return b"\x00"
+
+
+def _valid_check_request(uds_server: 'UdsServer', option_record: list) -> bool:
+    try:
+        return len(_flash_range(uds_server, option_record)[3]) in (0, 2, 4)
+    except ValueError:
+        return False
+
+
+@routine(0x0202, "CHECK_MEMORY", validate=_valid_check_request)
+def check_memory(context: RoutineContext) -> bytes:
+    """Checks a flash range against an expected CRC.
+
+    The option record is ``addressAndLengthFormatIdentifier, address, size``
+    followed by the expected CRC: 4 bytes for CRC-32, 2 bytes for
+    CRC-16/CCITT, or nothing to only read back the CRC-32. The result is
+    0x00 (correct) or 0x01 (incorrect) followed by the computed CRC. A
+    correct check marks the sectors touched by the range as verified.
+    """
+    region, address, size, expected = _flash_range(context.uds_server, context.option_record)
+    algorithm = "crc16" if len(expected) == 2 else "crc32"
+    crc_length = CRC_ALGORITHMS[algorithm][2]
+    crc = 0
+    for done, crc in region.iter_crc(address, size, algorithm):
+        if context.cancelled:
+            return b""
+        context.progress = 100 * done // size
+    matches = not expected or int.from_bytes(bytes(expected), "big") == crc
+    if expected and matches:
+        region.mark_verified(address, size)
+    return bytes([0x00 if matches else 0x01]) + crc.to_bytes(crc_length, "big")
+
+
+@routine(0xFF01, "CHECK_PROGRAMMING_DEPENDENCIES")
+def check_programming_dependencies(context: RoutineContext) -> bytes:
+    """Reports 0x00 if every erased or programmed flash sector was verified, 0x01 otherwise."""
+    return b"\x00" if context.uds_server.memory.flash.verified else b"\x01"
+
+
+@routine(0x0200, "SELF_TEST")
+def self_test(context: RoutineContext) -> bytes:
+    """Runs ten 50 ms test steps and reports 0x00 (passed)."""
+    for step in range(10):
+        if context.wait(0.05):
+            return b""
+        context.progress = (step + 1) * 10
+    return b"\x00"
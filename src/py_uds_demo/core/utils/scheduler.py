@@ -0,0 +1,94 @@
+import heapq
+import logging
+import threading
+from itertools import count
+from time import monotonic
+from typing import Callable, Union
+
+
+class ScheduledJob:
+    """A periodic job registered with the ``Scheduler``.
+
+    Attributes:
+        period (float): The period in seconds.
+        callback (Callable[[], None]): The function called on every tick.
+        deadline (float): The monotonic time of the next tick.
+        cancelled (bool): True once the job has been cancelled.
+    """
+    def __init__(self, period: float, callback: Callable[[], None], deadline: float) -> None:
+        self.period = period
+        self.callback = callback
+        self.deadline = deadline
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        """Stops the job. It is dropped the next time it becomes due."""
+        self.cancelled = True
+
+
+class Scheduler:
+    """Runs periodic jobs of every server in the process on one thread.
+
+    Jobs are kept in a heap ordered by deadline. Each deadline is computed
+    from the previous one (not from the time the callback finished), so
+    periodic jobs do not drift. If the thread falls behind, missed ticks are
+    skipped instead of being run in a burst.
+    """
+    def __init__(self) -> None:
+        self._heap: list[tuple[float, int, ScheduledJob]] = []
+        self._sequence = count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._logger = logging.getLogger(__name__)
+
+    def schedule(self, period: float, callback: Callable[[], None], delay: Union[float, None] = None) -> ScheduledJob:
+        """Registers a periodic job.
+
+        Args:
+            period: The period in seconds.
+            callback: The function to call on every tick.
+            delay: The time before the first tick. Defaults to one period.
+
+        Returns:
+            The job, which can be cancelled.
+        """
+        if period <= 0:
+            raise ValueError("period must be positive")
+        job = ScheduledJob(period, callback, monotonic() + (period if delay is None else delay))
+        with self._condition:
+            heapq.heappush(self._heap, (job.deadline, next(self._sequence), job))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="uds-scheduler", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return job
+
+    def _run(self) -> None:
+        """The scheduler thread: waits for the earliest deadline and runs it."""
+        while True:
+            with self._condition:
+                while not self._heap:
+                    self._condition.wait()
+                deadline, _, job = self._heap[0]
+                now = monotonic()
+                if deadline > now:
+                    self._condition.wait(deadline - now)
+                    continue
+                heapq.heappop(self._heap)
+            if job.cancelled:
+                continue
+            try:
+                job.callback()
+            except Exception:  # pylint: disable=broad-except
+                self._logger.exception("periodic job failed")
+            now = monotonic()
+            job.deadline += job.period
+            if job.deadline <= now:
+                job.deadline += job.period * ((now - job.deadline) // job.period + 1)
+            with self._condition:
+                if not job.cancelled:
+                    heapq.heappush(self._heap, (job.deadline, next(self._sequence), job))
+
+
+scheduler = Scheduler()
+"""The process-wide scheduler shared by all servers."""
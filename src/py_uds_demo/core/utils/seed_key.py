@@ -0,0 +1,108 @@
+import os
+from abc import ABC, abstractmethod
+from typing import Callable, Iterable
+
+import numpy as np
+
+
+ALGORITHMS: dict[str, type] = {}
+"""The registered seed/key algorithm classes, keyed by name."""
+
+
+def register_algorithm(name: str) -> Callable[[type], type]:
+    """Class decorator registering a seed/key algorithm under ``name``."""
+    def register(cls: type) -> type:
+        ALGORITHMS[name] = cls
+        return cls
+    return register
+
+
+def create_algorithm(name: str, **parameters) -> 'SeedKeyAlgorithm':
+    """Creates a registered algorithm.
+
+    Args:
+        name: The registered algorithm name.
+        **parameters: The algorithm parameters.
+
+    Returns:
+        The algorithm instance.
+
+    Raises:
+        ValueError: If no algorithm is registered under ``name``.
+    """
+    try:
+        return ALGORITHMS[name](**parameters)
+    except KeyError as error:
+        raise ValueError(f"unknown seed/key algorithm: {name}") from error
+
+
+class SeedKeyAlgorithm(ABC):
+    """Base class of the seed/key algorithms used by Security Access.
+
+    Subclasses implement ``compute_keys``, which works on a whole batch of
+    seeds at once; ``compute_key`` is a batch of one.
+
+    Attributes:
+        seed_length (int): The number of seed bytes.
+        key_length (int): The number of key bytes.
+    """
+    def __init__(self, seed_length: int = 4, key_length: int = 4) -> None:
+        self.seed_length = seed_length
+        self.key_length = key_length
+
+    def generate_seed(self) -> bytes:
+        """Returns a new random, non-zero seed."""
+        while True:
+            seed = os.urandom(self.seed_length)
+            if any(seed):
+                return seed
+
+    @abstractmethod
+    def compute_keys(self, seeds: np.ndarray) -> np.ndarray:
+        """Computes the keys of a ``(n, seed_length)`` uint8 array of seeds.
+
+        Returns:
+            The ``(n, key_length)`` uint8 array of keys.
+        """
+
+    def compute_key(self, seed: Iterable[int]) -> bytes:
+        """Computes the key of one seed."""
+        return self.compute_keys(np.asarray([list(seed)], dtype=np.uint8))[0].tobytes()
+
+
+@register_algorithm("or_mask")
+class OrMaskAlgorithm(SeedKeyAlgorithm):
+    """``key = seed | mask``, big-endian. The historic simulator algorithm."""
+    def __init__(self, mask: int = 0x11223344, length: int = 4) -> None:
+        super().__init__(length, length)
+        self.mask = np.frombuffer(mask.to_bytes(length, "big"), dtype=np.uint8)
+
+    def compute_keys(self, seeds: np.ndarray) -> np.ndarray:
+        return seeds | self.mask
+
+
+@register_algorithm("xor_mask")
+class XorMaskAlgorithm(SeedKeyAlgorithm):
+    """``key = seed ^ mask``, big-endian."""
+    def __init__(self, mask: int = 0x5A5A5A5A, length: int = 4) -> None:
+        super().__init__(length, length)
+        self.mask = np.frombuffer(mask.to_bytes(length, "big"), dtype=np.uint8)
+
+    def compute_keys(self, seeds: np.ndarray) -> np.ndarray:
+        return seeds ^ self.mask
+
+
+@register_algorithm("rotate_add")
+class RotateAddAlgorithm(SeedKeyAlgorithm):
+    """``key = rotl32(seed, rotation) + constant`` on a 32-bit big-endian seed."""
+    def __init__(self, rotation: int = 7, constant: int = 0x2F1E3D4C) -> None:
+        super().__init__(4, 4)
+        self.rotation = rotation
+        self.constant = constant
+
+    def compute_keys(self, seeds: np.ndarray) -> np.ndarray:
+        values = seeds.astype(np.uint64)
+        values = (values[:, 0] << 24) | (values[:, 1] << 16) | (values[:, 2] << 8) | values[:, 3]
+        rotated = ((values << self.rotation) | (values >> (32 - self.rotation))) & 0xFFFFFFFF
+        keys = ((rotated + self.constant) & 0xFFFFFFFF).astype(">u4")
+        return keys.view(np.uint8).reshape(-1, 4)
@@ -1,7 +1,9 @@
-from typing import TYPE_CHECKING
+from functools import partial
+from typing import TYPE_CHECKING, Union
+from py_uds_demo.core.utils.channel import FrameChannel
+from py_uds_demo.core.utils.scheduler import ScheduledJob, scheduler
 if TYPE_CHECKING:
     from py_uds_demo.core.server import UdsServer
-from py_uds_demo.core.utils.helpers import split_integer_to_bytes
 
 
 class ReadDataByIdentifier:
@@ -21,7 +23,8 @@ class ReadDataByIdentifier:
     How:
         The client sends a request with the SID 0x22 followed by one or more
         2-byte DIDs. The server responds with the SID 0x62, the requested
-        DID(s), and the corresponding data.
+        DID(s), and the corresponding data. DIDs are served from the
+        ``DidDatabase`` of the server memory.
 
     Real-world example:
         A workshop tool needs to verify the software version of an ECU. It
@@ -31,86 +34,60 @@ class ReadDataByIdentifier:
 
     Attributes:
         uds_server: The UDS server instance.
+        max_number_of_dids: The maximum number of DIDs per request, or None
+            for no limit.
+        max_response_length: The maximum response length in bytes, including
+            the response SID.
     """
     def __init__(self, uds_server: 'UdsServer') -> None:
         self.uds_server: 'UdsServer' = uds_server
+        self.max_number_of_dids = None
+        self.max_response_length = 4095
 
     def process_request(self, data_stream: list) -> list:
         """
         Processes a Read Data By Identifier request.
 
+        Several DIDs may be requested at once. Unsupported DIDs are skipped as
+        long as at least one requested DID is supported; a DID requested twice
+        is rejected with requestOutOfRange.
+
         Args:
             data_stream: The request data stream.
 
         Returns:
             A list of bytes representing the response.
         """
-        if len(data_stream) != 3:
+        if len(data_stream) < 3 or len(data_stream) % 2 == 0:
             return self.uds_server.negative_response.report_negative_response(
                 self.uds_server.SID.RDBI, self.uds_server.NRC.INCORRECT_MESSAGE_LENGTH_OR_INVALID_FORMAT
             )
-        did = (data_stream[1] << 8) | data_stream[2]
-        match did:
-            case self.uds_server.did.ACTIVE_DIAGNOSTIC_SESSION:
-                return self.uds_server.positive_response.report_positive_response(
-                    self.uds_server.SID.RDBI, data_stream[1:3] + [self.uds_server.diagnostic_session_control.active_session]
-                )
-            case self.uds_server.did.VEHICLE_IDENTIFICATION_NUMBER:
-                return self.uds_server.positive_response.report_positive_response(
-                    self.uds_server.SID.RDBI, data_stream[1:3] + self.uds_server.memory.vehicle_identification_number
-                )
-            case self.uds_server.did.MANUFACTURER_SPARE_PART_NUMBER:
-                return self.uds_server.positive_response.report_positive_response(
-                    self.uds_server.SID.RDBI, data_stream[1:3] + self.uds_server.memory.manufacturer_spare_part_number
-                )
-            case self.uds_server.did.MANUFACTURER_ECU_SOFTWARE_NUMBER:
-                return self.uds_server.positive_response.report_positive_response(
-                    self.uds_server.SID.RDBI, data_stream[1:3] + self.uds_server.memory.manufacturer_ecu_software_number
-                )
-            case self.uds_server.did.MANUFACTURER_ECU_SOFTWARE_VERSION:
-                return self.uds_server.positive_response.report_positive_response(
-                    self.uds_server.SID.RDBI, data_stream[1:3] + self.uds_server.memory.manufacturer_ecu_software_version
-                )
-            case self.uds_server.did.ECU_MANUFACTURING_DATE:
-                return self.uds_server.positive_response.report_positive_response(
-                    self.uds_server.SID.RDBI, data_stream[1:3] + self.uds_server.memory.ecu_manufacturing_date
-                )
-            case self.uds_server.did.ECU_SERIAL_NUMBER:
-                return self.uds_server.positive_response.report_positive_response(
-                    self.uds_server.SID.RDBI, data_stream[1:3] + self.uds_server.memory.ecu_serial_number
-                )
-            case self.uds_server.did.SUPPORTED_FUNCTIONAL_UNITS:
-                return self.uds_server.positive_response.report_positive_response(
-                    self.uds_server.SID.RDBI, data_stream[1:3] + self.uds_server.memory.supported_functional_units
-                )
-            case self.uds_server.did.SYSTEM_SUPPLIER_ECU_SOFTWARE_NUMBER:
-                return self.uds_server.positive_response.report_positive_response(
-                    self.uds_server.SID.RDBI, data_stream[1:3] + self.uds_server.memory.system_supplier_ecu_software_number
-                )
-            case self.uds_server.did.SYSTEM_SUPPLIER_ECU_SOFTWARE_VERSION:
-                return self.uds_server.positive_response.report_positive_response(
-                    self.uds_server.SID.RDBI, data_stream[1:3] + self.uds_server.memory.system_supplier_ecu_software_version
-                )
-            case self.uds_server.did.PROGRAMMING_DATE:
-                return self.uds_server.positive_response.report_positive_response(
-                    self.uds_server.SID.RDBI, data_stream[1:3] + self.uds_server.memory.programming_date
-                )
-            case self.uds_server.did.REPAIR_SHOP_CODE:
-                return self.uds_server.positive_response.report_positive_response(
-                    self.uds_server.SID.RDBI, data_stream[1:3] + self.uds_server.memory.repair_shop_code
-                )
-            case self.uds_server.did.EXHAUST_REGULATION_TYPE_APPROVAL_NUMBER:
-                return self.uds_server.positive_response.report_positive_response(
-                    self.uds_server.SID.RDBI, data_stream[1:3] + self.uds_server.memory.exhaust_regulation_type_approval_number
-                )
-            case self.uds_server.did.INSTALLATION_DATE:
-                return self.uds_server.positive_response.report_positive_response(
-                    self.uds_server.SID.RDBI, data_stream[1:3] + self.uds_server.memory.ecu_installation_date
-                )
-            case _:
+        if self.max_number_of_dids is not None and len(data_stream) // 2 > self.max_number_of_dids:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.RDBI, self.uds_server.NRC.INCORRECT_MESSAGE_LENGTH_OR_INVALID_FORMAT
+            )
+        did_database = self.uds_server.memory.did_database
+        requested = set()
+        response_data = bytearray()
+        for index in range(1, len(data_stream), 2):
+            did = (data_stream[index] << 8) | data_stream[index + 1]
+            if did in requested:
                 return self.uds_server.negative_response.report_negative_response(
                     self.uds_server.SID.RDBI, self.uds_server.NRC.REQUEST_OUT_OF_RANGE
                 )
+            requested.add(did)
+            record = did_database.read(did, self.uds_server)
+            if record is not None:
+                response_data += record
+        if not response_data:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.RDBI, self.uds_server.NRC.REQUEST_OUT_OF_RANGE
+            )
+        if len(response_data) + 1 > self.max_response_length:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.RDBI, self.uds_server.NRC.RESPONSE_TOO_LONG
+            )
+        return self.uds_server.positive_response.report_positive_response(self.uds_server.SID.RDBI, list(response_data))
 
 
 class ReadMemoryByAddress:
@@ -160,13 +137,17 @@ class ReadMemoryByAddress:
 
         address = (data_stream[1] << 24) | (data_stream[2] << 16) | (data_stream[3] << 8) | data_stream[4]
 
-        if address not in self.uds_server.memory.memory_map:
+        memory = self.uds_server.memory
+        location = memory.find_region(address, 1)
+        if location is None:
             return self.uds_server.negative_response.report_negative_response(
                 self.uds_server.SID.RMBA, self.uds_server.NRC.REQUEST_OUT_OF_RANGE
             )
 
+        # the rest of the region holding the address
+        region_address, offset = location
         return self.uds_server.positive_response.report_positive_response(
-            self.uds_server.SID.RMBA, self.uds_server.memory.memory_map[address]
+            self.uds_server.SID.RMBA, list(memory.memory_map[region_address][offset:])
         )
 
 
@@ -188,8 +169,11 @@ class ReadScalingDataByIdentifier:
         The client sends a request with the SID 0x24 and a DID. The server
         responds with the scaling information for that DID.
 
-    Note:
-        This service is not fully implemented in this simulator.
+    The scaling records are built from the DID codecs when the DID database
+    is loaded, so a request is a dictionary lookup.
+
+    Attributes:
+        uds_server: The UDS server instance.
     """
     def __init__(self, uds_server: 'UdsServer') -> None:
         self.uds_server: 'UdsServer' = uds_server
@@ -202,11 +186,19 @@ class ReadScalingDataByIdentifier:
             data_stream: The request data stream.
 
         Returns:
-            A negative response, as this service is not supported.
+            A list of bytes representing the response.
         """
-        return self.uds_server.negative_response.report_negative_response(
-            self.uds_server.SID.RSDBI, self.uds_server.NRC.SERVICE_NOT_SUPPORTED
-        )
+        if len(data_stream) != 3:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.RSDBI, self.uds_server.NRC.INCORRECT_MESSAGE_LENGTH_OR_INVALID_FORMAT
+            )
+        did = (data_stream[1] << 8) | data_stream[2]
+        record = self.uds_server.memory.did_database.scaling_records.get(did)
+        if record is None:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.RSDBI, self.uds_server.NRC.REQUEST_OUT_OF_RANGE
+            )
+        return self.uds_server.positive_response.report_positive_response(self.uds_server.SID.RSDBI, list(record))
 
 
 class ReadDataByPeriodicIdentifier:
@@ -223,15 +215,51 @@ class ReadDataByPeriodicIdentifier:
         logging or for displaying live data on a diagnostic tool.
 
     How:
-        The client sends a request with the SID 0x2A, specifying the DIDs
-        to be read and the transmission rate. The server then starts sending
-        the data periodically until instructed to stop.
+        The client sends a request with the SID 0x2A, a transmission mode
+        (sendAtSlowRate 0x01, sendAtMediumRate 0x02, sendAtFastRate 0x03 or
+        stopSending 0x04) and one or more 1-byte periodic identifiers. A
+        periodic identifier XX refers to the DID 0xF2XX. The server answers
+        with 0x6A and then publishes ``[pDID, data...]`` frames on
+        ``channel`` at the requested rate, until stopped or until the server
+        returns to the default session.
+
+    Real-world example:
+        A calibration engineer logs engine speed and coolant temperature
+        while driving. The tool defines both in a dynamic DID and requests it
+        at the fast rate; the ECU then streams the values without any further
+        requests.
 
-    Note:
-        This service is not fully implemented in this simulator.
+    Attributes:
+        uds_server: The UDS server instance.
+        rates: The period in seconds of each transmission mode.
+        max_periodic_dids: The maximum number of scheduled periodic DIDs.
+        channel: The channel on which periodic frames are published.
+        scheduled: The transmission mode of every scheduled periodic DID.
     """
     def __init__(self, uds_server: 'UdsServer') -> None:
         self.uds_server: 'UdsServer' = uds_server
+        self.rates = {
+            self.uds_server.SFID.SEND_AT_SLOW_RATE: 1.0,
+            self.uds_server.SFID.SEND_AT_MEDIUM_RATE: 0.1,
+            self.uds_server.SFID.SEND_AT_FAST_RATE: 0.01,
+        }
+        self.max_periodic_dids = 16
+        self.channel = FrameChannel()
+        self._scheduled: dict[int, int] = {}
+        self._groups: dict[int, tuple] = {}
+        self._jobs: dict[int, ScheduledJob] = {}
+        self.uds_server.diagnostic_session_control.session_listeners.append(self._on_session_change)
+
+    @property
+    def scheduled(self) -> dict:
+        """The transmission mode of every scheduled periodic DID."""
+        return self._scheduled
+
+    @scheduled.setter
+    def scheduled(self, scheduled: dict) -> None:
+        self.stop_all()
+        for periodic_did, mode in scheduled.items():
+            self._start(periodic_did, mode)
 
     def process_request(self, data_stream: list) -> list:
         """
@@ -241,11 +269,87 @@ class ReadDataByPeriodicIdentifier:
             data_stream: The request data stream.
 
         Returns:
-            A negative response, as this service is not supported.
+            A list of bytes representing the response.
         """
-        return self.uds_server.negative_response.report_negative_response(
-            self.uds_server.SID.RDBPI, self.uds_server.NRC.SERVICE_NOT_SUPPORTED
-        )
+        if len(data_stream) < 2:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.RDBPI, self.uds_server.NRC.INCORRECT_MESSAGE_LENGTH_OR_INVALID_FORMAT
+            )
+        mode = data_stream[1]
+        periodic_dids = data_stream[2:]
+        if mode == self.uds_server.SFID.STOP_SENDING:
+            if not periodic_dids:
+                self.stop_all()
+            for periodic_did in periodic_dids:
+                self._stop(periodic_did)
+            return self.uds_server.positive_response.report_positive_response(self.uds_server.SID.RDBPI, [])
+        if mode not in self.rates:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.RDBPI, self.uds_server.NRC.REQUEST_OUT_OF_RANGE
+            )
+        if not periodic_dids:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.RDBPI, self.uds_server.NRC.INCORRECT_MESSAGE_LENGTH_OR_INVALID_FORMAT
+            )
+        definitions = self.uds_server.memory.did_database.definitions
+        supported = [periodic_did for periodic_did in periodic_dids if 0xF200 | periodic_did in definitions]
+        if not supported or len(set(self._scheduled).union(supported)) > self.max_periodic_dids:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.RDBPI, self.uds_server.NRC.REQUEST_OUT_OF_RANGE
+            )
+        for periodic_did in supported:
+            self._start(periodic_did, mode)
+        return self.uds_server.positive_response.report_positive_response(self.uds_server.SID.RDBPI, [])
+
+    def stop_all(self) -> None:
+        """Stops every periodic transmission of this server."""
+        for job in self._jobs.values():
+            job.cancel()
+        self._jobs = {}
+        self._groups = {}
+        self._scheduled = {}
+
+    def _start(self, periodic_did: int, mode: int) -> None:
+        """Moves a periodic DID into the group of a transmission mode.
+
+        All periodic DIDs of one mode share a single scheduler job.
+        """
+        self._stop(periodic_did)
+        self._scheduled[periodic_did] = mode
+        self._groups[mode] = self._groups.get(mode, ()) + (periodic_did,)
+        if mode not in self._jobs:
+            self._jobs[mode] = scheduler.schedule(self.rates[mode], partial(self._transmit, mode))
+
+    def _stop(self, periodic_did: int) -> None:
+        """Removes a periodic DID from its group, cancelling empty groups."""
+        mode = self._scheduled.pop(periodic_did, None)
+        if mode is None:
+            return
+        group = tuple(scheduled for scheduled in self._groups[mode] if scheduled != periodic_did)
+        if group:
+            self._groups[mode] = group
+        else:
+            del self._groups[mode]
+            self._jobs.pop(mode).cancel()
+
+    def _transmit(self, mode: int) -> None:
+        """Publishes one frame per periodic DID of a group (scheduler thread)."""
+        did_database = self.uds_server.memory.did_database
+        with self.uds_server.request_lock:
+            records = [
+                (periodic_did, did_database.read(0xF200 | periodic_did, self.uds_server))
+                for periodic_did in self._groups.get(mode, ())
+            ]
+        for periodic_did, record in records:
+            if record is not None:
+                frame = list(record[1:])
+                frame[0] = periodic_did
+                self.channel.publish(frame)
+
+    def _on_session_change(self, session: int) -> None:
+        """Stops periodic transmission when the default session is entered."""
+        if session == self.uds_server.SFID.DEFAULT_SESSION:
+            self.stop_all()
 
 
 class DynamicallyDefineDataIdentifier:
@@ -264,14 +368,49 @@ class DynamicallyDefineDataIdentifier:
         single response, which can be more efficient.
 
     How:
-        The client sends a request with the SID 0x2C and the definition of
-        the new DID, which includes the source DIDs or memory addresses.
+        The client sends a request with the SID 0x2C, a sub-function
+        (defineByIdentifier 0x01, defineByMemoryAddress 0x02 or
+        clearDynamicallyDefinedDataIdentifier 0x03) and the dynamic DID
+        (0xF200-0xF3FF), followed by the source DIDs or memory addresses.
+        Each definition is compiled into a gather plan of source slices, so
+        reading the dynamic DID is a single join.
 
-    Note:
-        This service is not fully implemented in this simulator.
+    Real-world example:
+        A data logger needs engine speed, coolant temperature and a RAM
+        variable at a high rate. It defines one dynamic DID made of the three
+        sources and then reads only that DID, instead of three DIDs and a
+        memory read in every cycle.
+
+    Attributes:
+        uds_server: The UDS server instance.
+        supported_subfunctions: A list of supported sub-function identifiers.
+        definitions: The gather plan of every dynamic DID. A plan is a list
+            of ``(is_memory, source, start, stop)`` tuples, where ``source``
+            is a DID or a memory region address.
     """
+    DYNAMIC_DID_RANGE = range(0xF200, 0xF400)
+
     def __init__(self, uds_server: 'UdsServer') -> None:
         self.uds_server: 'UdsServer' = uds_server
+        self.supported_subfunctions = [
+            self.uds_server.SFID.DEFINE_BY_IDENTIFIER,
+            self.uds_server.SFID.DEFINE_BY_MEMORY_ADDRESS,
+            self.uds_server.SFID.CLEAR_DYNAMICALLY_DEFINED_DATA_IDENTIFIER,
+        ]
+        self._definitions: dict[int, list[tuple]] = {}
+
+    @property
+    def definitions(self) -> dict:
+        """The gather plan of every dynamic DID."""
+        return self._definitions
+
+    @definitions.setter
+    def definitions(self, definitions: dict) -> None:
+        for did in self._definitions:
+            self.uds_server.memory.did_database.remove(did)
+        self._definitions = {}
+        for did, plan in definitions.items():
+            self._define(did, plan)
 
     def process_request(self, data_stream: list) -> list:
         """
@@ -281,11 +420,120 @@ class DynamicallyDefineDataIdentifier:
             data_stream: The request data stream.
 
         Returns:
-            A negative response, as this service is not supported.
+            A list of bytes representing the response.
         """
-        return self.uds_server.negative_response.report_negative_response(
-            self.uds_server.SID.DDDI, self.uds_server.NRC.SERVICE_NOT_SUPPORTED
-        )
+        if len(data_stream) < 2:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.DDDI, self.uds_server.NRC.INCORRECT_MESSAGE_LENGTH_OR_INVALID_FORMAT
+            )
+        sfid = data_stream[1]
+        if sfid not in self.supported_subfunctions:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.DDDI, self.uds_server.NRC.SUB_FUNCTION_NOT_SUPPORTED
+            )
+        if sfid == self.uds_server.SFID.CLEAR_DYNAMICALLY_DEFINED_DATA_IDENTIFIER:
+            return self._clear(data_stream)
+        if len(data_stream) < 4:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.DDDI, self.uds_server.NRC.INCORRECT_MESSAGE_LENGTH_OR_INVALID_FORMAT
+            )
+        did = (data_stream[2] << 8) | data_stream[3]
+        if did not in self.DYNAMIC_DID_RANGE:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.DDDI, self.uds_server.NRC.REQUEST_OUT_OF_RANGE
+            )
+        if sfid == self.uds_server.SFID.DEFINE_BY_IDENTIFIER:
+            plan = self._plan_by_identifier(data_stream[4:])
+        else:
+            plan = self._plan_by_memory_address(data_stream[4:])
+        if isinstance(plan, int):
+            return self.uds_server.negative_response.report_negative_response(self.uds_server.SID.DDDI, plan)
+        self._define(did, self._definitions.get(did, []) + plan)
+        return self.uds_server.positive_response.report_positive_response(self.uds_server.SID.DDDI, data_stream[1:4])
+
+    def _plan_by_identifier(self, elements: list) -> Union[list, int]:
+        """Compiles defineByIdentifier source elements into plan steps.
+
+        Returns:
+            The plan steps, or the NRC to report.
+        """
+        if not elements or len(elements) % 4:
+            return self.uds_server.NRC.INCORRECT_MESSAGE_LENGTH_OR_INVALID_FORMAT
+        plan = []
+        for index in range(0, len(elements), 4):
+            source_did = (elements[index] << 8) | elements[index + 1]
+            position, size = elements[index + 2], elements[index + 3]
+            record = self.uds_server.memory.did_database.read(source_did, self.uds_server)
+            if record is None or position == 0 or size == 0 or 1 + position + size > len(record):
+                return self.uds_server.NRC.REQUEST_OUT_OF_RANGE
+            plan.append((False, source_did, 1 + position, 1 + position + size))
+        return plan
+
+    def _plan_by_memory_address(self, elements: list) -> Union[list, int]:
+        """Compiles defineByMemoryAddress source elements into plan steps.
+
+        Returns:
+            The plan steps, or the NRC to report.
+        """
+        if len(elements) < 1:
+            return self.uds_server.NRC.INCORRECT_MESSAGE_LENGTH_OR_INVALID_FORMAT
+        address_length = elements[0] & 0x0F
+        size_length = elements[0] >> 4
+        if not (1 <= address_length <= 4 and 1 <= size_length <= 4):
+            return self.uds_server.NRC.REQUEST_OUT_OF_RANGE
+        element_length = address_length + size_length
+        if len(elements) == 1 or (len(elements) - 1) % element_length:
+            return self.uds_server.NRC.INCORRECT_MESSAGE_LENGTH_OR_INVALID_FORMAT
+        plan = []
+        for index in range(1, len(elements), element_length):
+            address = int.from_bytes(bytes(elements[index:index + address_length]), "big")
+            size = int.from_bytes(bytes(elements[index + address_length:index + element_length]), "big")
+            location = self.uds_server.memory.find_region(address, size)
+            if location is None or size == 0:
+                return self.uds_server.NRC.REQUEST_OUT_OF_RANGE
+            region_address, offset = location
+            plan.append((True, region_address, offset, offset + size))
+        return plan
+
+    def _define(self, did: int, plan: list) -> None:
+        """Stores a plan and registers the dynamic DID in the DID database."""
+        memory = self.uds_server.memory
+        did_database = memory.did_database
+
+        def gather(uds_server: 'UdsServer') -> bytes:
+            records = did_database.records
+            memory_map = memory.memory_map
+            parts = []
+            for is_memory, source, start, stop in plan:
+                if is_memory:
+                    parts.append(bytes(memory_map[source][start:stop]))
+                else:
+                    record = records.get(source)
+                    if record is None:
+                        record = did_database.read(source, uds_server)
+                    parts.append(record[start:stop])
+            return b"".join(parts)
+
+        self._definitions[did] = plan
+        did_database.add_provider(did, gather, name=f"DYNAMICALLY_DEFINED_{did:04X}")
+
+    def _clear(self, data_stream: list) -> list:
+        """Clears one dynamic DID, or all of them if no DID is given."""
+        if len(data_stream) == 2:
+            self.definitions = {}
+            return self.uds_server.positive_response.report_positive_response(self.uds_server.SID.DDDI, data_stream[1:])
+        if len(data_stream) != 4:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.DDDI, self.uds_server.NRC.INCORRECT_MESSAGE_LENGTH_OR_INVALID_FORMAT
+            )
+        did = (data_stream[2] << 8) | data_stream[3]
+        if did not in self.DYNAMIC_DID_RANGE:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.DDDI, self.uds_server.NRC.REQUEST_OUT_OF_RANGE
+            )
+        if self._definitions.pop(did, None) is not None:
+            self.uds_server.memory.did_database.remove(did)
+        return self.uds_server.positive_response.report_positive_response(self.uds_server.SID.DDDI, data_stream[1:4])
 
 
 class WriteDataByIdentifier:
@@ -342,6 +590,8 @@ class WriteDataByIdentifier:
 
         data_to_write = data_stream[3:]
         self.uds_server.memory.did_data[did] = data_to_write
+        self.uds_server.memory.did_database.write(did, data_to_write)
+        self.uds_server.memory.mark_did_changed(did)
 
         return self.uds_server.positive_response.report_positive_response(self.uds_server.SID.WDBI, data_stream[1:3])
 
@@ -392,7 +642,6 @@ class WriteMemoryByAddress:
             )
 
         address = (data_stream[1] << 24) | (data_stream[2] << 16) | (data_stream[3] << 8) | data_stream[4]
-        data_to_write = data_stream[5:]
-        self.uds_server.memory.memory_map[address] = data_to_write
+        self.uds_server.memory.write(address, data_stream[5:])
 
         return self.uds_server.positive_response.report_positive_response(self.uds_server.SID.WMBA, [])
@@ -1,9 +1,14 @@
 import threading
 import datetime
-from time import sleep
-from random import randint
+import weakref
+from time import monotonic
+from functools import partial
 from typing import TYPE_CHECKING
 
+from py_uds_demo.core.utils.channel import FrameChannel
+from py_uds_demo.core.utils.scheduler import scheduler
+from py_uds_demo.core.utils.seed_key import SeedKeyAlgorithm, create_algorithm
+
 if TYPE_CHECKING:
     from py_uds_demo.core.server import UdsServer
 
@@ -44,6 +49,8 @@ class DiagnosticSessionControl:
         P2_STAR_LOW (int): P2* timing parameter low byte.
         tester_present_active (bool): True if Tester Present is active.
         session_timeout (int): The timeout for non-default sessions in seconds.
+        session_listeners (list): Callables notified with the new session
+            whenever the active session changes.
     """
     def __init__(self, uds_server: 'UdsServer'):
         self.uds_server: 'UdsServer' = uds_server
@@ -63,14 +70,24 @@ class DiagnosticSessionControl:
         self.tester_present_active = False
         self.session_timeout = 5 # 5 seconds
         self.last_session_change_time = datetime.datetime.now()
+        self.session_listeners = []
         self.thread_event = threading.Event()
-        self.session_thread = threading.Thread(target=self._start_active_session_timeout_thread, daemon=True)
+        # the thread only holds a weak reference, so a dropped server (e.g. a fork) stops it
+        self.session_thread = threading.Thread(
+            target=_session_timeout_loop, args=(weakref.ref(self), self.thread_event), name="uds-session-timeout",
+            daemon=True,
+        )
         self.session_thread.start()
 
     def __del__(self):
         """Stops the session timeout thread."""
         self.thread_event.set()
-        self.session_thread.join(1)
+
+    def stop(self) -> None:
+        """Stops the session timeout thread and waits for it to end."""
+        self.thread_event.set()
+        if self.session_thread is not threading.current_thread():
+            self.session_thread.join(1)
 
     def process_request(self, data_stream: list) -> list:
         """
@@ -92,27 +109,47 @@ class DiagnosticSessionControl:
                 self.uds_server.SID.DSC, self.uds_server.NRC.SUB_FUNCTION_NOT_SUPPORTED
             )
 
-        self.active_session = sfid
-        self.last_session_change_time = datetime.datetime.now()
+        self.change_session(sfid)
         return self.uds_server.positive_response.report_positive_response(
             self.uds_server.SID.DSC, [sfid, self.P2_HIGH, self.P2_LOW, self.P2_STAR_HIGH, self.P2_STAR_LOW]
         )
 
-    def _start_active_session_timeout_thread(self):
+    def change_session(self, session: int) -> None:
         """
-        A thread that monitors the active session and reverts to the default
-        session if no Tester Present message is received within the timeout.
+        Activates a session, restarts the session timer and notifies the
+        session listeners.
+
+        Args:
+            session: The session to activate.
         """
-        while not self.thread_event.is_set():
-            if self.tester_present_active:
-                sleep(0.1)
-                continue
-            now = datetime.datetime.now()
-            elapsed = (now - self.last_session_change_time).total_seconds()
+        self.active_session = session
+        self.last_session_change_time = datetime.datetime.now()
+        for listener in self.session_listeners:
+            listener(session)
+
+    def check_session_timeout(self) -> None:
+        """
+        Reverts to the default session if no Tester Present message was
+        received within the timeout. Called every 100 ms by the session
+        timeout thread.
+        """
+        if self.tester_present_active:
+            return
+        # the session listeners must not run while a request is processed
+        with self.uds_server.request_lock:
+            elapsed = (datetime.datetime.now() - self.last_session_change_time).total_seconds()
             if self.active_session != self.uds_server.SFID.DEFAULT_SESSION and elapsed >= self.session_timeout:
-                self.active_session = self.uds_server.SFID.DEFAULT_SESSION
-                self.last_session_change_time = now
-            sleep(0.1)
+                self.change_session(self.uds_server.SFID.DEFAULT_SESSION)
+
+
+def _session_timeout_loop(service_ref: 'weakref.ref[DiagnosticSessionControl]', stop: threading.Event) -> None:
+    """Runs ``check_session_timeout`` until stopped or until the service is garbage collected."""
+    while not stop.wait(0.1):
+        service = service_ref()
+        if service is None:
+            return
+        service.check_session_timeout()
+        del service
 
 
 class EcuReset:
@@ -139,6 +176,9 @@ class EcuReset:
         This forces the ECU to restart, loading the new firmware and
         completing the update process.
 
+    A hard reset that ends a programming session lets the bootloader swap
+    to the newly programmed flash bank, or roll back if it was not verified.
+
     Attributes:
         uds_server: The UDS server instance.
         supported_subfunctions: A list of supported sub-function identifiers.
@@ -179,12 +219,37 @@ class EcuReset:
                 self.uds_server.SID.ER, self.uds_server.NRC.REQUEST_OUT_OF_RANGE
             )
 
-        self.uds_server.diagnostic_session_control.active_session = self.uds_server.SFID.DEFAULT_SESSION
-        self.uds_server.security_access.seed_sent = False
-        self.uds_server.security_access.security_unlock_success = False
+        self.uds_server.bootloader.reset(reset_type)
+        self.uds_server.diagnostic_session_control.change_session(self.uds_server.SFID.DEFAULT_SESSION)
+        self.uds_server.security_access.lock()
         return self.uds_server.positive_response.report_positive_response(self.uds_server.SID.ER, [reset_type])
 
 
+class SecurityLevel:
+    """The configuration and attempt state of one Security Access level.
+
+    Level ``n`` is unlocked with the sub-functions requestSeed ``2n - 1``
+    and sendKey ``2n``.
+
+    Attributes:
+        level (int): The security level.
+        algorithm (SeedKeyAlgorithm): The seed/key algorithm of the level.
+        max_attempts (int): Invalid keys accepted before the delay starts.
+        delay (float): The lockout time in seconds after too many attempts.
+        attempts (int): Invalid keys received since the last success/delay.
+        delay_until (float): The monotonic time until which seeds are refused.
+        seed (bytes | None): The seed waiting for its key.
+    """
+    def __init__(self, level: int, algorithm: SeedKeyAlgorithm, max_attempts: int = 3, delay: float = 10.0) -> None:
+        self.level = level
+        self.algorithm = algorithm
+        self.max_attempts = max_attempts
+        self.delay = delay
+        self.attempts = 0
+        self.delay_until = 0.0
+        self.seed = None
+
+
 class SecurityAccess:
     """
     Handles Security Access (0x27) service requests.
@@ -211,27 +276,48 @@ class SecurityAccess:
         sends it back. If successful, the tool can then use the Write Data
         By Identifier service to update the fuel map.
 
+    Each level has its own seed/key algorithm (see ``seed_key``) and attempt
+    counter. Too many invalid keys start a delay, stored as a deadline that
+    is compared with the clock when the next seed is requested. Changing the
+    session or resetting the ECU locks it again.
+
     Attributes:
         uds_server: The UDS server instance.
-        seed_value: The last generated seed.
-        seed_sent: True if a seed has been sent to the client.
-        security_unlock_success: True if the ECU is unlocked.
-        supported_subfunctions: A list of supported sub-function identifiers.
-        supported_sessions: A list of sessions in which security access is allowed.
+        levels (dict[int, SecurityLevel]): The supported security levels.
+        unlocked_level (int): The unlocked level, 0 while locked.
+        pending_level (int | None): The level whose seed was sent last.
     """
     def __init__(self, uds_server: 'UdsServer') -> None:
         self.uds_server: 'UdsServer' = uds_server
-        self.seed_value = []
-        self.seed_sent = False
-        self.security_unlock_success = False
-        self.supported_subfunctions = [
-            self.uds_server.SFID.REQUEST_SEED,
-            self.uds_server.SFID.SEND_KEY,
-        ]
-        self.supported_sessions = [
-            self.uds_server.SFID.PROGRAMMING_SESSION,
-            self.uds_server.SFID.EXTENDED_SESSION,
-        ]
+        self.levels = {
+            0x01: SecurityLevel(0x01, create_algorithm("or_mask")),
+            0x09: SecurityLevel(0x09, create_algorithm("rotate_add")),
+        }
+        self.unlocked_level = 0
+        self.pending_level = None
+        self.uds_server.diagnostic_session_control.session_listeners.append(self._on_session_change)
+
+    @property
+    def supported_subfunctions(self) -> list[int]:
+        """The requestSeed and sendKey sub-functions of all levels."""
+        return sorted(sub_function for level in self.levels for sub_function in (2 * level - 1, 2 * level))
+
+    @property
+    def security_level(self) -> int:
+        """The unlocked security level, 0 while the ECU is locked."""
+        return self.unlocked_level
+
+    @property
+    def security_unlock_success(self) -> bool:
+        """True if any level is unlocked."""
+        return self.unlocked_level != 0
+
+    def lock(self) -> None:
+        """Locks the ECU and discards any pending seed."""
+        self.unlocked_level = 0
+        self.pending_level = None
+        for level in self.levels.values():
+            level.seed = None
 
     def process_request(self, data_stream: list) -> list:
         """
@@ -247,68 +333,64 @@ class SecurityAccess:
             return self.uds_server.negative_response.report_negative_response(
                 self.uds_server.SID.SA, self.uds_server.NRC.INCORRECT_MESSAGE_LENGTH_OR_INVALID_FORMAT
             )
-        if self.uds_server.diagnostic_session_control.active_session not in self.supported_sessions:
-            return self.uds_server.negative_response.report_negative_response(
-                self.uds_server.SID.SA, self.uds_server.NRC.CONDITIONS_NOT_CORRECT
-            )
         sfid = data_stream[1]
-        if sfid not in self.supported_subfunctions:
+        level = self.levels.get((sfid + 1) // 2)
+        if level is None:
             return self.uds_server.negative_response.report_negative_response(
                 self.uds_server.SID.SA, self.uds_server.NRC.SUB_FUNCTION_NOT_SUPPORTED
             )
 
-        if (sfid % 2 == 0 and not self.seed_sent) or (sfid % 2 == 1 and self.seed_sent) or self.security_unlock_success:
+        if sfid % 2 == 1:
+            return self._request_seed(level, sfid)
+        return self._send_key(level, sfid, data_stream[2:])
+
+    def _request_seed(self, level: SecurityLevel, sfid: int) -> list:
+        """Answers a requestSeed: a new seed, or a zero seed if already unlocked."""
+        if monotonic() < level.delay_until:
             return self.uds_server.negative_response.report_negative_response(
-                self.uds_server.SID.SA, self.uds_server.NRC.REQUEST_SEQUENCE_ERROR
+                self.uds_server.SID.SA, self.uds_server.NRC.REQUIRED_TIME_DELAY_NOT_EXPIRED
             )
+        if self.unlocked_level == level.level:
+            return self.uds_server.positive_response.report_positive_response(
+                self.uds_server.SID.SA, [sfid] + [0x00] * level.algorithm.seed_length
+            )
+        level.seed = level.algorithm.generate_seed()
+        self.pending_level = level.level
+        return self.uds_server.positive_response.report_positive_response(self.uds_server.SID.SA, [sfid, *level.seed])
 
-        if sfid % 2 == 1:
-            return self.uds_server.positive_response.report_positive_response(self.uds_server.SID.SA, [sfid] + self._get_seed())
-
-        if len(data_stream) != 6:
+    def _send_key(self, level: SecurityLevel, sfid: int, key: list) -> list:
+        """Checks a sendKey and counts invalid attempts."""
+        if self.pending_level != level.level or level.seed is None:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.SA, self.uds_server.NRC.REQUEST_SEQUENCE_ERROR
+            )
+        if len(key) != level.algorithm.key_length:
             return self.uds_server.negative_response.report_negative_response(
                 self.uds_server.SID.SA, self.uds_server.NRC.INCORRECT_MESSAGE_LENGTH_OR_INVALID_FORMAT
             )
 
-        if self._check_key(data_stream[2:]):
+        expected_key = level.algorithm.compute_key(level.seed)
+        level.seed = None
+        self.pending_level = None
+        if bytes(key) == expected_key:
+            level.attempts = 0
+            self.unlocked_level = level.level
             return self.uds_server.positive_response.report_positive_response(self.uds_server.SID.SA, [sfid])
-        else:
+
+        level.attempts += 1
+        if level.attempts >= level.max_attempts:
+            level.attempts = 0
+            level.delay_until = monotonic() + level.delay
             return self.uds_server.negative_response.report_negative_response(
-                self.uds_server.SID.SA, self.uds_server.NRC.SECURITY_ACCESS_DENIED
+                self.uds_server.SID.SA, self.uds_server.NRC.EXCEEDED_NUMBER_OF_ATTEMPTS
             )
-
-    def _get_seed(self) -> list:
-        """Generates a random seed."""
-        self.seed_value = [randint(0, 255) for _ in range(4)]
-        self.seed_sent = True
-        return self.seed_value
-
-    def _check_key(self, key: list) -> bool:
-        """
-        Checks if the provided key is valid.
-
-        Args:
-            key: The key provided by the client.
-
-        Returns:
-            True if the key is valid, False otherwise.
-        """
-        internal_key = (
-            (self.seed_value[0] << 24)
-            | (self.seed_value[1] << 16)
-            | (self.seed_value[2] << 8)
-            | self.seed_value[3]
-        ) | 0x11223344
-        received_key = (
-            (key[0] << 24)
-            | (key[1] << 16)
-            | (key[2] << 8)
-            | key[3]
+        return self.uds_server.negative_response.report_negative_response(
+            self.uds_server.SID.SA, self.uds_server.NRC.INVALID_KEY
         )
-        if internal_key == received_key:
-            self.security_unlock_success = True
-            return True
-        return False
+
+    def _on_session_change(self, session: int) -> None:
+        """Locks the ECU on every session transition."""
+        self.lock()
 
 
 class CommunicationControl:
@@ -343,7 +425,6 @@ class CommunicationControl:
         uds_server: The UDS server instance.
         supported_subfunctions: A list of supported sub-function identifiers.
         supported_communication_types: A list of supported communication types.
-        supported_sessions: A list of sessions in which communication control is allowed.
     """
     def __init__(self, uds_server: 'UdsServer') -> None:
         self.uds_server: 'UdsServer' = uds_server
@@ -361,10 +442,6 @@ class CommunicationControl:
             self.NETWORK_MANAGEMENT_MESSAGES,
             self.BOTH_TYPES,
         ]
-        self.supported_sessions = [
-            self.uds_server.SFID.PROGRAMMING_SESSION,
-            self.uds_server.SFID.EXTENDED_SESSION,
-        ]
 
     def process_request(self, data_stream: list) -> list:
         """
@@ -380,10 +457,6 @@ class CommunicationControl:
             return self.uds_server.negative_response.report_negative_response(
                 self.uds_server.SID.CC, self.uds_server.NRC.INCORRECT_MESSAGE_LENGTH_OR_INVALID_FORMAT
             )
-        if self.uds_server.diagnostic_session_control.active_session not in self.supported_sessions:
-            return self.uds_server.negative_response.report_negative_response(
-                self.uds_server.SID.CC, self.uds_server.NRC.CONDITIONS_NOT_CORRECT
-            )
         sfid = data_stream[1]
         if sfid not in self.supported_subfunctions:
             return self.uds_server.negative_response.report_negative_response(
@@ -616,7 +689,6 @@ class ControlDtcSetting:
     Attributes:
         uds_server: The UDS server instance.
         supported_subfunctions: A list of supported sub-function identifiers.
-        supported_sessions: A list of sessions in which this service is allowed.
         dtc_setting: The current DTC setting (ON or OFF).
     """
     def __init__(self, uds_server: 'UdsServer') -> None:
@@ -625,10 +697,6 @@ class ControlDtcSetting:
             self.uds_server.SFID.ON,
             self.uds_server.SFID.OFF,
         ]
-        self.supported_sessions = [
-            self.uds_server.SFID.PROGRAMMING_SESSION,
-            self.uds_server.SFID.EXTENDED_SESSION,
-        ]
         self.dtc_setting = self.uds_server.SFID.ON
 
     def process_request(self, data_stream: list) -> list:
@@ -645,10 +713,6 @@ class ControlDtcSetting:
             return self.uds_server.negative_response.report_negative_response(
                 self.uds_server.SID.CDTCS, self.uds_server.NRC.INCORRECT_MESSAGE_LENGTH_OR_INVALID_FORMAT
             )
-        if self.uds_server.diagnostic_session_control.active_session not in self.supported_sessions:
-            return self.uds_server.negative_response.report_negative_response(
-                self.uds_server.SID.CDTCS, self.uds_server.NRC.CONDITIONS_NOT_CORRECT
-            )
         sfid = data_stream[1]
         if sfid not in self.supported_subfunctions:
             return self.uds_server.negative_response.report_negative_response(
@@ -659,6 +723,39 @@ class ControlDtcSetting:
         return self.uds_server.positive_response.report_positive_response(self.uds_server.SID.CDTCS, data_stream[1:])
 
 
+class ResponseOnEventEntry:
+    """
+    An event configured with Response On Event.
+
+    Attributes:
+        event_type: The event type (sub-function without storage/suppress bits).
+        store_event: True if the event survives a return to the default session.
+        event_window_time: The raw eventWindowTime byte.
+        event_type_record: The raw eventTypeRecord bytes.
+        service_to_respond_to: The request executed when the event fires.
+        armed: For onComparisonOfValues, False after firing until the
+            comparison is false again.
+    """
+    def __init__(
+        self, event_type: int, store_event: bool, event_window_time: int,
+        event_type_record: list, service_to_respond_to: list,
+    ) -> None:
+        self.event_type = event_type
+        self.store_event = store_event
+        self.event_window_time = event_window_time
+        self.event_type_record = event_type_record
+        self.service_to_respond_to = service_to_respond_to
+        self.armed = True
+
+    @property
+    def setup_record(self) -> list:
+        """The event as reported by reportActivatedEvents."""
+        return (
+            [self.event_type | (0x40 if self.store_event else 0x00), self.event_window_time]
+            + self.event_type_record + self.service_to_respond_to
+        )
+
+
 class ResponseOnEvent:
     """
     Handles Response On Event (0x86) service requests.
@@ -674,18 +771,39 @@ class ResponseOnEvent:
         when a DTC is set or a sensor value crosses a certain threshold.
 
     How:
-        The client sends a request to register an event (e.g., onDtcStatusChange)
-        and specifies the response that the server should send when that event
-        occurs.
+        The client sends a request to register an event (onDTCStatusChange,
+        onTimerInterrupt, onChangeOfDataIdentifier or onComparisonOfValues)
+        together with the service request the server should execute when the
+        event occurs, then starts the event handling with
+        startResponseOnEvent. The responses to events are published on
+        ``channel``.
+
+        Write paths only flag the DIDs and DTCs they change; the flags are
+        consumed after every request and looked up in per-DID indexes, so the
+        cost depends on the number of changes, not on the number of events.
+        Changes made outside a request are consumed with the next request or
+        by ``UdsServer.process_changes``. Timer events run on the scheduler
+        thread; their service requests are serialized with the tester
+        requests by ``UdsServer.request_lock``.
 
-    Note:
-        This service is not fully implemented in this simulator.
+    Real-world example:
+        A test bench wants to know as soon as the ECU stores a fault. It
+        registers onDTCStatusChange with the confirmedDTC bit as mask and
+        'Read DTC Information - reportMostRecentConfirmedDTC' as the service
+        to respond to, so the ECU reports every newly confirmed DTC by itself.
+
+    Attributes:
+        uds_server: The UDS server instance.
+        supported_subfunctions: A list of supported event types.
+        events: The configured events.
+        active: True between startResponseOnEvent and stopResponseOnEvent.
+        channel: The channel on which event responses are published.
     """
+    EVENT_TYPE_RECORD_LENGTHS = {0x01: 1, 0x02: 1, 0x03: 2, 0x07: 10}
+
     def __init__(self, uds_server: 'UdsServer') -> None:
         self.uds_server: 'UdsServer' = uds_server
         self.supported_subfunctions = [
-            self.uds_server.SFID.DO_NOT_STORE_EVENT,
-            self.uds_server.SFID.STORE_EVENT,
             self.uds_server.SFID.STOP_RESPONSE_ON_EVENT,
             self.uds_server.SFID.ON_DTC_STATUS_CHANGE,
             self.uds_server.SFID.ON_TIMER_INTERRUPT,
@@ -695,6 +813,14 @@ class ResponseOnEvent:
             self.uds_server.SFID.CLEAR_RESPONSE_ON_EVENT,
             self.uds_server.SFID.ON_COMPARISON_OF_VALUE,
         ]
+        self.events: list[ResponseOnEventEntry] = []
+        self.active = False
+        self.channel = FrameChannel()
+        self._events_by_did: dict[int, list[ResponseOnEventEntry]] = {}
+        self._dtc_events: list[ResponseOnEventEntry] = []
+        self._timer_jobs: list = []
+        self._processing = False
+        self.uds_server.diagnostic_session_control.session_listeners.append(self._on_session_change)
 
     def process_request(self, data_stream: list) -> list:
         """
@@ -704,12 +830,196 @@ class ResponseOnEvent:
             data_stream: The request data stream.
 
         Returns:
-            A negative response, as this service is not supported.
+            A list of bytes representing the response.
         """
-        return self.uds_server.negative_response.report_negative_response(
-            self.uds_server.SID.ROE, self.uds_server.NRC.SERVICE_NOT_SUPPORTED
+        if len(data_stream) < 2:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.ROE, self.uds_server.NRC.INCORRECT_MESSAGE_LENGTH_OR_INVALID_FORMAT
+            )
+        sfid = data_stream[1]
+        event_type = sfid & 0x3F
+        if event_type not in self.supported_subfunctions:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.ROE, self.uds_server.NRC.SUB_FUNCTION_NOT_SUPPORTED
+            )
+        if event_type == self.uds_server.SFID.REPORT_ACTIVATED_EVENTS:
+            if len(data_stream) != 2:
+                return self.uds_server.negative_response.report_negative_response(
+                    self.uds_server.SID.ROE, self.uds_server.NRC.INCORRECT_MESSAGE_LENGTH_OR_INVALID_FORMAT
+                )
+            active_events = self.events if self.active else []
+            response_data = [sfid, len(active_events)]
+            for event in active_events:
+                response_data.extend(event.setup_record)
+            return self.uds_server.positive_response.report_positive_response(self.uds_server.SID.ROE, response_data)
+        if event_type in self.EVENT_TYPE_RECORD_LENGTHS:
+            return self._setup_event(data_stream, event_type)
+        if len(data_stream) != 3:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.ROE, self.uds_server.NRC.INCORRECT_MESSAGE_LENGTH_OR_INVALID_FORMAT
+            )
+        if event_type == self.uds_server.SFID.START_RESPONSE_ON_EVENT:
+            if not self.events:
+                return self.uds_server.negative_response.report_negative_response(
+                    self.uds_server.SID.ROE, self.uds_server.NRC.REQUEST_SEQUENCE_ERROR
+                )
+            self.start()
+        elif event_type == self.uds_server.SFID.STOP_RESPONSE_ON_EVENT:
+            self.stop()
+        else:
+            self.clear()
+        return self.uds_server.positive_response.report_positive_response(
+            self.uds_server.SID.ROE, [sfid, 0x00, data_stream[2]]
+        )
+
+    def _setup_event(self, data_stream: list, event_type: int) -> list:
+        """Validates and stores a new event (onDTCStatusChange, onTimerInterrupt,
+        onChangeOfDataIdentifier or onComparisonOfValues)."""
+        record_length = self.EVENT_TYPE_RECORD_LENGTHS[event_type]
+        if len(data_stream) < 4 + record_length:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.ROE, self.uds_server.NRC.INCORRECT_MESSAGE_LENGTH_OR_INVALID_FORMAT
+            )
+        event = ResponseOnEventEntry(
+            event_type, bool(data_stream[1] & 0x40), data_stream[2],
+            data_stream[3:3 + record_length], data_stream[3 + record_length:],
+        )
+        if event_type in (self.uds_server.SFID.OCODID, self.uds_server.SFID.OCOV):
+            did = (event.event_type_record[0] << 8) | event.event_type_record[1]
+            if did not in self.uds_server.memory.did_database.definitions:
+                return self.uds_server.negative_response.report_negative_response(
+                    self.uds_server.SID.ROE, self.uds_server.NRC.REQUEST_OUT_OF_RANGE
+                )
+        if event_type == self.uds_server.SFID.ON_TIMER_INTERRUPT:
+            if event.event_type_record[0] not in self.uds_server.read_data_by_periodic_identifier.rates:
+                return self.uds_server.negative_response.report_negative_response(
+                    self.uds_server.SID.ROE, self.uds_server.NRC.REQUEST_OUT_OF_RANGE
+                )
+        was_active = self.active
+        self.stop()
+        self.events = [
+            configured for configured in self.events
+            if (configured.event_type, configured.event_type_record[:2]) != (event_type, event.event_type_record[:2])
+        ] + [event]
+        if was_active:
+            self.start()
+        return self.uds_server.positive_response.report_positive_response(
+            self.uds_server.SID.ROE, [data_stream[1], 0x00] + data_stream[2:]
         )
 
+    def start(self) -> None:
+        """Activates the configured events."""
+        self.stop()
+        self._events_by_did = {}
+        self._dtc_events = []
+        for event in self.events:
+            event.armed = True
+            if event.event_type in (self.uds_server.SFID.OCODID, self.uds_server.SFID.OCOV):
+                did = (event.event_type_record[0] << 8) | event.event_type_record[1]
+                self._events_by_did.setdefault(did, []).append(event)
+            elif event.event_type == self.uds_server.SFID.ON_DTC_STATUS_CHANGE:
+                self._dtc_events.append(event)
+            else:
+                rate = self.uds_server.read_data_by_periodic_identifier.rates[event.event_type_record[0]]
+                self._timer_jobs.append(scheduler.schedule(rate, partial(self._respond, event)))
+        self.active = True
+        self.uds_server.memory.track_changes = bool(self._events_by_did or self._dtc_events)
+
+    def stop(self) -> None:
+        """Deactivates the events but keeps their configuration."""
+        for job in self._timer_jobs:
+            job.cancel()
+        self._timer_jobs = []
+        self.active = False
+        self.uds_server.memory.track_changes = False
+        self.uds_server.memory.dirty_dids.clear()
+        self.uds_server.memory.dirty_dtcs.clear()
+
+    def clear(self) -> None:
+        """Deactivates and forgets every configured event."""
+        self.stop()
+        self.events = []
+
+    def process_changes(self) -> None:
+        """Consumes the flagged DID/DTC changes and fires the matching events."""
+        if self._processing:
+            return
+        memory = self.uds_server.memory
+        changed_dids, memory.dirty_dids = memory.dirty_dids, set()
+        changed_dtcs, memory.dirty_dtcs = memory.dirty_dtcs, {}
+        if not self.active:
+            return
+        self._processing = True
+        try:
+            for did in changed_dids:
+                for event in self._events_by_did.get(did, ()):
+                    if event.event_type == self.uds_server.SFID.OCODID or self._compare(event, did):
+                        self._respond(event)
+            for old_status, new_status in changed_dtcs.values():
+                for event in self._dtc_events:
+                    if (old_status ^ new_status) & event.event_type_record[0]:
+                        self._respond(event)
+        finally:
+            self._processing = False
+
+    def _compare(self, event: ResponseOnEventEntry, did: int) -> bool:
+        """Evaluates an onComparisonOfValues event.
+
+        The eventTypeRecord holds the DID, the comparison logic (0x01 less
+        than, 0x02 larger than, 0x03 equal, 0x04 not equal), a 4-byte
+        reference value, a hysteresis in percent of the reference value and
+        the localization of the compared value in the DID data: bit 15 marks
+        a signed value, bits 14-10 hold its length in bits (0 means 32) and
+        bits 9-0 its offset in bits from the start of the data.
+
+        Returns:
+            True when the comparison becomes true (edge triggered).
+        """
+        record = event.event_type_record
+        logic = record[2]
+        localization = (record[8] << 8) | record[9]
+        signed = bool(localization & 0x8000)
+        length = ((localization >> 10) & 0x1F) or 32
+        offset = localization & 0x03FF
+        reference = int.from_bytes(bytes(record[3:7]), "big", signed=signed)
+        data = self.uds_server.memory.did_database.read(did, self.uds_server)[2:]
+        total_bits = 8 * len(data)
+        if offset + length > total_bits:
+            return False
+        value = (int.from_bytes(data, "big") >> (total_bits - offset - length)) & ((1 << length) - 1)
+        if signed and value & (1 << (length - 1)):
+            value -= 1 << length
+        hysteresis = abs(reference) * record[7] // 100
+        match logic:
+            case 0x01:
+                result, rearm = value < reference, value >= reference + hysteresis
+            case 0x02:
+                result, rearm = value > reference, value <= reference - hysteresis
+            case 0x03:
+                result, rearm = value == reference, value != reference
+            case 0x04:
+                result, rearm = value != reference, value == reference
+            case _:
+                return False
+        if result and event.armed:
+            event.armed = False
+            return True
+        if rearm:
+            event.armed = True
+        return False
+
+    def _respond(self, event: ResponseOnEventEntry) -> None:
+        """Executes the service to respond to and publishes its response."""
+        response = self.uds_server.process_request(list(event.service_to_respond_to))
+        if response:
+            self.channel.publish(response)
+
+    def _on_session_change(self, session: int) -> None:
+        """Stops event handling and drops non-stored events in the default session."""
+        if session == self.uds_server.SFID.DEFAULT_SESSION and self.events:
+            self.stop()
+            self.events = [event for event in self.events if event.store_event]
+
 
 class LinkControl:
     """
@@ -1,4 +1,8 @@
 from typing import TYPE_CHECKING
+import numpy as np
+from py_uds_demo.core.utils.io_registry import (
+    FREEZE_CURRENT_STATE, RESET_TO_DEFAULT, RETURN_CONTROL_TO_ECU, SHORT_TERM_ADJUSTMENT, IoRegistry,
+)
 if TYPE_CHECKING:
     from py_uds_demo.core.server import UdsServer
 
@@ -29,13 +33,37 @@ class InputOutputControlByIdentifier:
         starts, the technician knows the fan motor is working and the issue
         lies elsewhere, perhaps with the temperature sensor or control logic.
 
+    The IO points are described by an ``IoRegistry``. Each IO DID lists the
+    inputOutputControlParameters it supports; a packeted DID with several
+    elements takes a controlEnableMask (one bit per element, most
+    significant bit first) after the control state. The response echoes
+    the control state of every element of the DID. All controls are
+    returned to the ECU when the default session is entered, e.g. on a
+    session timeout or an ECU reset.
+
     Attributes:
         uds_server: The UDS server instance.
-        io_control_status: A dictionary to store the status of I/O controls.
+        registry (IoRegistry): The IO points and their control state.
     """
     def __init__(self, uds_server: 'UdsServer') -> None:
         self.uds_server: 'UdsServer' = uds_server
-        self.io_control_status = {}
+        self.registry = IoRegistry.from_file()
+        self.uds_server.diagnostic_session_control.session_listeners.append(self._on_session_change)
+
+    @property
+    def registry(self) -> IoRegistry:
+        """The IO registry. Setting it (e.g. on restore) re-applies its controls to the signal model."""
+        return self._registry
+
+    @registry.setter
+    def registry(self, registry: IoRegistry) -> None:
+        self._registry = registry
+        registry.apply(self.uds_server.signals)
+
+    def _on_session_change(self, session: int) -> None:
+        """Returns every control to the ECU when the default session is entered."""
+        if session == self.uds_server.SFID.DEFAULT_SESSION:
+            self._registry.return_control(self.uds_server.signals)
 
     def process_request(self, data_stream: list) -> list:
         """
@@ -51,13 +79,47 @@ class InputOutputControlByIdentifier:
             return self.uds_server.negative_response.report_negative_response(
                 self.uds_server.SID.IOCBI, self.uds_server.NRC.INCORRECT_MESSAGE_LENGTH_OR_INVALID_FORMAT
             )
-
         did = (data_stream[1] << 8) | data_stream[2]
         control_option = data_stream[3]
+        registry = self._registry
+        if did not in registry.dids or not registry.supports(did, control_option):
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.IOCBI, self.uds_server.NRC.REQUEST_OUT_OF_RANGE
+            )
+        rows = registry.rows_of(did)
+        state_length = registry.state_length(rows) if control_option == SHORT_TERM_ADJUSTMENT else 0
+        mask_length = (len(rows) + 7) // 8 if len(rows) > 1 else 0
+        if len(data_stream) != 4 + state_length + mask_length:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.IOCBI, self.uds_server.NRC.INCORRECT_MESSAGE_LENGTH_OR_INVALID_FORMAT
+            )
+        enabled = np.ones(len(rows), dtype=np.bool_)
+        if mask_length:
+            mask = np.unpackbits(np.asarray(data_stream[4 + state_length:], dtype=np.uint8))
+            enabled = mask[:len(rows)].astype(np.bool_)
+        selected = np.asarray(rows, dtype=np.intp)[enabled]
+        if not len(selected):
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.IOCBI, self.uds_server.NRC.REQUEST_OUT_OF_RANGE
+            )
 
-        # In a real ECU, you would check if the DID is valid for I/O control
-        # and if the control option is supported.
-
-        self.io_control_status[did] = control_option
+        signals = self.uds_server.signals
+        if control_option == RETURN_CONTROL_TO_ECU:
+            registry.return_control(signals, selected)
+        elif control_option == RESET_TO_DEFAULT:
+            registry.adjust(selected, registry.defaults[selected], signals)
+        elif control_option == FREEZE_CURRENT_STATE:
+            registry.adjust(selected, registry.current_values(selected, signals), signals)
+        else:
+            values = registry.decode(rows, bytes(data_stream[4:4 + state_length]))[enabled]
+            if ((values < registry.minimum[selected]) | (values > registry.maximum[selected])).any():
+                return self.uds_server.negative_response.report_negative_response(
+                    self.uds_server.SID.IOCBI, self.uds_server.NRC.REQUEST_OUT_OF_RANGE
+                )
+            registry.adjust(selected, values, signals)
+        self.uds_server.memory.mark_did_changed(did)
 
-        return self.uds_server.positive_response.report_positive_response(self.uds_server.SID.IOCBI, data_stream[1:3])
+        control_state = registry.encode(rows, registry.current_values(rows, signals))
+        return self.uds_server.positive_response.report_positive_response(
+            self.uds_server.SID.IOCBI, [*data_stream[1:4], *control_state]
+        )
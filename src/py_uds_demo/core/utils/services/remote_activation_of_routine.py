@@ -1,4 +1,5 @@
 from typing import TYPE_CHECKING
+from py_uds_demo.core.utils.routines import DEFAULT_ROUTINES, IN_PROGRESS
 if TYPE_CHECKING:
     from py_uds_demo.core.server import UdsServer
 
@@ -29,12 +30,21 @@ class RoutineControl:
         self-test. After the routine completes, they send another request
         with 'requestRoutineResults' to check if the test passed.
 
+    Routines come from a registry (see ``routines``) and run as background
+    tasks on a shared thread pool: startRoutine returns at once and never
+    blocks requests of other testers. requestRoutineResults reports the
+    routine state and progress followed by the routine's result bytes, and
+    stopRoutine asks the routine to stop at its next cancellation check.
+
     Attributes:
         uds_server: The UDS server instance.
-        routine_status: A dictionary to store the status of routines.
+        routines (dict[int, Routine]): The supported routines.
+        routine_status (dict[int, RoutineRun]): The last run of each started
+            routine.
     """
     def __init__(self, uds_server: 'UdsServer') -> None:
         self.uds_server: 'UdsServer' = uds_server
+        self.routines = dict(DEFAULT_ROUTINES)
         self.routine_status = {}
 
     def process_request(self, data_stream: list) -> list:
@@ -54,27 +64,53 @@ class RoutineControl:
 
         sub_function = data_stream[1]
         routine_id = (data_stream[2] << 8) | data_stream[3]
+        if sub_function not in (
+            self.uds_server.SFID.START_ROUTINE, self.uds_server.SFID.STOP_ROUTINE,
+            self.uds_server.SFID.REQUEST_ROUTINE_RESULT,
+        ):
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.RC, self.uds_server.NRC.SUB_FUNCTION_NOT_SUPPORTED
+            )
+        routine = self.routines.get(routine_id)
+        if routine is None:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.RC, self.uds_server.NRC.REQUEST_OUT_OF_RANGE
+            )
+        run = self.routine_status.get(routine_id)
 
         if sub_function == self.uds_server.SFID.START_ROUTINE:
-            self.routine_status[routine_id] = "Started"
+            if run is not None and run.state == IN_PROGRESS:
+                return self.uds_server.negative_response.report_negative_response(
+                    self.uds_server.SID.RC, self.uds_server.NRC.REQUEST_SEQUENCE_ERROR
+                )
+            if not routine.accepts(self.uds_server, data_stream[4:]):
+                return self.uds_server.negative_response.report_negative_response(
+                    self.uds_server.SID.RC, self.uds_server.NRC.REQUEST_OUT_OF_RANGE
+                )
+            self.routine_status[routine_id] = routine.start(self.uds_server, data_stream[4:])
             return self.uds_server.positive_response.report_positive_response(self.uds_server.SID.RC, data_stream[1:4])
 
-        elif sub_function == self.uds_server.SFID.STOP_ROUTINE:
-            self.routine_status[routine_id] = "Stopped"
-            return self.uds_server.positive_response.report_positive_response(self.uds_server.SID.RC, data_stream[1:4])
+        if len(data_stream) != 4:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.RC, self.uds_server.NRC.INCORRECT_MESSAGE_LENGTH_OR_INVALID_FORMAT
+            )
 
-        elif sub_function == self.uds_server.SFID.REQUEST_ROUTINE_RESULT:
-            if routine_id in self.routine_status:
-                # Returning a dummy result
-                return self.uds_server.positive_response.report_positive_response(
-                    self.uds_server.SID.RC, data_stream[1:4] + [0x01, 0x02, 0x03]
+        if sub_function == self.uds_server.SFID.STOP_ROUTINE:
+            if not routine.stoppable:
+                return self.uds_server.negative_response.report_negative_response(
+                    self.uds_server.SID.RC, self.uds_server.NRC.SUB_FUNCTION_NOT_SUPPORTED
                 )
-            else:
+            if run is None or run.state != IN_PROGRESS:
                 return self.uds_server.negative_response.report_negative_response(
-                    self.uds_server.SID.RC, self.uds_server.NRC.REQUEST_OUT_OF_RANGE
+                    self.uds_server.SID.RC, self.uds_server.NRC.REQUEST_SEQUENCE_ERROR
                 )
+            run.context.cancel()
+            return self.uds_server.positive_response.report_positive_response(self.uds_server.SID.RC, data_stream[1:4])
 
-        else:
+        if run is None:
             return self.uds_server.negative_response.report_negative_response(
-                self.uds_server.SID.RC, self.uds_server.NRC.SUB_FUNCTION_NOT_SUPPORTED
+                self.uds_server.SID.RC, self.uds_server.NRC.REQUEST_SEQUENCE_ERROR
             )
+        return self.uds_server.positive_response.report_positive_response(
+            self.uds_server.SID.RC, data_stream[1:4] + [run.state, run.progress, *run.result]
+        )
@@ -1,4 +1,7 @@
-from typing import TYPE_CHECKING
+from functools import partial
+from typing import TYPE_CHECKING, Union
+import numpy as np
+from py_uds_demo.core.utils.dtc_store import DtcStore
 if TYPE_CHECKING:
     from py_uds_demo.core.server import UdsServer
 
@@ -19,13 +22,20 @@ class ClearDiagnosticInformation:
     How:
         The client sends a request with the SID 0x14, followed by a 3-byte
         groupOfDTC parameter, which specifies which DTCs to clear. A value
-        of 0xFFFFFF is typically used to clear all DTCs.
+        of 0xFFFFFF is typically used to clear all DTCs; a DTC number clears
+        that DTC and a group number clears every DTC of the group. An
+        optional memory selection byte addresses a user-defined DTC memory
+        instead of the primary one.
 
     Real-world example:
         A "Check Engine" light is on. A technician reads the DTCs and finds
         a code for a faulty sensor. After replacing the sensor, the technician
         uses this service to clear the DTC, which turns off the light.
 
+    Groups are resolved through the ``DtcStore`` indexes, so clearing one
+    group only touches the rows of that group. Every cleared status change
+    is reported to the store listener (Response On Event).
+
     Attributes:
         uds_server: The UDS server instance.
     """
@@ -42,12 +52,27 @@ class ClearDiagnosticInformation:
         Returns:
             A list of bytes representing the response.
         """
+        if len(data_stream) not in (4, 5):
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.CDTCI, self.uds_server.NRC.INCORRECT_MESSAGE_LENGTH_OR_INVALID_FORMAT
+            )
+
         if self.uds_server.control_dtc_setting.dtc_setting == self.uds_server.SFID.OFF:
             return self.uds_server.negative_response.report_negative_response(
                 self.uds_server.SID.CDTCI, self.uds_server.NRC.CONDITIONS_NOT_CORRECT
             )
 
-        self.uds_server.memory.dtcs = []
+        if len(data_stream) == 5:
+            dtc_store = self.uds_server.memory.user_defined_dtc_stores.get(data_stream[4])
+        else:
+            dtc_store = self.uds_server.memory.dtc_store
+        rows = None if dtc_store is None else dtc_store.select(int.from_bytes(bytes(data_stream[1:4]), "big"))
+        if rows is None:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.CDTCI, self.uds_server.NRC.REQUEST_OUT_OF_RANGE
+            )
+
+        dtc_store.clear_rows(rows)
         return self.uds_server.positive_response.report_positive_response(self.uds_server.SID.CDTCI, [])
 
 
@@ -79,11 +104,43 @@ class ReadDtcInformation:
         data for a specific DTC to get more context about when the fault
         occurred.
 
+    Status and severity mask filtering runs over the whole ``DtcStore`` at
+    once, and the first/most recent DTC reports use the pointers kept by the
+    store, so reports stay fast with tens of thousands of DTCs.
+
     Attributes:
         uds_server: The UDS server instance.
+        DTC_FORMAT_IDENTIFIER (int): The reported DTC format (0x01, ISO
+            14229-1 DTC format).
+        ALL_RECORDS (int): The record number requesting every record.
+        ALL_OBD_RECORDS (int): The extended data record number requesting
+            every OBD record (0x90 to 0xEF).
     """
+    DTC_FORMAT_IDENTIFIER = 0x01
+    ALL_RECORDS = 0xFF
+    ALL_OBD_RECORDS = 0xFE
+
     def __init__(self, uds_server: 'UdsServer') -> None:
         self.uds_server: 'UdsServer' = uds_server
+        sfid = self.uds_server.SFID
+        self._handlers = {
+            sfid.REPORT_NUMBER_OF_DTC_BY_STATUS_MASK: (3, self._report_number_by_status_mask),
+            sfid.REPORT_DTC_BY_STATUS_MASK: (3, self._report_by_status_mask),
+            sfid.REPORT_DTC_SNAPSHOT_IDENTIFICATION: (2, self._report_snapshot_identification),
+            sfid.REPORT_DTC_SNAPSHOT_RECORD_BY_DTC_NUMBER: (6, self._report_snapshot_record),
+            sfid.REPORT_DTC_EXT_DATA_RECORD_BY_DTC_NUMBER: (6, self._report_extended_data_record),
+            sfid.REPORT_NUMBER_OF_DTC_BY_SEVERITY_MASK_RECORD: (4, self._report_number_by_severity_mask),
+            sfid.REPORT_DTC_BY_SEVERITY_MASK_RECORD: (4, self._report_by_severity_mask),
+            sfid.REPORT_SEVERITY_INFORMATION_OF_DTC: (5, self._report_severity_information),
+            sfid.REPORT_SUPPORTED_DTC: (2, self._report_supported),
+            sfid.REPORT_FIRST_TEST_FAILED_DTC: (2, partial(self._report_pointer, "first_failed")),
+            sfid.REPORT_FIRST_CONFIRMED_DTC: (2, partial(self._report_pointer, "first_confirmed")),
+            sfid.REPORT_MOST_RECENT_TEST_FAILED_DTC: (2, partial(self._report_pointer, "most_recent_failed")),
+            sfid.REPORT_MOST_RECENT_CONFIRMED_DTC: (2, partial(self._report_pointer, "most_recent_confirmed")),
+            sfid.REPORT_DTC_FAULT_DETECTION_COUNTER: (2, self._report_fault_detection_counter),
+            sfid.REPORT_DTC_WITH_PERMANENT_STATUS: (2, self._report_permanent),
+            sfid.REPORT_USER_DEF_MEMORY_DTC_BY_STATUS_MASK: (4, self._report_user_defined_memory_by_status_mask),
+        }
 
     def process_request(self, data_stream: list) -> list:
         """
@@ -101,32 +158,132 @@ class ReadDtcInformation:
             )
 
         sub_function = data_stream[1]
-
-        if sub_function == self.uds_server.SFID.REPORT_NUMBER_OF_DTC_BY_STATUS_MASK:
-            if len(data_stream) != 3:
-                return self.uds_server.negative_response.report_negative_response(
-                    self.uds_server.SID.RDTCI, self.uds_server.NRC.INCORRECT_MESSAGE_LENGTH_OR_INVALID_FORMAT
-                )
-            status_mask = data_stream[2]
-            # In this simulation, we'll just count all DTCs regardless of status mask
-            num_dtcs = len(self.uds_server.memory.dtcs)
-            return self.uds_server.positive_response.report_positive_response(
-                self.uds_server.SID.RDTCI, [sub_function, status_mask, 0x01, num_dtcs]
+        handler = self._handlers.get(sub_function)
+        if handler is None:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.RDTCI, self.uds_server.NRC.SUB_FUNCTION_NOT_SUPPORTED
+            )
+        request_length, report = handler
+        if len(data_stream) != request_length:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.RDTCI, self.uds_server.NRC.INCORRECT_MESSAGE_LENGTH_OR_INVALID_FORMAT
+            )
+        response_data = report(self.uds_server.memory.dtc_store, data_stream)
+        if response_data is None:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.RDTCI, self.uds_server.NRC.REQUEST_OUT_OF_RANGE
             )
+        return self.uds_server.positive_response.report_positive_response(
+            self.uds_server.SID.RDTCI, [sub_function, *response_data]
+        )
+
+    def _count_record(self, dtc_store: DtcStore, count: int) -> list:
+        """Builds the ``availability mask, format, count`` response data."""
+        return [dtc_store.status_availability_mask, self.DTC_FORMAT_IDENTIFIER, (count >> 8) & 0xFF, count & 0xFF]
+
+    def _report_number_by_status_mask(self, dtc_store: DtcStore, data_stream: list) -> list:
+        """0x01: the number of DTCs matching a status mask."""
+        return self._count_record(dtc_store, dtc_store.count_by_status_mask(data_stream[2]))
+
+    def _report_by_status_mask(self, dtc_store: DtcStore, data_stream: list) -> bytes:
+        """0x02: the DTCs matching a status mask."""
+        return bytes([dtc_store.status_availability_mask]) + dtc_store.encode_rows(
+            dtc_store.rows_by_status_mask(data_stream[2])
+        )
+
+    def _report_snapshot_identification(self, dtc_store: DtcStore, data_stream: list) -> bytes:
+        """0x03: every stored snapshot record as ``DTC + record number``."""
+        response_data = bytearray()
+        for row in dtc_store.snapshot_dtcs:
+            dtc = dtc_store.encode_rows([row])[:3]
+            for record_number, _ in dtc_store.snapshots_of(row).items():
+                response_data += dtc
+                response_data.append(record_number)
+        return bytes(response_data)
 
-        elif sub_function == self.uds_server.SFID.REPORT_DTC_BY_STATUS_MASK:
-            if len(data_stream) != 3:
-                return self.uds_server.negative_response.report_negative_response(
-                    self.uds_server.SID.RDTCI, self.uds_server.NRC.INCORRECT_MESSAGE_LENGTH_OR_INVALID_FORMAT
-                )
-            status_mask = data_stream[2]
-            # In this simulation, we'll return all DTCs regardless of status mask
-            response_data = [sub_function, status_mask]
-            for dtc in self.uds_server.memory.dtcs:
-                response_data.extend(dtc)
-            return self.uds_server.positive_response.report_positive_response(self.uds_server.SID.RDTCI, response_data)
+    def _dtc_row(self, dtc_store: DtcStore, data_stream: list) -> Union[int, None]:
+        """Returns the row of the DTC in request bytes 2 to 4."""
+        return dtc_store.row_of(int.from_bytes(bytes(data_stream[2:5]), "big"))
 
+    def _report_snapshot_record(self, dtc_store: DtcStore, data_stream: list) -> Union[bytes, None]:
+        """0x04: the snapshot records of one DTC."""
+        row = self._dtc_row(dtc_store, data_stream)
+        record_number = data_stream[5]
+        if row is None or not (
+            record_number == self.ALL_RECORDS or 1 <= record_number <= dtc_store.snapshot_records_per_dtc
+        ):
+            return None
+        response_data = bytearray(dtc_store.encode_rows([row]))
+        ring = dtc_store.snapshots_of(row)
+        if ring is not None:
+            for number, record in ring.items():
+                if record_number in (self.ALL_RECORDS, number):
+                    response_data.append(number)
+                    response_data += record
+        return bytes(response_data)
+
+    def _report_extended_data_record(self, dtc_store: DtcStore, data_stream: list) -> Union[bytes, None]:
+        """0x06: the extended data records of one DTC."""
+        row = self._dtc_row(dtc_store, data_stream)
+        record_number = data_stream[5]
+        if record_number == self.ALL_RECORDS:
+            wanted = dtc_store.extended_data_record_lengths.keys()
+        elif record_number == self.ALL_OBD_RECORDS:
+            wanted = [number for number in dtc_store.extended_data_record_lengths if 0x90 <= number <= 0xEF]
         else:
-            return self.uds_server.negative_response.report_negative_response(
-                self.uds_server.SID.RDTCI, self.uds_server.NRC.SUB_FUNCTION_NOT_SUPPORTED
-            )
+            wanted = [record_number] if record_number in dtc_store.extended_data_record_lengths else []
+        if row is None or not wanted:
+            return None
+        response_data = bytearray(dtc_store.encode_rows([row]))
+        records = dtc_store.extended_data_of(row)
+        for number in sorted(wanted):
+            record = records.get(number)
+            if record is not None:
+                response_data.append(number)
+                response_data += record
+        return bytes(response_data)
+
+    def _report_number_by_severity_mask(self, dtc_store: DtcStore, data_stream: list) -> list:
+        """0x07: the number of DTCs matching a severity and a status mask."""
+        return self._count_record(dtc_store, len(dtc_store.rows_by_severity_mask(data_stream[2], data_stream[3])))
+
+    def _report_by_severity_mask(self, dtc_store: DtcStore, data_stream: list) -> bytes:
+        """0x08: the DTCs matching a severity and a status mask."""
+        return bytes([dtc_store.status_availability_mask]) + dtc_store.encode_severity_rows(
+            dtc_store.rows_by_severity_mask(data_stream[2], data_stream[3])
+        )
+
+    def _report_severity_information(self, dtc_store: DtcStore, data_stream: list) -> Union[bytes, None]:
+        """0x09: the severity of one DTC."""
+        row = self._dtc_row(dtc_store, data_stream)
+        if row is None:
+            return None
+        return bytes([dtc_store.status_availability_mask]) + dtc_store.encode_severity_rows([row])
+
+    def _report_supported(self, dtc_store: DtcStore, data_stream: list) -> bytes:
+        """0x0A: every supported DTC regardless of its status."""
+        return bytes([dtc_store.status_availability_mask]) + dtc_store.encode_rows()
+
+    def _report_pointer(self, pointer: str, dtc_store: DtcStore, data_stream: list) -> bytes:
+        """0x0B to 0x0E: the first/most recent failed/confirmed DTC, if any."""
+        row = getattr(dtc_store, pointer)
+        records = b"" if row is None else dtc_store.encode_rows([row])
+        return bytes([dtc_store.status_availability_mask]) + records
+
+    def _report_fault_detection_counter(self, dtc_store: DtcStore, data_stream: list) -> bytes:
+        """0x14: the DTCs that are prefailed but not yet failed, with their counter."""
+        return dtc_store.encode_fault_detection_counters(dtc_store.rows_prefailed())
+
+    def _report_user_defined_memory_by_status_mask(self, dtc_store: DtcStore, data_stream: list) -> Union[bytes, None]:
+        """0x17: the DTCs of a user-defined memory matching a status mask."""
+        memory_selection = data_stream[3]
+        dtc_store = self.uds_server.memory.user_defined_dtc_stores.get(memory_selection)
+        if dtc_store is None:
+            return None
+        return bytes([memory_selection]) + self._report_by_status_mask(dtc_store, data_stream)
+
+    def _report_permanent(self, dtc_store: DtcStore, data_stream: list) -> bytes:
+        """0x15: the DTCs flagged as permanent."""
+        return bytes([dtc_store.status_availability_mask]) + dtc_store.encode_rows(
+            np.flatnonzero(dtc_store.permanent)
+        )
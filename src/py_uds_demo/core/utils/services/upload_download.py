@@ -1,8 +1,33 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Union
+from py_uds_demo.core.utils.flash import FlashError, FlashRegion
 if TYPE_CHECKING:
     from py_uds_demo.core.server import UdsServer
 
 
+class DownloadTransfer:
+    """The state of a running download.
+
+    Attributes:
+        region (FlashRegion): The flash region receiving the data.
+        address (int): The start address of the download.
+        size (int): The announced number of bytes.
+        next_address (int): The address of the next byte to program.
+        block_sequence_counter (int): The counter expected in the next
+            Transfer Data request.
+    """
+    def __init__(self, region: FlashRegion, address: int, size: int) -> None:
+        self.region = region
+        self.address = address
+        self.size = size
+        self.next_address = address
+        self.block_sequence_counter = 1
+
+    @property
+    def remaining(self) -> int:
+        """The number of bytes still to be transferred."""
+        return self.address + self.size - self.next_address
+
+
 class RequestDownload:
     """
     Handles Request Download (0x34) service requests.
@@ -17,14 +42,26 @@ class RequestDownload:
         maximum size of the data blocks it can accept at a time.
 
     How:
-        The client sends a request with the SID 0x34, the memory address
-        where the data should be stored, and the total size of the data.
-
-    Note:
-        This service is not fully implemented in this simulator.
+        The client sends a request with the SID 0x34, the
+        dataFormatIdentifier, the addressAndLengthFormatIdentifier, the
+        memory address where the data should be stored and the total size of
+        the data. The server answers with the maximum length of a Transfer
+        Data request.
+
+    Downloads go to flash; in the programming session the bank address maps
+    to the inactive bank (see ``Bootloader``). Only uncompressed,
+    unencrypted data (dataFormatIdentifier 0x00) is supported.
+
+    Attributes:
+        uds_server: The UDS server instance.
+        max_block_length (int): The maximum length of a Transfer Data request,
+            including the SID and the block sequence counter.
+        transfer (DownloadTransfer | None): The running download.
     """
     def __init__(self, uds_server: 'UdsServer') -> None:
         self.uds_server: 'UdsServer' = uds_server
+        self.max_block_length = 0x1002
+        self.transfer: Union[DownloadTransfer, None] = None
 
     def process_request(self, data_stream: list) -> list:
         """
@@ -34,10 +71,36 @@ class RequestDownload:
             data_stream: The request data stream.
 
         Returns:
-            A negative response, as this service is not supported.
+            A list of bytes representing the response.
         """
-        return self.uds_server.negative_response.report_negative_response(
-            self.uds_server.SID.RD, self.uds_server.NRC.SERVICE_NOT_SUPPORTED
+        if len(data_stream) < 3:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.RD, self.uds_server.NRC.INCORRECT_MESSAGE_LENGTH_OR_INVALID_FORMAT
+            )
+        data_format_identifier = data_stream[1]
+        size_length, address_length = data_stream[2] >> 4, data_stream[2] & 0x0F
+        if not (1 <= address_length <= 4 and 1 <= size_length <= 4):
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.RD, self.uds_server.NRC.REQUEST_OUT_OF_RANGE
+            )
+        if len(data_stream) != 3 + address_length + size_length:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.RD, self.uds_server.NRC.INCORRECT_MESSAGE_LENGTH_OR_INVALID_FORMAT
+            )
+        if self.transfer is not None:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.RD, self.uds_server.NRC.CONDITIONS_NOT_CORRECT
+            )
+        address = int.from_bytes(bytes(data_stream[3:3 + address_length]), "big")
+        size = int.from_bytes(bytes(data_stream[3 + address_length:]), "big")
+        region = self.uds_server.memory.flash.find(address, size)
+        if data_format_identifier != 0x00 or region is None or size == 0:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.RD, self.uds_server.NRC.REQUEST_OUT_OF_RANGE
+            )
+        self.transfer = DownloadTransfer(region, address, size)
+        return self.uds_server.positive_response.report_positive_response(
+            self.uds_server.SID.RD, [0x20, *self.max_block_length.to_bytes(2, "big")]
         )
 
 
@@ -95,8 +158,13 @@ class TransferData:
         or server (for uploads) sends a sequence of Transfer Data requests,
         each containing a block of data.
 
-    Note:
-        This service is not fully implemented in this simulator.
+    The block sequence counter starts at 0x01 and wraps from 0xFF to 0x00.
+    A repeated block (the previous counter) is acknowledged without being
+    programmed again, so a tester can retry after a lost response. Only
+    downloads are supported.
+
+    Attributes:
+        uds_server: The UDS server instance.
     """
     def __init__(self, uds_server: 'UdsServer') -> None:
         self.uds_server: 'UdsServer' = uds_server
@@ -109,10 +177,42 @@ class TransferData:
             data_stream: The request data stream.
 
         Returns:
-            A negative response, as this service is not supported.
+            A list of bytes representing the response.
         """
-        return self.uds_server.negative_response.report_negative_response(
-            self.uds_server.SID.TD, self.uds_server.NRC.SERVICE_NOT_SUPPORTED
+        transfer = self.uds_server.request_download.transfer
+        if transfer is None:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.TD, self.uds_server.NRC.REQUEST_SEQUENCE_ERROR
+            )
+        if len(data_stream) < 2 or len(data_stream) > self.uds_server.request_download.max_block_length:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.TD, self.uds_server.NRC.INCORRECT_MESSAGE_LENGTH_OR_INVALID_FORMAT
+            )
+        block_sequence_counter = data_stream[1]
+        if block_sequence_counter == (transfer.block_sequence_counter - 1) & 0xFF:
+            return self.uds_server.positive_response.report_positive_response(
+                self.uds_server.SID.TD, [block_sequence_counter]
+            )
+        if block_sequence_counter != transfer.block_sequence_counter:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.TD, self.uds_server.NRC.WRONG_BLOCK_SEQUENCE_COUNTER
+            )
+        data = bytes(data_stream[2:])
+        if len(data) > transfer.remaining:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.TD, self.uds_server.NRC.TRANSFER_DATA_SUSPENDED
+            )
+        try:
+            transfer.region.write(transfer.next_address, data)
+        except FlashError as error:
+            self.uds_server.logger.warning(f"transfer data: {error}")
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.TD, self.uds_server.NRC.GENERAL_PROGRAMMING_FAILURE
+            )
+        transfer.next_address += len(data)
+        transfer.block_sequence_counter = (block_sequence_counter + 1) & 0xFF
+        return self.uds_server.positive_response.report_positive_response(
+            self.uds_server.SID.TD, [block_sequence_counter]
         )
 
 
@@ -131,8 +231,11 @@ class RequestTransferExit:
         The client sends a request with the SID 0x37 to indicate that the
         transfer is complete.
 
-    Note:
-        This service is not fully implemented in this simulator.
+    The download must have received every announced byte; verifying the
+    programmed data is left to the check memory routine.
+
+    Attributes:
+        uds_server: The UDS server instance.
     """
     def __init__(self, uds_server: 'UdsServer') -> None:
         self.uds_server: 'UdsServer' = uds_server
@@ -145,11 +248,15 @@ class RequestTransferExit:
             data_stream: The request data stream.
 
         Returns:
-            A negative response, as this service is not supported.
+            A list of bytes representing the response.
         """
-        return self.uds_server.negative_response.report_negative_response(
-            self.uds_server.SID.RTE, self.uds_server.NRC.SERVICE_NOT_SUPPORTED
-        )
+        transfer = self.uds_server.request_download.transfer
+        if transfer is None or transfer.remaining:
+            return self.uds_server.negative_response.report_negative_response(
+                self.uds_server.SID.RTE, self.uds_server.NRC.REQUEST_SEQUENCE_ERROR
+            )
+        self.uds_server.request_download.transfer = None
+        return self.uds_server.positive_response.report_positive_response(self.uds_server.SID.RTE, [])
 
 
 class RequestFileTransfer:
@@ -0,0 +1,290 @@
+import os
+import json
+from time import monotonic
+from typing import TYPE_CHECKING, Iterable, Union
+
+import numpy as np
+
+from py_uds_demo.core.utils.codecs import parse_number
+from py_uds_demo.core.utils.helpers import Nrc
+
+if TYPE_CHECKING:
+    from py_uds_demo.core.server import UdsServer
+
+
+DEFAULT_PRECONDITIONS = os.path.join(os.path.dirname(__file__), "preconditions.json")
+
+_NRC = Nrc()
+
+
+class Signal:
+    """The definition of one vehicle signal.
+
+    Attributes:
+        name (str): The signal name.
+        unit (str): The physical unit.
+        minimum (float): The lowest physical value.
+        maximum (float): The highest physical value.
+        initial (float): The value of a parked vehicle with the engine off.
+        nrc_low (int | None): The NRC reported when a precondition needs a
+            higher value.
+        nrc_high (int | None): The NRC reported when a precondition needs a
+            lower value.
+    """
+    def __init__(
+        self, name: str, unit: str, minimum: float, maximum: float, initial: float,
+        nrc_low: Union[int, None], nrc_high: Union[int, None],
+    ) -> None:
+        self.name = name
+        self.unit = unit
+        self.minimum = minimum
+        self.maximum = maximum
+        self.initial = initial
+        self.nrc_low = nrc_low
+        self.nrc_high = nrc_high
+
+
+SIGNALS = [
+    Signal("engine_speed", "rpm", 0.0, 8000.0, 0.0, _NRC.RPM_TOO_LOW, _NRC.RPM_TOO_HIGH),
+    Signal("vehicle_speed", "km/h", 0.0, 250.0, 0.0, _NRC.VEHICLE_SPEED_TOO_LOW, _NRC.VEHICLE_SPEED_TOO_HIGH),
+    Signal("coolant_temperature", "degC", -40.0, 215.0, 20.0, _NRC.TEMPERATURE_TOO_LOW, _NRC.TEMPERATURE_TOO_HIGH),
+    Signal("intake_air_temperature", "degC", -40.0, 215.0, 20.0, _NRC.TEMPERATURE_TOO_LOW, _NRC.TEMPERATURE_TOO_HIGH),
+    Signal("battery_voltage", "V", 0.0, 20.0, 12.6, _NRC.VOLTAGE_TOO_LOW, _NRC.VOLTAGE_TOO_HIGH),
+    Signal("throttle_position", "%", 0.0, 100.0, 0.0, _NRC.THROTTLE_OR_PEDAL_TOO_LOW, _NRC.THROTTLE_OR_PEDAL_TOO_HIGH),
+    Signal("engine_running", "", 0.0, 1.0, 0.0, _NRC.ENGINE_IS_NOT_RUNNING, _NRC.ENGINE_IS_RUNNING),
+    Signal("engine_run_time", "s", 0.0, 65535.0, 0.0, _NRC.ENGINE_RUN_TIME_TOO_LOW, None),
+    Signal("shifter_position", "", 0.0, 3.0, 0.0, None, _NRC.SHIFTER_LEVER_NOT_IN_PARK),
+    Signal("brake_switch", "", 0.0, 1.0, 1.0, _NRC.BRAKE_SWITCH_NOT_CLOSED, None),
+]
+"""The simulated signals, in column order. The shifter position is 0 (park),
+1 (reverse), 2 (neutral) or 3 (drive); booleans are 0.0 or 1.0."""
+
+COLUMNS = {signal.name: column for column, signal in enumerate(SIGNALS)}
+"""The column of every signal in ``SignalModel.values``."""
+
+(
+    ENGINE_SPEED, VEHICLE_SPEED, COOLANT_TEMPERATURE, INTAKE_AIR_TEMPERATURE, BATTERY_VOLTAGE,
+    THROTTLE_POSITION, ENGINE_RUNNING, ENGINE_RUN_TIME, SHIFTER_POSITION, BRAKE_SWITCH,
+) = range(len(SIGNALS))
+
+_MINIMUM = np.array([signal.minimum for signal in SIGNALS])
+_MAXIMUM = np.array([signal.maximum for signal in SIGNALS])
+_INITIAL = np.array([signal.initial for signal in SIGNALS])
+
+
+def _approach(dt: float, time_constant: float) -> float:
+    """The share of the distance to its target a first-order lag covers in ``dt``."""
+    return 1.0 - np.exp(-dt / time_constant)
+
+
+class SignalModel:
+    """A time-stepped physical model of the signals of a fleet of ECUs.
+
+    All signals of all ECUs live in one ``(ecus, signals)`` float array and
+    ``step`` advances every ECU with a handful of whole-array operations:
+    drivers start and stop engines at random, the throttle follows a mean
+    reverting random walk, engine speed, vehicle speed and temperatures
+    follow it through first-order lags and the battery voltage depends on
+    the alternator. Overridden cells (see ``override``) keep their value.
+
+    A model created with ``realtime=True`` advances itself to the wall clock
+    whenever a value is read; otherwise it only changes on ``step``.
+
+    Attributes:
+        values (np.ndarray): The ``(ecus, signals)`` physical values.
+        overridden (np.ndarray): True where a value is overridden.
+        override_values (np.ndarray): The values of the overridden cells.
+        dt (float): The default step in seconds.
+        realtime (bool): True if reads advance the model to the wall clock.
+        start_rate (float): Per second probability of a parked ECU's engine
+            being started.
+        stop_rate (float): Per second probability of a standing vehicle's
+            engine being switched off.
+        ambient_temperature (float): The ambient temperature in degC.
+        time (float): The simulated time in seconds.
+    """
+    def __init__(self, ecus: int = 1, dt: float = 0.1, realtime: bool = False, seed: Union[int, None] = None) -> None:
+        shape = (ecus, len(SIGNALS))
+        self.values = np.broadcast_to(_INITIAL, shape).copy()
+        self.overridden = np.zeros(shape, dtype=np.bool_)
+        self.override_values = np.zeros(shape)
+        self.dt = dt
+        self.realtime = realtime
+        self.start_rate = 0.05
+        self.stop_rate = 0.01
+        self.ambient_temperature = 20.0
+        self.time = 0.0
+        self._throttle_target = np.zeros(ecus)
+        self._rng = np.random.default_rng(seed)
+        self._last_sync = monotonic()
+
+    @property
+    def ecus(self) -> int:
+        """The number of ECUs."""
+        return self.values.shape[0]
+
+    def step(self, dt: Union[float, None] = None, steps: int = 1) -> None:
+        """Advances every ECU by ``steps`` steps of ``dt`` seconds."""
+        dt = self.dt if dt is None else dt
+        values = self.values
+        for _ in range(steps):
+            random = self._rng.random((4, self.ecus))
+            running = values[:, ENGINE_RUNNING] > 0.5
+            standing = values[:, VEHICLE_SPEED] < 0.5
+            started = ~running & (random[0] < self.start_rate * dt)
+            stopped = running & standing & (random[1] < self.stop_rate * dt)
+            running = running ^ (started | stopped)
+
+            retarget = random[2] < 0.2 * dt
+            self._throttle_target = np.where(retarget, random[3] * 60.0, self._throttle_target)
+            noise = self._rng.standard_normal((2, self.ecus))
+            throttle = values[:, THROTTLE_POSITION]
+            throttle = throttle + (self._throttle_target - throttle) * _approach(dt, 2.0)
+            throttle += noise[0] * 3.0 * np.sqrt(dt)
+            throttle = np.clip(throttle, 0.0, 100.0) * running
+
+            engine_speed = values[:, ENGINE_SPEED]
+            engine_speed += (running * (800.0 + 45.0 * throttle) - engine_speed) * _approach(dt, 0.5)
+            vehicle_speed = values[:, VEHICLE_SPEED]
+            vehicle_speed += (running * 1.6 * throttle - vehicle_speed) * _approach(dt, 8.0)
+            coolant = values[:, COOLANT_TEMPERATURE]
+            coolant += (np.where(running, 90.0, self.ambient_temperature) - coolant) * _approach(dt, 120.0)
+            values[:, INTAKE_AIR_TEMPERATURE] = self.ambient_temperature + 0.002 * engine_speed
+            values[:, BATTERY_VOLTAGE] = np.where(running, 14.2, 12.6) + noise[1] * 0.05
+            values[:, THROTTLE_POSITION] = throttle
+            values[:, ENGINE_RUNNING] = running
+            values[:, ENGINE_RUN_TIME] = np.where(started, 0.0, values[:, ENGINE_RUN_TIME] + dt * running)
+            values[:, SHIFTER_POSITION] = np.where(running & ((vehicle_speed > 0.5) | (throttle > 5.0)), 3.0, 0.0)
+            values[:, BRAKE_SWITCH] = throttle < 2.0
+
+            np.clip(values, _MINIMUM, _MAXIMUM, out=values)
+            np.copyto(values, self.override_values, where=self.overridden)
+            self.time += dt
+
+    def sync(self) -> None:
+        """Advances a realtime model to the wall clock (in at most 100 steps)."""
+        if not self.realtime:
+            return
+        now = monotonic()
+        elapsed = now - self._last_sync
+        if elapsed < self.dt:
+            return
+        steps = min(int(elapsed / self.dt), 100)
+        self.step(elapsed / steps, steps)
+        self._last_sync = now
+
+    def set(self, name: str, value: float, ecus: Union[np.ndarray, slice, int] = slice(None)) -> None:
+        """Sets a signal of some ECUs (all by default)."""
+        self.values[ecus, COLUMNS[name]] = value
+
+    def override(self, ecu: int, name: str, value: float) -> None:
+        """Pins a signal of one ECU to a value (clipped to its range) until ``release``."""
+        column = COLUMNS[name]
+        value = min(max(value, _MINIMUM[column]), _MAXIMUM[column])
+        self.overridden[ecu, column] = True
+        self.override_values[ecu, column] = value
+        self.values[ecu, column] = value
+
+    def release(self, ecu: int, name: str) -> None:
+        """Gives a signal back to the model."""
+        self.overridden[ecu, COLUMNS[name]] = False
+
+    def view(self, ecu: int = 0) -> 'SignalView':
+        """Returns the signals of one ECU."""
+        return SignalView(self, ecu)
+
+    def bind(self, servers: Iterable['UdsServer']) -> None:
+        """Connects servers to the model, one ECU row each, in order."""
+        for ecu, server in enumerate(servers):
+            server.signals = self.view(ecu)
+
+
+class SignalView:
+    """The signals of one ECU of a ``SignalModel``.
+
+    Attributes:
+        model (SignalModel): The model.
+        ecu (int): The row of the ECU.
+    """
+    def __init__(self, model: SignalModel, ecu: int) -> None:
+        self.model = model
+        self.ecu = ecu
+
+    def value(self, name: str) -> float:
+        """Returns the physical value of a signal."""
+        self.model.sync()
+        return float(self.model.values[self.ecu, COLUMNS[name]])
+
+    def row(self) -> np.ndarray:
+        """Returns the values of all signals (a view, in ``SIGNALS`` order)."""
+        self.model.sync()
+        return self.model.values[self.ecu]
+
+
+class Preconditions:
+    """Environmental preconditions of requests, checked against the signals.
+
+    Definition files are JSON documents with a ``preconditions`` list. Each
+    entry has a ``request`` prefix (the SID and, optionally, the following
+    bytes such as a sub-function or routine identifier) and ``conditions``,
+    each a ``signal`` with an optional ``min`` and ``max``. A request is
+    checked against every entry whose prefix it starts with. A value below
+    ``min`` reports the signal's ``nrc_low`` (e.g. voltageTooLow), a value
+    above ``max`` its ``nrc_high`` (e.g. vehicleSpeedTooHigh), and
+    conditionsNotCorrect if the signal has no such NRC.
+
+    The conditions of an entry are compiled into column and limit arrays, so
+    a check is a few array comparisons.
+
+    Attributes:
+        rules (dict[tuple, tuple[np.ndarray, np.ndarray, np.ndarray]]): The
+            ``(columns, minimums, maximums)`` of every request prefix.
+        longest_prefix (int): The length of the longest request prefix.
+    """
+    def __init__(self) -> None:
+        self.rules: dict[tuple, tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        self.longest_prefix = 0
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_PRECONDITIONS) -> 'Preconditions':
+        """Loads preconditions from a JSON definition file."""
+        with open(path, encoding="utf-8") as file:
+            return cls.from_dict(json.load(file))
+
+    @classmethod
+    def from_dict(cls, document: dict) -> 'Preconditions':
+        """Compiles preconditions from a definition document."""
+        preconditions = cls()
+        for entry in document["preconditions"]:
+            preconditions.add(entry)
+        return preconditions
+
+    def add(self, entry: dict) -> None:
+        """Adds (or replaces) the conditions of one request prefix."""
+        prefix = tuple(parse_number(byte) for byte in entry["request"])
+        conditions = entry["conditions"]
+        self.rules[prefix] = (
+            np.array([COLUMNS[condition["signal"]] for condition in conditions], dtype=np.intp),
+            np.array([condition.get("min", -np.inf) for condition in conditions]),
+            np.array([condition.get("max", np.inf) for condition in conditions]),
+        )
+        self.longest_prefix = max(self.longest_prefix, len(prefix))
+
+    def check(self, data_stream: list, signals: SignalView) -> Union[int, None]:
+        """Returns the NRC of the first violated precondition, or None."""
+        row = None
+        for length in range(1, min(self.longest_prefix, len(data_stream)) + 1):
+            rule = self.rules.get(tuple(data_stream[:length]))
+            if rule is None:
+                continue
+            if row is None:
+                row = signals.row()
+            columns, minimums, maximums = rule
+            values = row[columns]
+            violated = np.flatnonzero((values < minimums) | (values > maximums))
+            if len(violated):
+                index = violated[0]
+                signal = SIGNALS[columns[index]]
+                nrc = signal.nrc_low if values[index] < minimums[index] else signal.nrc_high
+                return _NRC.CONDITIONS_NOT_CORRECT if nrc is None else nrc
+        return None
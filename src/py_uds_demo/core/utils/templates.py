@@ -0,0 +1,153 @@
+import re
+from typing import Iterable, Sequence, Union
+
+import numpy as np
+
+
+_SLOT = re.compile(r"\{(\w+)(?::(\d+))?\}")
+
+
+class RequestTemplate:
+    """A request compiled once, with optional parameter slots.
+
+    The pattern is a space separated list of hex bytes and slots. A slot is
+    ``{name}`` (one byte) or ``{name:width}`` (a big-endian value of ``width``
+    bytes), e.g. ``"22 {did:2}"`` or ``"23 44 {address:4} {size:4}"``.
+
+    ``build`` fills the slots of one request; ``build_many`` fills whole
+    arrays of slot values at once and returns one request per row.
+
+    Attributes:
+        pattern (str): The source pattern.
+        template (bytes): The request with zeroed slots.
+        slots (dict[str, tuple[int, int]]): Per slot, ``(offset, width)``.
+    """
+    def __init__(self, pattern: str) -> None:
+        self.pattern = pattern
+        template = bytearray()
+        self.slots: dict[str, tuple[int, int]] = {}
+        for token in pattern.split():
+            slot = _SLOT.fullmatch(token)
+            if slot is None:
+                template.append(int(token, 16))
+                continue
+            name, width = slot.group(1), int(slot.group(2) or 1)
+            if name in self.slots:
+                raise ValueError(f"slot {name} appears twice in {pattern!r}")
+            self.slots[name] = (len(template), width)
+            template += bytes(width)
+        self.template = bytes(template)
+
+    def __len__(self) -> int:
+        return len(self.template)
+
+    def build(self, **values: int) -> bytes:
+        """Returns the request with the given slot values.
+
+        Raises:
+            ValueError: If a slot value is missing or unknown.
+        """
+        if values.keys() != self.slots.keys():
+            raise ValueError(f"expected the slots {sorted(self.slots)}, got {sorted(values)}")
+        if not values:
+            return self.template
+        request = bytearray(self.template)
+        for name, (offset, width) in self.slots.items():
+            request[offset:offset + width] = values[name].to_bytes(width, "big")
+        return bytes(request)
+
+    def build_many(self, **values: Union[Sequence[int], np.ndarray]) -> np.ndarray:
+        """Builds one request per row of slot values.
+
+        Returns:
+            A ``(rows, len(self))`` uint8 array.
+        """
+        if values.keys() != self.slots.keys():
+            raise ValueError(f"expected the slots {sorted(self.slots)}, got {sorted(values)}")
+        rows = len(next(iter(values.values()))) if values else 1
+        requests = np.tile(np.frombuffer(self.template, dtype=np.uint8), (rows, 1))
+        for name, (offset, width) in self.slots.items():
+            column = np.asarray(values[name], dtype=np.uint64)
+            shifts = np.arange(8 * (width - 1), -1, -8, dtype=np.uint64)
+            requests[:, offset:offset + width] = (column[:, None] >> shifts & np.uint64(0xFF)).astype(np.uint8)
+        return requests
+
+
+class ResponseMatcher:
+    """An expected response compiled into a byte mask.
+
+    The pattern is a space separated list of bytes: ``"62"`` must match,
+    ``"??"`` matches any byte, ``"6?"`` or ``"?2"`` match one nibble, and a
+    final ``"*"`` accepts any number of further bytes. Without ``"*"`` the
+    response must have exactly the pattern length.
+
+    ``match_many`` checks any number of responses with array operations.
+
+    Attributes:
+        pattern (str): The source pattern.
+        expected (np.ndarray): The expected bytes (0 where masked out).
+        mask (np.ndarray): The bits that have to match.
+        open_ended (bool): True if longer responses are accepted.
+    """
+    def __init__(self, pattern: str) -> None:
+        self.pattern = pattern
+        tokens = pattern.split()
+        self.open_ended = bool(tokens) and tokens[-1] == "*"
+        if self.open_ended:
+            tokens = tokens[:-1]
+        expected, mask = [], []
+        for token in tokens:
+            if len(token) != 2:
+                raise ValueError(f"invalid byte pattern {token!r} in {pattern!r}")
+            high, low = token
+            expected.append((0 if high == "?" else int(high, 16)) << 4 | (0 if low == "?" else int(low, 16)))
+            mask.append((0x00 if high == "?" else 0xF0) | (0x00 if low == "?" else 0x0F))
+        self.expected = np.array(expected, dtype=np.uint8)
+        self.mask = np.array(mask, dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.expected)
+
+    def matches(self, response: Sequence[int]) -> bool:
+        """Returns True if one response matches."""
+        length = len(self.expected)
+        if len(response) < length or (not self.open_ended and len(response) != length):
+            return False
+        return all(byte & mask == expected for byte, mask, expected in zip(response, self.mask, self.expected))
+
+    def match_many(self, responses: Iterable[Sequence[int]]) -> np.ndarray:
+        """Checks many responses at once.
+
+        Returns:
+            One boolean per response.
+        """
+        responses = list(responses)
+        length = len(self.expected)
+        lengths = np.fromiter(map(len, responses), dtype=np.intp, count=len(responses))
+        table = np.zeros((len(responses), length), dtype=np.uint8)
+        for row, response in enumerate(responses):
+            table[row, :min(length, len(response))] = response[:length]
+        length_ok = lengths >= length if self.open_ended else lengths == length
+        return length_ok & ((table & self.mask) == self.expected).all(axis=1)
+
+
+def evaluate(responses: Sequence[Sequence[int]], matchers: Sequence[ResponseMatcher]) -> np.ndarray:
+    """Checks every response against its matcher.
+
+    The steps sharing a matcher are checked together with ``match_many``,
+    so a long sequence costs one array operation per distinct matcher.
+
+    Args:
+        responses: The responses.
+        matchers: One matcher per response.
+
+    Returns:
+        One boolean per response.
+    """
+    passed = np.zeros(len(responses), dtype=np.bool_)
+    groups: dict[int, list[int]] = {}
+    for index, matcher in enumerate(matchers):
+        groups.setdefault(id(matcher), []).append(index)
+    for indexes in groups.values():
+        passed[indexes] = matchers[indexes[0]].match_many(responses[index] for index in indexes)
+    return passed
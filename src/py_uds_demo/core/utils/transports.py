@@ -0,0 +1,376 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Union
+
+if TYPE_CHECKING:
+    from py_uds_demo.core.server import UdsServer
+
+
+class TransportError(ConnectionError):
+    """Raised when a transport cannot deliver or receive a message."""
+
+
+class Transport(ABC):
+    """Moves whole UDS messages between a tester and one ECU.
+
+    A transport carries one request/response exchange at a time; the client
+    serializes the requests of an ECU. Subclasses implement ``send`` and
+    ``receive`` for one physical or network layer.
+    """
+    @abstractmethod
+    async def send(self, payload: bytes) -> None:
+        """Sends one message."""
+
+    @abstractmethod
+    async def receive(self) -> bytes:
+        """Waits for the next message from the peer."""
+
+    async def close(self) -> None:
+        """Releases the transport."""
+
+
+class InProcessTransport(Transport):
+    """Talks to a ``UdsServer`` of the same process.
+
+    The request is processed when it is sent; a non-empty response is queued
+    for ``receive`` (a suppressed positive response produces nothing).
+
+    Attributes:
+        server (UdsServer): The ECU.
+    """
+    def __init__(self, server: 'UdsServer') -> None:
+        self.server = server
+        self._responses: asyncio.Queue = asyncio.Queue()
+
+    async def send(self, payload: bytes) -> None:
+        response = self.server.process_request(list(payload))
+        if response:
+            self._responses.put_nowait(bytes(response))
+
+    async def receive(self) -> bytes:
+        return await self._responses.get()
+
+
+class StreamTransport(Transport):
+    """Base of the transports running over an asyncio stream pair.
+
+    Attributes:
+        reader (asyncio.StreamReader): The incoming stream.
+        writer (asyncio.StreamWriter): The outgoing stream.
+    """
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+
+    async def close(self) -> None:
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+class SocketTransport(StreamTransport):
+    """Sends UDS messages over TCP, each prefixed with its 4-byte length."""
+    @classmethod
+    async def connect(cls, host: str, port: int) -> 'SocketTransport':
+        """Opens a connection to a ``serve_socket`` server."""
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def send(self, payload: bytes) -> None:
+        self.writer.write(len(payload).to_bytes(4, "big") + payload)
+        await self.writer.drain()
+
+    async def receive(self) -> bytes:
+        try:
+            length = int.from_bytes(await self.reader.readexactly(4), "big")
+            return await self.reader.readexactly(length)
+        except asyncio.IncompleteReadError as error:
+            raise TransportError("connection closed by the peer") from error
+
+
+# DoIP (ISO 13400-2) payload types
+DOIP_VERSION = 0x02
+ROUTING_ACTIVATION_REQUEST = 0x0005
+ROUTING_ACTIVATION_RESPONSE = 0x0006
+ALIVE_CHECK_REQUEST = 0x0007
+ALIVE_CHECK_RESPONSE = 0x0008
+DIAGNOSTIC_MESSAGE = 0x8001
+DIAGNOSTIC_MESSAGE_ACK = 0x8002
+DIAGNOSTIC_MESSAGE_NACK = 0x8003
+ROUTING_SUCCESSFULLY_ACTIVATED = 0x10
+
+
+class DoIPTransport(StreamTransport):
+    """Sends UDS messages as DoIP diagnostic messages over TCP.
+
+    ``connect`` activates routing for the tester address. Diagnostic message
+    acknowledgements are consumed while waiting for the response, a negative
+    acknowledgement raises ``TransportError`` and alive checks are answered.
+
+    Attributes:
+        source_address (int): The logical address of the tester.
+        target_address (int): The logical address of the ECU.
+    """
+    def __init__(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+        source_address: int = 0x0E00, target_address: int = 0x0001,
+    ) -> None:
+        super().__init__(reader, writer)
+        self.source_address = source_address
+        self.target_address = target_address
+
+    @classmethod
+    async def connect(
+        cls, host: str, port: int = 13400, source_address: int = 0x0E00, target_address: int = 0x0001,
+        activation_type: int = 0x00,
+    ) -> 'DoIPTransport':
+        """Opens a connection to a DoIP entity and activates routing.
+
+        Raises:
+            TransportError: If the routing activation is refused.
+        """
+        transport = cls(*await asyncio.open_connection(host, port), source_address, target_address)
+        request = source_address.to_bytes(2, "big") + bytes([activation_type]) + bytes(4)
+        await write_doip_message(transport.writer, ROUTING_ACTIVATION_REQUEST, request)
+        payload_type, payload = await read_doip_message(transport.reader)
+        if payload_type != ROUTING_ACTIVATION_RESPONSE or payload[4] != ROUTING_SUCCESSFULLY_ACTIVATED:
+            await transport.close()
+            raise TransportError("DoIP routing activation refused")
+        return transport
+
+    async def send(self, payload: bytes) -> None:
+        addresses = self.source_address.to_bytes(2, "big") + self.target_address.to_bytes(2, "big")
+        await write_doip_message(self.writer, DIAGNOSTIC_MESSAGE, addresses + payload)
+
+    async def receive(self) -> bytes:
+        while True:
+            payload_type, payload = await read_doip_message(self.reader)
+            if payload_type == DIAGNOSTIC_MESSAGE:
+                return payload[4:]
+            if payload_type == DIAGNOSTIC_MESSAGE_NACK:
+                raise TransportError(f"DoIP diagnostic message refused with code 0x{payload[4]:02X}")
+            if payload_type == ALIVE_CHECK_REQUEST:
+                await write_doip_message(self.writer, ALIVE_CHECK_RESPONSE, self.source_address.to_bytes(2, "big"))
+
+
+async def write_doip_message(writer: asyncio.StreamWriter, payload_type: int, payload: bytes) -> None:
+    """Writes one DoIP message (generic header and payload)."""
+    header = bytes([DOIP_VERSION, DOIP_VERSION ^ 0xFF]) + payload_type.to_bytes(2, "big")
+    writer.write(header + len(payload).to_bytes(4, "big") + payload)
+    await writer.drain()
+
+
+async def read_doip_message(reader: asyncio.StreamReader) -> tuple[int, bytes]:
+    """Reads one DoIP message and returns its payload type and payload.
+
+    Raises:
+        TransportError: If the connection closes or the header is invalid.
+    """
+    try:
+        header = await reader.readexactly(8)
+        if header[0] != header[1] ^ 0xFF:
+            raise TransportError("invalid DoIP header")
+        payload = await reader.readexactly(int.from_bytes(header[4:8], "big"))
+    except asyncio.IncompleteReadError as error:
+        raise TransportError("connection closed by the peer") from error
+    return int.from_bytes(header[2:4], "big"), payload
+
+
+class VirtualCanBus:
+    """One node of an in-memory CAN bus, for ISO-TP without hardware.
+
+    Every frame a node sends is delivered to all other nodes of the bus.
+    A hardware bus only needs the same ``send``/``receive`` coroutines.
+    """
+    def __init__(self, nodes: Union[list['VirtualCanBus'], None] = None) -> None:
+        self._nodes = [] if nodes is None else nodes
+        self._nodes.append(self)
+        self._frames: asyncio.Queue = asyncio.Queue()
+
+    def node(self) -> 'VirtualCanBus':
+        """Connects another node to the bus."""
+        return VirtualCanBus(self._nodes)
+
+    async def send(self, arbitration_id: int, data: bytes) -> None:
+        """Sends one frame."""
+        for node in self._nodes:
+            if node is not self:
+                node._frames.put_nowait((arbitration_id, data))
+
+    async def receive(self) -> tuple[int, bytes]:
+        """Waits for the next frame: ``(arbitration id, data)``."""
+        return await self._frames.get()
+
+
+# ISO-TP (ISO 15765-2) protocol control information
+SINGLE_FRAME = 0x0
+FIRST_FRAME = 0x1
+CONSECUTIVE_FRAME = 0x2
+FLOW_CONTROL = 0x3
+CONTINUE_TO_SEND = 0x0
+WAIT = 0x1
+OVERFLOW = 0x2
+
+
+def _separation_time(st_min: int) -> float:
+    """Converts an STmin byte into seconds (reserved values mean the 127 ms maximum)."""
+    if st_min <= 0x7F:
+        return st_min / 1000
+    if 0xF1 <= st_min <= 0xF9:
+        return (st_min - 0xF0) / 10000
+    return 0.127
+
+
+class IsoTpTransport(Transport):
+    """Segments UDS messages into classic CAN frames (ISO 15765-2).
+
+    Messages of up to 7 bytes are sent as single frames, longer ones (up to
+    4095 bytes) as a first frame and consecutive frames paced by the flow
+    control of the receiver. Frames of other arbitration ids are ignored.
+
+    Attributes:
+        bus: The CAN node, with ``send(arbitration_id, data)`` and
+            ``receive()`` coroutines.
+        tx_id (int): The arbitration id of the frames sent.
+        rx_id (int): The arbitration id of the frames received.
+        block_size (int): The block size announced in flow control frames.
+        st_min (int): The separation time announced in flow control frames.
+        timeout (float): The N_Bs/N_Cr timeout in seconds.
+        padding (int): The value filling frames up to 8 bytes.
+    """
+    def __init__(
+        self, bus, tx_id: int = 0x7E0, rx_id: int = 0x7E8, block_size: int = 0, st_min: int = 0,
+        timeout: float = 1.0, padding: int = 0xCC,
+    ) -> None:
+        self.bus = bus
+        self.tx_id = tx_id
+        self.rx_id = rx_id
+        self.block_size = block_size
+        self.st_min = st_min
+        self.timeout = timeout
+        self.padding = padding
+
+    async def _send_frame(self, data: bytes) -> None:
+        await self.bus.send(self.tx_id, data.ljust(8, bytes([self.padding])))
+
+    async def _receive_frame(self, timeout: Union[float, None] = None) -> bytes:
+        while True:
+            try:
+                arbitration_id, data = await asyncio.wait_for(self.bus.receive(), timeout)
+            except asyncio.TimeoutError as error:
+                raise TransportError("ISO-TP timeout") from error
+            if arbitration_id == self.rx_id:
+                return data
+
+    async def _wait_flow_control(self) -> tuple[int, float]:
+        """Waits for a clear-to-send flow control: ``(block size, separation seconds)``."""
+        while True:
+            frame = await self._receive_frame(self.timeout)
+            if frame[0] >> 4 != FLOW_CONTROL:
+                continue
+            status = frame[0] & 0x0F
+            if status == OVERFLOW:
+                raise TransportError("ISO-TP receiver overflow")
+            if status == CONTINUE_TO_SEND:
+                return frame[1], _separation_time(frame[2])
+
+    async def send(self, payload: bytes) -> None:
+        if len(payload) <= 7:
+            await self._send_frame(bytes([SINGLE_FRAME << 4 | len(payload)]) + payload)
+            return
+        if len(payload) > 0xFFF:
+            raise TransportError("ISO-TP messages are limited to 4095 bytes")
+        await self._send_frame(bytes([FIRST_FRAME << 4 | len(payload) >> 8, len(payload) & 0xFF]) + payload[:6])
+        block_size, separation = await self._wait_flow_control()
+        sent_in_block = 0
+        for sequence, start in enumerate(range(6, len(payload), 7), start=1):
+            if block_size and sent_in_block == block_size:
+                block_size, separation = await self._wait_flow_control()
+                sent_in_block = 0
+            elif separation and sequence > 1:
+                await asyncio.sleep(separation)
+            await self._send_frame(bytes([CONSECUTIVE_FRAME << 4 | sequence & 0x0F]) + payload[start:start + 7])
+            sent_in_block += 1
+
+    async def _send_flow_control(self) -> None:
+        await self._send_frame(bytes([FLOW_CONTROL << 4 | CONTINUE_TO_SEND, self.block_size, self.st_min]))
+
+    async def receive(self) -> bytes:
+        while True:
+            frame = await self._receive_frame()
+            kind = frame[0] >> 4
+            if kind == SINGLE_FRAME:
+                return frame[1:1 + (frame[0] & 0x0F)]
+            if kind == FIRST_FRAME:
+                break
+        length = (frame[0] & 0x0F) << 8 | frame[1]
+        data = bytearray(frame[2:8])
+        await self._send_flow_control()
+        sequence = 1
+        received_in_block = 0
+        while len(data) < length:
+            frame = await self._receive_frame(self.timeout)
+            if frame[0] >> 4 != CONSECUTIVE_FRAME:
+                continue
+            if frame[0] & 0x0F != sequence & 0x0F:
+                raise TransportError("ISO-TP wrong sequence number")
+            data += frame[1:8]
+            sequence += 1
+            received_in_block += 1
+            if self.block_size and received_in_block == self.block_size and len(data) < length:
+                await self._send_flow_control()
+                received_in_block = 0
+        return bytes(data[:length])
+
+
+async def serve(uds_server: 'UdsServer', transport: Transport) -> None:
+    """Answers the requests arriving on a transport until it fails or closes.
+
+    This is the ECU side of the socket and ISO-TP transports.
+    """
+    try:
+        while True:
+            request = await transport.receive()
+            response = uds_server.process_request(list(request))
+            if response:
+                await transport.send(bytes(response))
+    except (TransportError, ConnectionError):
+        pass
+    finally:
+        await transport.close()
+
+
+async def serve_socket(uds_server: 'UdsServer', host: str = "127.0.0.1", port: int = 0) -> asyncio.Server:
+    """Starts a TCP server answering ``SocketTransport`` clients."""
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        await serve(uds_server, SocketTransport(reader, writer))
+    return await asyncio.start_server(handle, host, port)
+
+
+async def serve_doip(
+    uds_server: 'UdsServer', host: str = "127.0.0.1", port: int = 13400, logical_address: int = 0x0001
+) -> asyncio.Server:
+    """Starts a DoIP entity answering the diagnostic messages sent to ``logical_address``."""
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        own_address = logical_address.to_bytes(2, "big")
+        try:
+            while True:
+                payload_type, payload = await read_doip_message(reader)
+                if payload_type == ROUTING_ACTIVATION_REQUEST:
+                    response = payload[:2] + own_address + bytes([ROUTING_SUCCESSFULLY_ACTIVATED]) + bytes(4)
+                    await write_doip_message(writer, ROUTING_ACTIVATION_RESPONSE, response)
+                elif payload_type == DIAGNOSTIC_MESSAGE:
+                    tester, target = payload[:2], payload[2:4]
+                    if target != own_address:
+                        await write_doip_message(writer, DIAGNOSTIC_MESSAGE_NACK, target + tester + b"\x03")
+                        continue
+                    await write_doip_message(writer, DIAGNOSTIC_MESSAGE_ACK, target + tester + b"\x00")
+                    response = uds_server.process_request(list(payload[4:]))
+                    if response:
+                        await write_doip_message(writer, DIAGNOSTIC_MESSAGE, target + tester + bytes(response))
+        except (TransportError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+    return await asyncio.start_server(handle, host, port)
@@ -1,6 +1,9 @@
+import json
+
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
 from py_uds_demo.core.client import UdsClient
 
@@ -28,3 +31,20 @@ async def get_help(sid: int):
         return {"docstring": service.__doc__}
     else:
         raise HTTPException(status_code=404, detail=f"No help found for SID 0x{sid:02X}")
+
+@app.get("/periodic_stream")
+async def periodic_stream(limit: Optional[int] = None):
+    """
+    Streams periodic data frames (service 0x2A) as newline-delimited JSON.
+
+    The stream ends after ``limit`` frames, or runs until the client
+    disconnects if no limit is given.
+    """
+    async def frames():
+        count = 0
+        async for frame in client.server.read_data_by_periodic_identifier.channel.frames():
+            yield json.dumps({"frame": frame}) + "\n"
+            count += 1
+            if count == limit:
+                break
+    return StreamingResponse(frames(), media_type="application/x-ndjson")
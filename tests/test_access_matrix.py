@@ -0,0 +1,29 @@
+from py_uds_demo.core.server import UdsServer
+from py_uds_demo.core.utils.access_matrix import AccessMatrix
+from py_uds_demo.core.utils.helpers import Nrc, Sfid, Sid
+
+
+def test_default_matrix_session_gating_and_suppress_bit():
+    server = UdsServer()
+    assert server.process_request([Sid().SA, Sfid().REQUEST_SEED]) == [0x7F, Sid().SA, Nrc().SNSIAS]
+    assert server.process_request([Sid().DSC, 0x80 | Sfid().EXTENDED_SESSION]) == []
+    assert server.diagnostic_session_control.active_session == Sfid().EXTENDED_SESSION
+    assert server.process_request([Sid().TP, 0x80]) == []
+    assert server.process_request([Sid().DSC, 0x80 | 0x7F]) == [0x7F, Sid().DSC, Nrc().SUB_FUNCTION_NOT_SUPPORTED]
+
+
+def test_custom_matrix_subfunction_and_security_rules():
+    server = UdsServer()
+    server.access_matrix = AccessMatrix.from_dict({"services": [
+        {"sid": "0x10", "subfunction": True, "subfunctions": [{"subfunction": "0x02", "sessions": ["0x03"]}]},
+        {"sid": "0x27", "subfunction": True, "sessions": ["0x03"]},
+        {"sid": "0x2E", "security_levels": [1]},
+    ]})
+    assert server.process_request([Sid().DSC, Sfid().PROGRAMMING_SESSION]) == [0x7F, Sid().DSC, Nrc().SFNSIAS]
+    assert server.process_request([Sid().WDBI, 0xF1, 0x98, 0x01]) == [0x7F, Sid().WDBI, Nrc().SAD]
+    server.process_request([Sid().DSC, Sfid().EXTENDED_SESSION])
+    seed = server.process_request([Sid().SA, Sfid().REQUEST_SEED])[2:]
+    key = int.from_bytes(bytes(seed), "big") | 0x11223344
+    assert server.process_request([Sid().SA, Sfid().SEND_KEY, *key.to_bytes(4, "big")]) == [Sid().SA + 0x40, 0x02]
+    assert server.process_request([Sid().WDBI, 0xF1, 0x98, 0x01]) == [Sid().WDBI + 0x40, 0xF1, 0x98]
+    assert server.process_request([Sid().DSC, Sfid().PROGRAMMING_SESSION])[0] == Sid().DSC + 0x40
@@ -1,3 +1,4 @@
+import json
 import pytest
 from fastapi.testclient import TestClient
 from src.py_uds_demo.interface.api import app
@@ -18,3 +19,13 @@ def test_get_help_not_found():
     response = client.get("/help/99")
     assert response.status_code == 404
     assert response.json()["detail"] == "No help found for SID 0x63"
+
+def test_periodic_stream():
+    client.post("/send_request", json={"data": [0x2C, 0x01, 0xF2, 0x01, 0xF1, 0x90, 0x01, 0x02]})
+    assert client.post("/send_request", json={"data": [0x2A, 0x03, 0x01]}).json()["response"] == [0x6A]
+    try:
+        response = client.get("/periodic_stream", params={"limit": 2})
+    finally:
+        client.post("/send_request", json={"data": [0x2A, 0x04]})
+    assert response.status_code == 200
+    assert [json.loads(line) for line in response.text.splitlines()] == [{"frame": [0x01, 0x90, 0x78]}] * 2
@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from py_uds_demo.core.async_client import AsyncUdsClient, UdsTimeoutError, request_all
+from py_uds_demo.core.server import UdsServer
+from py_uds_demo.core.utils.transports import (
+    DoIPTransport, InProcessTransport, IsoTpTransport, SocketTransport, Transport, VirtualCanBus, serve,
+    serve_doip, serve_socket,
+)
+
+
+class ScriptedTransport(Transport):
+    """Answers every request with the next scripted list of messages."""
+    def __init__(self, script):
+        self.script = list(script)
+        self.sent = []
+        self.queue = asyncio.Queue()
+
+    async def send(self, payload):
+        self.sent.append(list(payload))
+        for message in self.script.pop(0) if self.script else []:
+            self.queue.put_nowait(bytes(message))
+
+    async def receive(self):
+        return await self.queue.get()
+
+
+def test_in_process_session_timing_and_keep_alive():
+    async def scenario():
+        server = UdsServer()
+        async with AsyncUdsClient(InProcessTransport(server), keep_alive_interval=0.01) as client:
+            assert (await client.request([0x10, 0x03]))[:2] == [0x50, 0x03]
+            assert client.p2 == 0.05 and client.keeping_alive
+            await asyncio.sleep(0.05)
+            assert (await client.request([0x22, 0xF4, 0x0D]))[:3] == [0x62, 0xF4, 0x0D]
+            await client.request([0x10, 0x01])
+            assert not client.keeping_alive
+    asyncio.run(scenario())
+
+
+def test_response_pending_extends_the_timeout():
+    async def scenario():
+        transport = ScriptedTransport([[[0x7F, 0x31, 0x78], [0x7F, 0x31, 0x78], [0x71, 0x01, 0x02, 0x00]]])
+        client = AsyncUdsClient(transport, p2=0.01, latency=0.0)
+        assert await client.request([0x31, 0x01, 0x02, 0x00]) == [0x71, 0x01, 0x02, 0x00]
+    asyncio.run(scenario())
+
+
+def test_timeouts_are_retried_then_raised():
+    async def scenario():
+        transport = ScriptedTransport([[], [[0x62, 0xF1, 0x90, 0x01]]])
+        client = AsyncUdsClient(transport, p2=0.01, latency=0.0, retries=1)
+        assert await client.request([0x22, 0xF1, 0x90]) == [0x62, 0xF1, 0x90, 0x01]
+        assert len(transport.sent) == 2
+        with pytest.raises(UdsTimeoutError):
+            await client.request([0x22, 0xF1, 0x90])
+        assert await client.request([0x3E, 0x80]) == []
+    asyncio.run(scenario())
+
+
+def test_socket_and_doip_transports():
+    async def scenario():
+        server = UdsServer()
+        tcp = await serve_socket(server)
+        doip = await serve_doip(server, port=0)
+        async with tcp, doip:
+            socket_client = AsyncUdsClient(await SocketTransport.connect(*tcp.sockets[0].getsockname()[:2]))
+            doip_client = AsyncUdsClient(await DoIPTransport.connect(*doip.sockets[0].getsockname()[:2]))
+            responses = await request_all([socket_client, doip_client], [0x22, 0xF1, 0x8C])
+            assert responses[0] == responses[1] == server.process_request([0x22, 0xF1, 0x8C])
+            await socket_client.close()
+            await doip_client.close()
+    asyncio.run(scenario())
+
+
+def test_iso_tp_segments_long_messages():
+    async def scenario():
+        tester_bus = VirtualCanBus()
+        tester = IsoTpTransport(tester_bus, 0x7E0, 0x7E8, block_size=2)
+        ecu = IsoTpTransport(tester_bus.node(), 0x7E8, 0x7E0, block_size=3)
+        payload = bytes(range(100))
+        await asyncio.gather(tester.send(payload), ecu_receive := asyncio.ensure_future(ecu.receive()))
+        assert ecu_receive.result() == payload
+        server_task = asyncio.ensure_future(serve(UdsServer(), ecu))
+        client = AsyncUdsClient(tester)
+        assert (await client.request([0x22, 0xF1, 0x89]))[:3] == [0x62, 0xF1, 0x89]
+        server_task.cancel()
+    asyncio.run(scenario())
+
+
+def test_request_all_runs_many_ecus_concurrently():
+    async def scenario():
+        clients = [AsyncUdsClient(InProcessTransport(UdsServer())) for _ in range(20)]
+        responses = await request_all(clients, [0x10, 0x03])
+        assert all(response[:2] == [0x50, 0x03] for response in responses)
+        for client in clients:
+            await client.close()
+    asyncio.run(scenario())
+
+
+def test_transport_subclass_must_implement_send_and_receive():
+    class SendOnly(Transport):
+        async def send(self, payload):
+            pass
+
+    with pytest.raises(TypeError):
+        SendOnly()
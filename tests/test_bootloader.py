@@ -0,0 +1,86 @@
+import time
+import zlib
+from py_uds_demo.core.client import UdsClient
+from py_uds_demo.core.utils.bootloader import ROLLED_BACK, SWAPPED
+from py_uds_demo.core.utils.helpers import Nrc, Sfid, Sid
+
+
+BANK_ADDRESS = [0x00, 0x08, 0x00, 0x00]
+IMAGE = bytes(range(256)) * 24
+
+
+def _wait_routine(client, routine_id):
+    while True:
+        response = client.send_request([Sid().RC, Sfid().RRR, *routine_id], False)
+        if response[4] != 0x01:
+            return response
+        time.sleep(0.01)
+
+
+def _program(client, image, verify=True):
+    assert client.send_request([Sid().DSC, Sfid().PROGRAMMING_SESSION], False)[0] == Sid().DSC + 0x40
+    assert client.unlock() == [True]
+    size = list(len(image).to_bytes(2, "big"))
+    client.send_request([Sid().RC, Sfid().STR, 0xFF, 0x00, 0x24, *BANK_ADDRESS, *size], False)
+    assert _wait_routine(client, [0xFF, 0x00])[4] == 0x00
+    response = client.send_request([Sid().RD, 0x00, 0x24, *BANK_ADDRESS, *size], False)
+    assert response[:2] == [Sid().RD + 0x40, 0x20]
+    block_length = int.from_bytes(bytes(response[2:4]), "big") - 2
+    for counter, start in enumerate(range(0, len(image), block_length), start=1):
+        block = list(image[start:start + block_length])
+        assert client.send_request([Sid().TD, counter & 0xFF, *block], False) == [Sid().TD + 0x40, counter & 0xFF]
+    assert client.send_request([Sid().RTE], False) == [Sid().RTE + 0x40]
+    if verify:
+        crc = list(zlib.crc32(image).to_bytes(4, "big"))
+        client.send_request([Sid().RC, Sfid().STR, 0x02, 0x02, 0x24, *BANK_ADDRESS, *size, *crc], False)
+        assert _wait_routine(client, [0x02, 0x02])[6] == 0x00
+
+
+def test_verified_download_swaps_banks_on_hard_reset():
+    client = UdsClient()
+    flash = client.server.memory.flash
+    old_bank = flash.banks[0]
+    _program(client, IMAGE)
+    assert client.server.bootloader.personality == "boot"
+    assert old_bank.data[:len(IMAGE)] == b"\xFF" * len(IMAGE)
+    assert client.send_request([Sid().ER, Sfid().HARD_RESET], False) == [Sid().ER + 0x40, Sfid().HARD_RESET]
+    assert client.server.bootloader.last_update == SWAPPED
+    assert client.server.bootloader.personality == "application"
+    assert flash.active_bank == 1 and flash.banks[0] is old_bank
+    assert flash.find(0x00080000, len(IMAGE)).data[:len(IMAGE)] == IMAGE
+
+
+def test_unverified_download_rolls_back():
+    client = UdsClient()
+    _program(client, IMAGE, verify=False)
+    client.send_request([Sid().ER, Sfid().HARD_RESET], False)
+    assert client.server.bootloader.last_update == ROLLED_BACK
+    assert client.server.memory.flash.active_bank == 0
+
+
+def test_transfer_data_sequence_errors():
+    client = UdsClient()
+    assert client.send_request([Sid().TD, 0x01, 0x00], False) == [0x7F, Sid().TD, Nrc().SNSIAS]
+    client.send_request([Sid().DSC, Sfid().PROGRAMMING_SESSION], False)
+    client.unlock()
+    assert client.send_request([Sid().TD, 0x01, 0x00], False) == [0x7F, Sid().TD, Nrc().RSE]
+    client.send_request([Sid().RD, 0x00, 0x14, *BANK_ADDRESS, 0x04], False)
+    assert client.send_request([Sid().RD, 0x00, 0x14, *BANK_ADDRESS, 0x04], False) == [0x7F, Sid().RD, Nrc().CNC]
+    assert client.send_request([Sid().TD, 0x02, 0x00], False) == [0x7F, Sid().TD, Nrc().WBSC]
+    assert client.send_request([Sid().TD, 0x01, 0x00, 0x01], False) == [Sid().TD + 0x40, 0x01]
+    assert client.send_request([Sid().TD, 0x01, 0x00, 0x01], False) == [Sid().TD + 0x40, 0x01]
+    assert client.send_request([Sid().RTE], False) == [0x7F, Sid().RTE, Nrc().RSE]
+    assert client.send_request([Sid().TD, 0x02, 0x02, 0x03, 0x04], False) == [0x7F, Sid().TD, Nrc().TDS]
+    assert client.send_request([Sid().TD, 0x02, 0x02, 0x03], False) == [Sid().TD + 0x40, 0x02]
+    assert client.send_request([Sid().RTE], False) == [Sid().RTE + 0x40]
+    client.send_request([Sid().RD, 0x00, 0x14, *BANK_ADDRESS, 0x04], False)
+    assert client.send_request([Sid().TD, 0x01, 0x00], False) == [0x7F, Sid().TD, Nrc().GPF]
+
+
+def test_boot_time_answers_busy_repeat_request():
+    client = UdsClient()
+    client.server.bootloader.boot_time = 0.05
+    client.send_request([Sid().ER, Sfid().SOFT_RESET], False)
+    assert client.send_request([Sid().TP, 0x00], False) == [0x7F, Sid().TP, Nrc().BRR]
+    time.sleep(0.06)
+    assert client.send_request([Sid().TP, 0x00], False) == [Sid().TP + 0x40, 0x00]
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from py_uds_demo.core.client import UdsClient
+from py_uds_demo.core.utils.decoders import DidLayout
+
+
+LAYOUT = [
+    {"name": "rpm", "type": "uint", "length": 2, "factor": 0.25},
+    {"name": "temp", "type": "int", "length": 1, "offset": -40},
+    {"name": "odometer", "type": "uint", "length": 3, "byteorder": "little"},
+    {"name": "gear", "type": "uint", "length": 1, "enum": {"0": "P", "1": "R", "2": "N", "3": "D"}},
+    {"name": "lamps", "type": "bits", "length": 1, "fields": {"low_beam": [0, 1], "indicator": [1, 2]}},
+    {"name": "code", "type": "ascii", "length": 4},
+    {"name": "date", "type": "bcd", "length": 3},
+]
+
+RECORD = bytes([0x62, 0x12, 0x34, 0x0B, 0xB8, 0x5A, 0x10, 0x27, 0x00, 0x03, 0b101, *b"AB  ", 0x25, 0x08, 0x01])
+
+
+def test_decode_single_record():
+    layout = DidLayout(LAYOUT, did=0x1234)
+    assert layout.size == len(RECORD)
+    assert layout.decode(RECORD) == {
+        "rpm": 750.0, "temp": 50, "odometer": 10000, "gear": "D",
+        "low_beam": 1, "indicator": 2, "code": "AB", "date": "250801",
+    }
+    with pytest.raises(ValueError):
+        layout.decode(RECORD[:-1])
+    with pytest.raises(ValueError):
+        layout.decode(bytes([0x62, 0x12, 0x35]) + RECORD[3:])
+
+
+def test_decode_many_matches_decode():
+    layout = DidLayout(LAYOUT, did=0x1234)
+    other = bytearray(RECORD)
+    other[3:5] = b"\x00\x04"
+    other[5] = 0xF0
+    other[9] = 0x07
+    values = layout.decode_many([RECORD, bytes(other)])
+    assert values["rpm"].tolist() == [750.0, 1.0]
+    assert values["temp"].tolist() == [50, -56]
+    assert values["odometer"].tolist() == [10000, 10000]
+    assert values["gear"].tolist() == ["D", 7]
+    assert values["indicator"].tolist() == [2, 2]
+    assert values["code"].tolist() == ["AB", "AB"]
+    assert values["date"].tolist() == ["250801", "250801"]
+    buffer = RECORD * 1000
+    assert np.all(layout.decode_many(buffer)["odometer"] == 10000)
+    with pytest.raises(ValueError):
+        layout.decode_many([RECORD, RECORD[:-1]])
+
+
+def test_odd_width_signed_integers():
+    layout = DidLayout([{"name": "value", "type": "int", "length": 3}])
+    data = (-5).to_bytes(3, "big", signed=True) + (70000).to_bytes(3, "big", signed=True)
+    assert layout.decode(data[:3]) == {"value": -5}
+    assert layout.decode_many(data)["value"].tolist() == [-5, 70000]
+
+
+def test_client_reads_dids_with_server_definitions():
+    client = UdsClient()
+    assert client.read_data_by_identifier(0xF442) == {"CONTROL_MODULE_VOLTAGE": pytest.approx(12.6)}
+    assert client.read_data_by_identifier(0xF190) == {"VEHICLE_IDENTIFICATION_NUMBER": 0x1234567890}
+    assert client.read_data_by_identifier(0x1234) is None
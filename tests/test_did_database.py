@@ -0,0 +1,74 @@
+import json
+
+from py_uds_demo.core.server import UdsServer
+from py_uds_demo.core.utils.decoders import DidLayout
+from py_uds_demo.core.utils.did_database import DidDatabase
+
+
+def test_did_database_from_json_definition(tmp_path):
+    path = tmp_path / "dids.json"
+    path.write_text(json.dumps({"dids": [
+        {"did": "0xF190", "name": "VIN", "codec": {"type": "ascii", "length": 17}, "value": "WVW123"},
+        {"did": "0xF18B", "name": "DATE", "codec": {"type": "bcd", "length": 3}, "value": "250801"},
+        {"did": "0x0101", "name": "TEMP", "codec": {"type": "int", "length": 1, "offset": -40}, "value": 20},
+        {"did": "0x0102", "name": "SESSION", "codec": {"type": "uint", "length": 1},
+         "source": "diagnostic_session_control.active_session"},
+    ]}))
+    database = DidDatabase.from_file(str(path))
+    server = UdsServer()
+    assert database.read(0xF190, server) == b"\xf1\x90WVW123" + b" " * 11
+    assert database.read(0xF18B, server) == b"\xf1\x8b\x25\x08\x01"
+    assert database.read(0x0101, server) == b"\x01\x01\x3c"
+    assert database.read(0x0102, server) == b"\x01\x02\x01"
+    assert database.read(0x0103, server) is None
+
+
+def test_enum_and_bits_codecs_serve_database_and_decoder():
+    enum_entry = {"did": "0x0201", "name": "MODE", "value": "on",
+                  "codec": {"type": "uint", "length": 1, "enum": {"0": "off", "1": "on"}}}
+    bits_entry = {"did": "0x0202", "name": "FLAGS",
+                  "codec": {"type": "bits", "length": 1, "fields": {"lamp": [0, 1], "level": [4, 3]}},
+                  "value": {"lamp": 1, "level": 5}}
+    database = DidDatabase()
+    database.add(enum_entry)
+    database.add(dict(enum_entry, did="0x0203", value=0))
+    database.add(bits_entry)
+    server = UdsServer()
+    assert database.read(0x0201, server) == b"\x02\x01\x01"
+    assert database.read(0x0203, server) == b"\x02\x03\x00"
+    assert database.read(0x0202, server) == b"\x02\x02\x51"
+    assert database.scaling_records[0x0201] == b"\x02\x01\x51"
+    assert database.scaling_records[0x0202] == b"\x02\x02\x21"
+    assert DidLayout.from_definition(enum_entry, response=False).decode(database.read(0x0201, server)[2:]) == {
+        "MODE": "on"
+    }
+    assert DidLayout.from_definition(bits_entry, response=False).decode(database.read(0x0202, server)[2:]) == {
+        "lamp": 1, "level": 5
+    }
+
+
+def test_scaling_records_are_built_from_codecs(tmp_path):
+    path = tmp_path / "dids.json"
+    path.write_text(json.dumps({"dids": [
+        {"did": "0xF190", "codec": {"type": "ascii", "length": 17}, "value": "WVW123"},
+        {"did": "0x0101", "codec": {"type": "int", "length": 1, "offset": -40}, "value": 20},
+        {"did": "0x0102", "codec": {"type": "uint"}, "value": 0x1234},
+        {"did": "0x0103", "codec": {"type": "uint"}, "source": "diagnostic_session_control.active_session"},
+    ]}))
+    database = DidDatabase.from_file(str(path))
+    assert database.scaling_records[0xF190] == b"\xf1\x90\x6f\x62"
+    # signed 1 byte, formula 0 with C0 = 1 * 10^0 and C1 = -4 * 10^1
+    assert database.scaling_records[0x0101] == b"\x01\x01\x11\x95\x00\x00\x01\x1f\xfc"
+    assert database.scaling_records[0x0102] == b"\x01\x02\x02"
+    assert 0x0103 not in database.scaling_records
+    database.remove(0xF190)
+    assert 0xF190 not in database.scaling_records
+
+
+def test_read_scaling_data_by_identifier():
+    server = UdsServer()
+    response = server.process_request([0x24, 0xF4, 0x0C])
+    assert response == [0x64, 0xF4, 0x0C, 0x02, 0x95, 0x00, 0xE0, 0x19, 0x00, 0x00]
+    assert server.process_request([0x24, 0x12, 0x34]) == [0x7F, 0x24, 0x31]
+    assert server.process_request([0x24, 0xF4]) == [0x7F, 0x24, 0x13]
+    assert server.memory.did_database.scaling_records[0xF40C] is server.memory.did_database.scaling_records[0xF40C]
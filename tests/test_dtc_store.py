@@ -0,0 +1,111 @@
+from py_uds_demo.core.server import UdsServer
+from py_uds_demo.core.utils.dtc_store import DtcStore
+from py_uds_demo.core.utils.helpers import Memory, Sfid, Sid
+
+
+def test_dtc_store_filters_by_status_mask():
+    store = DtcStore(status_availability_mask=0x7F)
+    store.add_many(range(0x100000, 0x100000 + 10000), [0x08 if i % 4 == 0 else 0x00 for i in range(10000)])
+    store.add(0x200001, 0x80)
+    assert store.count_by_status_mask(0x08) == 2500
+    assert store.count_by_status_mask(0x80) == 0
+    rows = store.rows_by_status_mask(0x08)
+    assert store.encode_rows(rows[:2]) == b"\x10\x00\x00\x08\x10\x00\x04\x08"
+    assert len(store.rows_of_group(0x100000)) == 10000
+    assert store.get_status(0x200001) == 0x80
+
+
+def test_dtc_store_reports_status_changes():
+    store = DtcStore()
+    store.add_many([0x010101, 0x010102], [0x01, 0x00])
+    changes = []
+    store.listener = lambda dtc, old, new: changes.append((dtc, old, new))
+    store.set_rows_status(store.rows_of_group(0x010000), 0x00)
+    assert changes == [(0x010101, 0x01, 0x00)]
+
+
+def test_read_dtc_information_honours_status_mask():
+    server = UdsServer()
+    server.memory.dtc_store.add(0x123456, 0x04)
+    assert server.process_request([Sid().RDTCI, Sfid().RNODTCBSM, 0x01]) == [
+        Sid().RDTCI + 0x40, Sfid().RNODTCBSM, 0xFF, 0x01, 0x00, 0x02
+    ]
+    assert server.process_request([Sid().RDTCI, Sfid().RDTCBSM, 0x04]) == [
+        Sid().RDTCI + 0x40, Sfid().RDTCBSM, 0xFF, 0x12, 0x34, 0x56, 0x04
+    ]
+
+
+def test_read_dtc_information_records_and_pointers():
+    server = UdsServer()
+    store = server.memory.dtc_store
+    store.add(0x123456, 0x00, severity=0x20, functional_unit=0x10)
+    store.set_status(0x123456, 0x09)
+    for value in (0x01, 0x02, 0x03):
+        store.record_snapshot(0x123456, [bytes([0xF1, 0x90, value])])
+    store.set_extended_data(0x123456, 0x01, b"\x05")
+    store.set_fault_detection_counter(0x9A0201, 0x40)
+    store.set_permanent(0x9A0101)
+    rdtci = Sid().RDTCI + 0x40
+    assert server.process_request([Sid().RDTCI, Sfid().RDTCSSI]) == [rdtci, 0x03, 0x12, 0x34, 0x56, 0x01, 0x12, 0x34, 0x56, 0x02]
+    assert server.process_request([Sid().RDTCI, Sfid().RDTCSSBDTC, 0x12, 0x34, 0x56, 0x02]) == [
+        rdtci, 0x04, 0x12, 0x34, 0x56, 0x09, 0x02, 0x01, 0xF1, 0x90, 0x03
+    ]
+    assert server.process_request([Sid().RDTCI, Sfid().RDTCEDRBDN, 0x12, 0x34, 0x56, 0xFF]) == [
+        rdtci, 0x06, 0x12, 0x34, 0x56, 0x09, 0x01, 0x05
+    ]
+    assert server.process_request([Sid().RDTCI, Sfid().RDTCBSMR, 0x20, 0xFF]) == [
+        rdtci, 0x08, 0xFF, 0x20, 0x10, 0x12, 0x34, 0x56, 0x09
+    ]
+    assert server.process_request([Sid().RDTCI, Sfid().RMRCDTC]) == [rdtci, 0x0E, 0xFF, 0x12, 0x34, 0x56, 0x09]
+    assert server.process_request([Sid().RDTCI, Sfid().RDTCFDC]) == [rdtci, 0x14, 0x9A, 0x02, 0x01, 0x40]
+    assert server.process_request([Sid().RDTCI, Sfid().RDTCWPS]) == [
+        rdtci, 0x15, 0xFF, 0x9A, 0x01, 0x01, 0x01, 0x12, 0x34, 0x56, 0x09
+    ]
+    assert server.process_request([Sid().RDTCI, Sfid().RDTCSSBDTC, 0x00, 0x00, 0x01, 0x01])[-1] == 0x31
+    server.process_request([Sid().CDTCI, 0xFF, 0xFF, 0xFF])
+    assert store.get_status(0x123456) == 0x50
+    assert server.process_request([Sid().RDTCI, Sfid().RMRCDTC]) == [rdtci, 0x0E, 0xFF]
+    assert server.process_request([Sid().RDTCI, Sfid().RDTCSSI]) == [rdtci, 0x03]
+
+
+def test_failing_dtc_captures_snapshot_occurrence_and_permanent_records():
+    server = UdsServer()
+    store = server.memory.dtc_store
+    store.add(0x123456, 0x00)
+    rdtci = Sid().RDTCI + 0x40
+    assert server.process_request([Sid().RDTCI, Sfid().RDTCSSI]) == [rdtci, 0x03]
+    store.set_status(0x123456, 0x01)
+    store.set_status(0x123456, 0x00)
+    store.set_status(0x123456, 0x09)
+    assert server.process_request([Sid().RDTCI, Sfid().RDTCSSI]) == [
+        rdtci, 0x03, 0x12, 0x34, 0x56, 0x01, 0x12, 0x34, 0x56, 0x02
+    ]
+    response = server.process_request([Sid().RDTCI, Sfid().RDTCSSBDTC, 0x12, 0x34, 0x56, 0x01])
+    assert response[:8] == [rdtci, 0x04, 0x12, 0x34, 0x56, 0x09, 0x01, len(Memory.SNAPSHOT_DIDS)]
+    assert bytes(response[8:11]) == server.memory.did_database.read(0xF40C, server)[:3]
+    assert server.process_request([Sid().RDTCI, Sfid().RDTCEDRBDN, 0x12, 0x34, 0x56, 0x01]) == [
+        rdtci, 0x06, 0x12, 0x34, 0x56, 0x09, 0x01, 0x02
+    ]
+    assert server.process_request([Sid().RDTCI, Sfid().RDTCWPS]) == [rdtci, 0x15, 0xFF, 0x12, 0x34, 0x56, 0x09]
+
+
+def test_clear_diagnostic_information_by_group_and_memory():
+    server = UdsServer()
+    store = server.memory.dtc_store
+    store.add_many(range(0x120001, 0x120011), [0x09] * 16)
+    user_store = server.memory.add_user_defined_dtc_store(0x10)
+    user_store.add(0x9A0101, 0x08)
+    changes = []
+    store.listener = lambda dtc, old, new: changes.append(dtc)
+    assert server.process_request([Sid().CDTCI, 0x12, 0x00, 0x00]) == [Sid().CDTCI + 0x40]
+    assert changes == list(range(0x120001, 0x120011))
+    assert store.count_by_status_mask(0x0F) == 2
+    assert server.process_request([Sid().CDTCI, 0x9A, 0x02, 0x01]) == [Sid().CDTCI + 0x40]
+    assert store.get_status(0x9A0201) == 0x50 and store.get_status(0x9A0101) == 0x01
+    assert server.process_request([Sid().RDTCI, Sfid().RUDMDTCBSM, 0xFF, 0x10]) == [
+        Sid().RDTCI + 0x40, Sfid().RUDMDTCBSM, 0x10, 0xFF, 0x9A, 0x01, 0x01, 0x08
+    ]
+    assert server.process_request([Sid().CDTCI, 0xFF, 0xFF, 0xFF, 0x10]) == [Sid().CDTCI + 0x40]
+    assert user_store.get_status(0x9A0101) == 0x50
+    assert server.process_request([Sid().CDTCI, 0x55, 0x55, 0x55])[-1] == 0x31
+    assert server.process_request([Sid().CDTCI, 0xFF, 0xFF, 0xFF, 0x20])[-1] == 0x31
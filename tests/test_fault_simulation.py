@@ -0,0 +1,78 @@
+import numpy as np
+from py_uds_demo.core.server import UdsServer
+from py_uds_demo.core.utils.fault_simulation import FaultSimulation
+from py_uds_demo.core.utils.helpers import Sfid, Sid
+
+
+def test_fault_simulation_follows_status_lifecycle():
+    simulation = FaultSimulation(
+        2, [0x010101], step_up=64, step_down=128, confirmation_threshold=2, aging_threshold=2, healing_threshold=1
+    )
+    simulation.start_operation_cycle()
+    simulation.monitor([[True], [False]])
+    assert simulation.status[:, 0].tolist() == [0x50, 0x00]
+    simulation.monitor([[True], [False]])
+    assert simulation.status[0, 0] == 0x27
+    simulation.end_operation_cycle()
+    simulation.start_operation_cycle()
+    simulation.monitor([[True], [False]], samples=2)
+    assert simulation.status[0, 0] == 0xAF
+    simulation.end_operation_cycle()
+    simulation.start_operation_cycle()
+    simulation.monitor([[False], [False]], samples=2)
+    simulation.end_operation_cycle()
+    assert simulation.status[0, 0] == 0x28
+    simulation.start_operation_cycle()
+    simulation.monitor([[False], [False]])
+    simulation.end_operation_cycle()
+    assert simulation.status[0, 0] == 0x20
+
+
+def test_fault_simulation_fleet_feeds_dtc_store():
+    server = UdsServer()
+    simulation = FaultSimulation.for_store(server.memory.dtc_store, ecus=500, fault_rate=0.2, seed=7)
+    simulation.run_cycles(50)
+    assert simulation.operation_cycles == 50
+    assert np.count_nonzero(simulation.status & 0x08) > 0
+    simulation.apply_to(server.memory.dtc_store, ecu=int(np.argmax(simulation.status[:, 0] & 0x08)))
+    resp = server.process_request([Sid().RDTCI, Sfid().RNODTCBSM, 0x08])
+    assert resp[-1] >= 1
+
+
+def test_fault_simulation_changes_fire_response_on_event():
+    server = UdsServer()
+    events = []
+    server.response_on_event.channel.subscribe(events.append)
+    server.process_request([Sid().ROE, Sfid().ONDTCS, 0x02, 0x08, Sid().RDTCI, Sfid().RNODTCBSM, 0x08])
+    server.process_request([Sid().ROE, Sfid().STRTROE, 0x02])
+    simulation = FaultSimulation.for_store(server.memory.dtc_store, ecus=1)
+    simulation.status[0, 0] = 0x09
+    simulation.apply_to(server.memory.dtc_store)
+    assert events == []
+    server.process_changes()
+    assert len(events) == 1 and events[0][:2] == [Sid().RDTCI + 0x40, Sfid().RNODTCBSM]
+
+
+def test_fault_simulation_records_snapshot_counters_and_permanent_dtcs():
+    server = UdsServer()
+    store = server.memory.dtc_store
+    store.clear_rows(store.select(0xFFFFFF))
+    simulation = FaultSimulation.for_store(store, ecus=1, step_up=128, step_down=128, aging_threshold=5)
+    for failing in (True, False, True, False, False):
+        simulation.start_operation_cycle()
+        simulation.monitor([[failing, False]])
+        simulation.end_operation_cycle()
+    assert simulation.occurrence_counter[0].tolist() == [2, 0] and simulation.aging_counter[0].tolist() == [2, 0]
+    simulation.apply_to(store)
+    rdtci = Sid().RDTCI + 0x40
+    assert server.process_request([Sid().RDTCI, Sfid().RDTCSSI]) == [rdtci, 0x03]
+    assert server.process_request([Sid().RDTCI, Sfid().RDTCEDRBDN, 0x9A, 0x01, 0x01, 0xFF]) == [
+        rdtci, 0x06, 0x9A, 0x01, 0x01, 0xA8, 0x01, 0x02, 0x02, 0x02
+    ]
+    simulation.start_operation_cycle()
+    simulation.monitor([[True, False]])
+    simulation.apply_to(store)
+    assert server.process_request([Sid().RDTCI, Sfid().RDTCSSI]) == [rdtci, 0x03, 0x9A, 0x01, 0x01, 0x01]
+    response = server.process_request([Sid().RDTCI, Sfid().RDTCEDRBDN, 0x9A, 0x01, 0x01, 0xFF])
+    assert response[-4:] == [0x01, 0x03, 0x02, 0x00]
+    assert server.process_request([Sid().RDTCI, Sfid().RDTCWPS]) == [rdtci, 0x15, 0xFF, 0x9A, 0x01, 0x01, 0xAF]
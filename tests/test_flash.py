@@ -0,0 +1,71 @@
+import binascii
+import pickle
+import zlib
+import pytest
+from py_uds_demo.core.server import UdsServer
+from py_uds_demo.core.utils.flash import FlashError, FlashMemory, FlashRegion
+
+
+def test_flash_region_write_once_between_erases():
+    region = FlashRegion(0x1000, 0x400, sector_size=0x100)
+    assert region.data == b"\xFF" * 0x400 and region.sector_count == 4
+    region.write(0x10F0, b"\x00" * 0x20)
+    assert list(region.write_counts) == [1, 1, 0, 0]
+    with pytest.raises(FlashError):
+        region.write(0x1100, b"\x01")
+    with pytest.raises(FlashError):
+        region.write(0x13FF, b"\x01\x02")
+    assert region.erase(0x1100, 1) == range(1, 2)
+    region.write(0x1100, b"\x01")
+    assert region.read(0x10F0, 0x11).tobytes() == b"\x00" * 0x10 + b"\x01"
+    assert list(region.erase_counts) == [0, 1, 0, 0]
+    assert region.programmed == [(0xF0, 0x101)]
+
+
+def test_flash_region_pickles_programmed_ranges_only():
+    region = FlashRegion(0x1000, 0x40000)
+    assert len(pickle.dumps(region)) < 1024
+    region.write(0x1000, b"\x01" * 0x10)
+    region.write(0x1010, b"\x02" * 0x10)
+    region.write(0x2000, b"\x03")
+    assert region.programmed == [(0x0, 0x20), (0x1000, 0x1001)]
+    clone = pickle.loads(pickle.dumps(region))
+    assert clone.data == region.data and clone.programmed == region.programmed
+    region.erase(0x1000, 1)
+    assert region.programmed == [(0x1000, 0x1001)]
+
+
+def test_server_snapshot_and_fork_keep_flash_compact():
+    server = UdsServer()
+    assert len(server.snapshot()) < 64 * 1024
+    bank = server.memory.flash.banks[0]
+    bank.write(0x00080000, b"\x5A" * 0x100)
+    clone = server.fork()
+    clone_bank = clone.memory.flash.banks[0]
+    assert clone_bank is not bank and clone_bank.read(0x00080000, 0x101).tobytes() == b"\x5A" * 0x100 + b"\xFF"
+    with pytest.raises(FlashError):
+        clone_bank.write(0x00080000, b"\x00")
+    clone_bank.erase(0x00080000, 1)
+    assert bank.read(0x00080000, 1).tobytes() == b"\x5A"
+
+
+def test_flash_crc_is_incremental_and_matches_reference():
+    region = FlashRegion(0, 0x300000, sector_size=0x10000)
+    payload = bytes(range(256)) * 0x1000
+    region.write(0x10, payload)
+    assert region.crc(0x10, len(payload)) == zlib.crc32(payload)
+    assert region.crc(0x10, len(payload), "crc16") == binascii.crc_hqx(payload, 0xFFFF)
+    steps = list(region.iter_crc(0x10, len(payload), chunk_size=0x40000))
+    assert [done for done, _ in steps] == [0, 0x40000, 0x80000, 0xC0000, 0x100000]
+    assert not region.verified[:17].any() and region.verified[17:].all()
+    region.mark_verified(0x10, len(payload))
+    assert region.verified.all()
+
+
+def test_flash_memory_regions():
+    flash = FlashMemory([FlashRegion(0x2000, 0x1000), FlashRegion(0x0, 0x1000)])
+    assert [region.address for region in flash.regions] == [0x0, 0x2000]
+    assert flash.find(0x2800, 0x800).address == 0x2000
+    assert flash.find(0x0F00, 0x200) is None
+    with pytest.raises(FlashError):
+        flash.add_region(FlashRegion(0x2800, 0x1000))
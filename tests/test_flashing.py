@@ -0,0 +1,38 @@
+import os
+
+from py_uds_demo.core.client import UdsClient
+from py_uds_demo.core.flashing import PHASES
+from py_uds_demo.core.server import UdsServer
+from py_uds_demo.core.utils.bootloader import SWAPPED
+from py_uds_demo.core.utils.image_loader import MemoryImage
+
+
+IMAGE = MemoryImage.from_chunks([(0x00080000, os.urandom(0x3000)), (0x00090000, os.urandom(0x123))])
+
+
+def test_flash_programs_the_inactive_bank_and_swaps():
+    client = UdsClient()
+    report = client.flash(IMAGE)
+    assert report.ok, report.to_dict()
+    assert report.bytes_transferred == IMAGE.size
+    assert report.block_length == 0x1000 and report.blocks == 4
+    assert set(report.phase_times) == set(PHASES) and report.throughput > 0
+    assert client.server.bootloader.last_update == SWAPPED
+    bank = client.server.memory.flash.addressed_bank
+    assert bytes(bank.read(0x00080000, 0x3000)) == IMAGE.segments[0].data
+
+
+def test_flash_block_size_cap_and_failure_report():
+    report = UdsClient().flash(IMAGE, max_block_length=0x400)
+    assert report.ok and report.block_length == 0x400 and report.blocks == 13
+    outside = MemoryImage.from_chunks([(0x00010000, b"\x01" * 16)])
+    report = UdsClient().flash(outside)
+    assert not report.ok
+    assert report.failed_phase == "erase" and report.failed_response == [0x7F, 0x31, 0x31]
+
+
+def test_flash_many_servers_concurrently():
+    servers = [UdsServer() for _ in range(8)]
+    reports = UdsClient().flash_many(servers, IMAGE)
+    assert all(report.ok for report in reports)
+    assert all(server.memory.flash.active_bank == 1 for server in servers)
@@ -0,0 +1,89 @@
+import struct
+
+import pytest
+from py_uds_demo.core.client import UdsClient
+from py_uds_demo.core.utils.helpers import Sid
+from py_uds_demo.core.utils.image_loader import ImageFormatError, load_image, parse_elf, parse_intel_hex, parse_srecord
+
+
+def _ihex_record(address, record_type, data):
+    body = bytes([len(data), (address >> 8) & 0xFF, address & 0xFF, record_type]) + bytes(data)
+    return ":" + (body + bytes([(-sum(body)) & 0xFF])).hex().upper()
+
+
+def _srec_record(record_type, address, data):
+    body = bytes([len(data) + 5]) + address.to_bytes(4, "big") + bytes(data)
+    return f"S{record_type}" + (body + bytes([0xFF - (sum(body) & 0xFF)])).hex().upper()
+
+
+def test_intel_hex_coalesces_records_and_reports_gaps():
+    content = "\n".join([
+        _ihex_record(0x0000, 0x04, [0x00, 0x01]),
+        _ihex_record(0x0000, 0x00, [0x01, 0x02]),
+        _ihex_record(0x0002, 0x00, [0x03, 0x04]),
+        _ihex_record(0x0010, 0x00, [0x05]),
+        _ihex_record(0x0000, 0x01, []),
+    ])
+    image = parse_intel_hex(content)
+    assert [(segment.address, segment.data) for segment in image.segments] == [
+        (0x10000, b"\x01\x02\x03\x04"),
+        (0x10010, b"\x05"),
+    ]
+    assert image.gaps == [(0x10004, 0x10010)]
+    assert image.overlaps == []
+
+
+def test_intel_hex_rejects_bad_checksum():
+    record = _ihex_record(0x0000, 0x00, [0x01])
+    with pytest.raises(ImageFormatError):
+        parse_intel_hex(record[:-2] + "00")
+
+
+@pytest.mark.parametrize("record_type", [0x02, 0x04])
+def test_intel_hex_rejects_bad_address_record_length(record_type):
+    with pytest.raises(ImageFormatError):
+        parse_intel_hex(_ihex_record(0x0000, record_type, [0x01]))
+
+
+def test_srecord_reports_overlaps():
+    content = "\n".join([
+        _srec_record(3, 0x2000, [0xAA, 0xBB, 0xCC]),
+        _srec_record(3, 0x2001, [0x11]),
+        _srec_record(7, 0x2000, []),
+    ])
+    image = parse_srecord(content)
+    assert image.segments[0].data == b"\xaa\x11\xcc"
+    assert image.overlaps == [(0x2001, 0x2002)]
+    assert image.start_address == 0x2000
+
+
+def test_elf_pt_load_segments():
+    header = bytearray(52)
+    header[:6] = b"\x7fELF\x01\x01"
+    struct.pack_into("<II", header, 24, 0x8000, 52)
+    struct.pack_into("<HH", header, 42, 32, 1)
+    program_header = struct.pack("<IIIIIIII", 1, 84, 0x8000, 0x3000, 4, 8, 5, 4)
+    image = parse_elf(bytes(header) + program_header + b"\xde\xad\xbe\xef")
+    assert [(segment.address, segment.data) for segment in image.segments] == [(0x3000, b"\xde\xad\xbe\xef")]
+
+
+@pytest.mark.parametrize("elf_class", [1, 2])
+def test_elf_rejects_truncated_header(elf_class):
+    header = bytearray(56)
+    header[:6] = bytes([0x7F, 0x45, 0x4C, 0x46, elf_class, 0x01])
+    content = bytes(header[:51]) if elf_class == 1 else bytes(header)
+    with pytest.raises(ImageFormatError):
+        parse_elf(content)
+
+
+def test_image_feeds_memory_and_client(tmp_path):
+    path = tmp_path / "app.bin"
+    path.write_bytes(bytes(range(10)))
+    image = load_image(str(path), base_address=0x4000)
+    client = UdsClient()
+    client.server.memory.load_image(image)
+    resp = client.send_request([Sid().RMBA, 0x00, 0x00, 0x40, 0x00], False)
+    assert resp == [Sid().RMBA + 0x40] + list(range(10))
+    assert client.write_image(image, block_size=4)
+    resp = client.send_request([Sid().RMBA, 0x00, 0x00, 0x40, 0x08], False)
+    assert resp == [Sid().RMBA + 0x40, 0x08, 0x09]
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from py_uds_demo.core.client import UdsClient
+from py_uds_demo.core.utils.helpers import Nrc, Sfid, Sid
+from py_uds_demo.core.utils.io_registry import IoRegistry
+from py_uds_demo.core.utils.signal_model import COLUMNS
+
+
+@pytest.fixture
+def extended_client():
+    client = UdsClient()
+    client.send_request([Sid().DSC, Sfid().EXTENDED_SESSION], False)
+    return client
+
+
+def test_short_term_adjustment_overrides_signal_until_returned(extended_client):
+    server = extended_client.server
+    model = server.signals.model
+    assert extended_client.send_request([Sid().IOCBI, 0x4A, 0x02, 0x03, 0x0F, 0xA0], False) == [
+        Sid().IOCBI + 0x40, 0x4A, 0x02, 0x03, 0x0F, 0xA0
+    ]
+    model.step(steps=10)
+    assert server.signals.value("engine_speed") == 1000.0
+    assert extended_client.send_request([Sid().RDBI, 0xF4, 0x0C], False) == [Sid().RDBI + 0x40, 0xF4, 0x0C, 0x0F, 0xA0]
+    assert extended_client.send_request([Sid().IOCBI, 0x4A, 0x02, 0x00], False) == [
+        Sid().IOCBI + 0x40, 0x4A, 0x02, 0x00, 0x0F, 0xA0
+    ]
+    assert not model.overridden[0, COLUMNS["engine_speed"]]
+    assert extended_client.send_request([Sid().IOCBI, 0x4A, 0x02, 0x01], False) == [0x7F, Sid().IOCBI, Nrc().ROOR]
+
+
+def test_packeted_did_uses_control_enable_mask(extended_client):
+    registry = extended_client.server.input_output_control_by_identifier.registry
+    assert extended_client.send_request([Sid().IOCBI, 0x4A, 0x10, 0x03, 1, 1, 1, 1, 0xA0], False) == [
+        Sid().IOCBI + 0x40, 0x4A, 0x10, 0x03, 1, 0, 1, 0
+    ]
+    assert extended_client.send_request([Sid().IOCBI, 0x4A, 0x10, 0x02, 0x40], False) == [
+        Sid().IOCBI + 0x40, 0x4A, 0x10, 0x02, 1, 0, 1, 0
+    ]
+    assert list(registry.controlled[registry.rows_of(0x4A10)]) == [True, True, True, False]
+    assert extended_client.send_request([Sid().IOCBI, 0x4A, 0x10, 0x03, 1, 1, 1, 1], False) == [
+        0x7F, Sid().IOCBI, Nrc().IMLOIF
+    ]
+    assert extended_client.send_request([Sid().IOCBI, 0x4A, 0x10, 0x00, 0x00], False) == [0x7F, Sid().IOCBI, Nrc().ROOR]
+    assert extended_client.send_request([Sid().IOCBI, 0x4A, 0x01, 0x03, 101], False) == [0x7F, Sid().IOCBI, Nrc().ROOR]
+    assert extended_client.send_request([Sid().IOCBI, 0x12, 0x34, 0x00], False) == [0x7F, Sid().IOCBI, Nrc().ROOR]
+
+
+def test_controls_return_to_ecu_in_default_session(extended_client):
+    server = extended_client.server
+    registry = server.input_output_control_by_identifier.registry
+    extended_client.send_request([Sid().IOCBI, 0x4A, 0x03, 0x03, 0xFF], False)
+    assert server.signals.value("throttle_position") == pytest.approx(100.0)
+    extended_client.send_request([Sid().DSC, Sfid().DEFAULT_SESSION], False)
+    assert not registry.controlled.any()
+    assert not server.signals.model.overridden.any()
+    assert extended_client.send_request([Sid().IOCBI, 0x4A, 0x01, 0x00], False) == [0x7F, Sid().IOCBI, Nrc().SNSIAS]
+
+
+def test_registry_adjusts_thousands_of_points_at_once(extended_client):
+    registry = IoRegistry()
+    for did in range(0x5000, 0x5000 + 4000):
+        registry.add(did, [{"codec": {"type": "int", "length": 2, "factor": 0.5}, "min": -100, "max": 100}])
+    rows = np.arange(registry.size)
+    registry.adjust(rows, np.linspace(-200, 200, registry.size), extended_client.server.signals)
+    states = registry.states[:registry.size]
+    assert states.min() == -100 and states.max() == 100 and registry.controlled[:registry.size].all()
+    assert registry.encode(range(2), states[:2]) == (-200).to_bytes(2, "big", signed=True) * 2
+    assert list(registry.decode(range(2), b"\xFF\x38\x00\x01")) == [-100.0, 0.5]
@@ -1,4 +1,7 @@
 # import pytest for testing
+import gc
+import threading
+import time
 import pytest
 from py_uds_demo.core.client import UdsClient
 from py_uds_demo.core.server import UdsServer
@@ -86,11 +89,11 @@ def test_write_data_by_identifier_negative(uds_client):
     assert resp == [0x7F, Sid().WDBI, Nrc().REQUEST_OUT_OF_RANGE]
 
 def test_clear_diagnostic_information_positive(uds_client):
-    req = [Sid().CDTCI]
+    req = [Sid().CDTCI, 0xFF, 0xFF, 0xFF]
     resp = uds_client.send_request(req, False)
     assert resp == [Sid().CDTCI + 0x40]
-    # Verify that DTCs are cleared
-    req = [Sid().RDTCI, Sfid().RNODTCBSM, 0xFF]
+    # Verify that DTCs are cleared: only the testNotCompleted bits (0x50) remain
+    req = [Sid().RDTCI, Sfid().RNODTCBSM, 0xAF]
     resp = uds_client.send_request(req, False)
     assert resp[-1] == 0 # No DTCs
 
@@ -101,10 +104,11 @@ def test_read_dtc_information_positive(uds_client):
     assert resp[-1] > 0 # Should have at least one DTC initially
 
 def test_input_output_control_by_identifier_positive(uds_client):
-    did = 0xAE01
-    req = [Sid().IOCBI, (did >> 8) & 0xFF, did & 0xFF, 0x03] # Return control to ECU
+    did = 0x4A01
+    uds_client.send_request([Sid().DSC, Sfid().EXTENDED_SESSION], False)
+    req = [Sid().IOCBI, (did >> 8) & 0xFF, did & 0xFF, 0x00] # Return control to ECU
     resp = uds_client.send_request(req, False)
-    assert resp == [Sid().IOCBI + 0x40, (did >> 8) & 0xFF, did & 0xFF]
+    assert resp == [Sid().IOCBI + 0x40, (did >> 8) & 0xFF, did & 0xFF, 0x00, 0x00]
 
 def test_routine_control_positive(uds_client):
     routine_id = 0xFF00
@@ -115,4 +119,133 @@ def test_routine_control_positive(uds_client):
 def test_upload_download_negative(uds_client):
     req = [Sid().RD, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00]
     resp = uds_client.send_request(req, False)
-    assert resp == [0x7F, Sid().RD, Nrc().SERVICE_NOT_SUPPORTED]
+    assert resp == [0x7F, Sid().RD, Nrc().SERVICE_NOT_SUPPORTED_IN_ACTIVE_SESSION]
+    resp = uds_client.send_request([Sid().RU, 0x00, 0x44, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x10], False)
+    assert resp == [0x7F, Sid().RU, Nrc().SERVICE_NOT_SUPPORTED]
+
+def test_server_snapshot_and_restore(uds_server):
+    uds_server.process_request([Sid().DSC, Sfid().EXTENDED_SESSION])
+    uds_server.process_request([Sid().WDBI, 0xF1, 0x98, 0x01, 0x02])
+    snapshot = uds_server.snapshot()
+    uds_server.process_request([Sid().DSC, Sfid().DEFAULT_SESSION])
+    uds_server.process_request([Sid().WMBA, 0x00, 0x00, 0x10, 0x00, 0x55])
+    uds_server.restore(snapshot)
+    assert uds_server.diagnostic_session_control.active_session == Sfid().EXTENDED_SESSION
+    assert uds_server.memory.did_data[0xF198] == [0x01, 0x02]
+    assert uds_server.memory.memory_map[0x1000] == [0x11, 0x22, 0x33, 0x44]
+
+def test_server_fork_shares_regions_until_written(uds_server):
+    uds_server.memory.memory_map[0x8000] = bytes(1024)
+    clone = uds_server.fork()
+    assert clone.memory.memory_map[0x8000] is uds_server.memory.memory_map[0x8000]
+    clone.process_request([Sid().WMBA, 0x00, 0x00, 0x80, 0x00, 0x55])
+    assert clone.memory.memory_map[0x8000] == b"\x55" + bytes(1023)
+    assert uds_server.memory.memory_map[0x8000] == bytes(1024)
+    assert clone.memory.dtc_store is not uds_server.memory.dtc_store
+
+def test_read_data_by_identifier_static_did(uds_client):
+    resp = uds_client.send_request([Sid().RDBI, 0xF1, 0x90], False)
+    assert resp == [Sid().RDBI + 0x40, 0xF1, 0x90, 0x90, 0x78, 0x56, 0x34, 0x12]
+
+def test_read_data_by_identifier_reflects_written_data(uds_client):
+    uds_client.send_request([Sid().WDBI, 0xF1, 0x98, 0xAB, 0xCD], False)
+    resp = uds_client.send_request([Sid().RDBI, 0xF1, 0x98], False)
+    assert resp == [Sid().RDBI + 0x40, 0xF1, 0x98, 0xAB, 0xCD]
+
+def test_read_data_by_identifier_multiple_dids(uds_client):
+    resp = uds_client.send_request([Sid().RDBI, 0xFF, 0x01, 0xAA, 0xAA, 0xF1, 0x98], False)
+    assert resp == [Sid().RDBI + 0x40, 0xFF, 0x01, 0x01, 0xF1, 0x98, 0x56, 0x34, 0x12]
+    resp = uds_client.send_request([Sid().RDBI, 0xFF, 0x01, 0xFF, 0x01], False)
+    assert resp == [0x7F, Sid().RDBI, Nrc().REQUEST_OUT_OF_RANGE]
+
+def test_read_data_by_identifier_response_too_long(uds_client):
+    uds_client.server.read_data_by_identifier.max_response_length = 8
+    resp = uds_client.send_request([Sid().RDBI, 0xFF, 0x01, 0xF1, 0x98], False)
+    assert resp == [0x7F, Sid().RDBI, Nrc().RESPONSE_TOO_LONG]
+
+def test_dynamically_define_data_identifier(uds_client):
+    # F190 data bytes 2..3 followed by 2 bytes of memory at 0x2001
+    resp = uds_client.send_request([Sid().DDDI, Sfid().DBID, 0xF2, 0x00, 0xF1, 0x90, 0x02, 0x02], False)
+    assert resp == [Sid().DDDI + 0x40, Sfid().DBID, 0xF2, 0x00]
+    resp = uds_client.send_request([Sid().DDDI, Sfid().DBMA, 0xF2, 0x00, 0x14, 0x00, 0x00, 0x20, 0x01, 0x02], False)
+    assert resp == [Sid().DDDI + 0x40, Sfid().DBMA, 0xF2, 0x00]
+    resp = uds_client.send_request([Sid().RDBI, 0xF2, 0x00], False)
+    assert resp == [Sid().RDBI + 0x40, 0xF2, 0x00, 0x78, 0x56, 0xBB, 0xCC]
+    resp = uds_client.send_request([Sid().DDDI, Sfid().CDDDID, 0xF2, 0x00], False)
+    assert resp == [Sid().DDDI + 0x40, Sfid().CDDDID, 0xF2, 0x00]
+    resp = uds_client.send_request([Sid().RDBI, 0xF2, 0x00], False)
+    assert resp == [0x7F, Sid().RDBI, Nrc().REQUEST_OUT_OF_RANGE]
+
+def test_dynamically_define_data_identifier_rejects_invalid_source(uds_client):
+    resp = uds_client.send_request([Sid().DDDI, Sfid().DBID, 0xF2, 0x01, 0xF1, 0x90, 0x05, 0x02], False)
+    assert resp == [0x7F, Sid().DDDI, Nrc().REQUEST_OUT_OF_RANGE]
+
+def test_read_data_by_periodic_identifier(uds_client):
+    frames = []
+    service = uds_client.server.read_data_by_periodic_identifier
+    service.rates[Sfid().SEND_AT_FAST_RATE] = 0.005
+    service.channel.subscribe(frames.append)
+    uds_client.send_request([Sid().DDDI, Sfid().DBID, 0xF2, 0x01, 0xF1, 0x90, 0x01, 0x02], False)
+    resp = uds_client.send_request([Sid().RDBPI, Sfid().SEND_AT_FAST_RATE, 0x01], False)
+    assert resp == [Sid().RDBPI + 0x40]
+    time.sleep(0.1)
+    resp = uds_client.send_request([Sid().RDBPI, Sfid().STOP_SENDING], False)
+    assert resp == [Sid().RDBPI + 0x40]
+    assert len(frames) >= 5
+    assert frames[0] == [0x01, 0x90, 0x78]
+    count = len(frames)
+    time.sleep(0.05)
+    assert len(frames) == count
+
+def test_read_data_by_periodic_identifier_unknown_did(uds_client):
+    resp = uds_client.send_request([Sid().RDBPI, Sfid().SEND_AT_SLOW_RATE, 0x7E], False)
+    assert resp == [0x7F, Sid().RDBPI, Nrc().REQUEST_OUT_OF_RANGE]
+
+def test_response_on_event_change_of_data_identifier(uds_client):
+    events = []
+    uds_client.server.response_on_event.channel.subscribe(events.append)
+    resp = uds_client.send_request([Sid().ROE, Sfid().OCODID, 0x02, 0xF1, 0x98, Sid().RDBI, 0xF1, 0x98], False)
+    assert resp == [Sid().ROE + 0x40, Sfid().OCODID, 0x00, 0x02, 0xF1, 0x98, Sid().RDBI, 0xF1, 0x98]
+    uds_client.send_request([Sid().WDBI, 0xF1, 0x98, 0x01], False)
+    assert events == []  # not started yet
+    uds_client.send_request([Sid().ROE, Sfid().STRTROE, 0x02], False)
+    uds_client.send_request([Sid().WDBI, 0xF1, 0x99, 0x01], False)
+    uds_client.send_request([Sid().WDBI, 0xF1, 0x98, 0x02], False)
+    assert events == [[Sid().RDBI + 0x40, 0xF1, 0x98, 0x02]]
+
+def test_response_on_event_comparison_of_values(uds_client):
+    events = []
+    uds_client.server.response_on_event.channel.subscribe(events.append)
+    # fire when the first byte of F198 is larger than 0x10, 8 bits at offset 0
+    uds_client.send_request([Sid().ROE, Sfid().OCOV, 0x02, 0xF1, 0x98, 0x02, 0x00, 0x00, 0x00, 0x10, 0x00,
+                             0x20, 0x00, Sid().RDBI, 0xF1, 0x98], False)
+    uds_client.send_request([Sid().ROE, Sfid().STRTROE, 0x02], False)
+    for value in (0x05, 0x20, 0x30, 0x05, 0x11):
+        uds_client.send_request([Sid().WDBI, 0xF1, 0x98, value], False)
+    assert events == [[Sid().RDBI + 0x40, 0xF1, 0x98, 0x20], [Sid().RDBI + 0x40, 0xF1, 0x98, 0x11]]
+
+def test_session_timeout_waits_for_the_request_in_flight(uds_server):
+    uds_server.process_request([Sid().DSC, Sfid().EXTENDED_SESSION])
+    uds_server.diagnostic_session_control.session_timeout = 0.1
+    with uds_server.request_lock:
+        time.sleep(0.4)
+        assert uds_server.diagnostic_session_control.active_session == Sfid().EXTENDED_SESSION
+    time.sleep(0.4)
+    assert uds_server.diagnostic_session_control.active_session == Sfid().DEFAULT_SESSION
+
+
+def test_dropped_or_closed_forks_stop_their_session_thread(uds_server):
+    def session_threads():
+        return sum(thread.name == "uds-session-timeout" for thread in threading.enumerate())
+
+    gc.collect()
+    time.sleep(0.3)
+    before = session_threads()
+    clones = [uds_server.fork() for _ in range(5)]
+    assert session_threads() == before + 5
+    clones[0].close()
+    assert not clones[0].diagnostic_session_control.session_thread.is_alive()
+    del clones
+    gc.collect()
+    time.sleep(0.3)
+    assert session_threads() == before
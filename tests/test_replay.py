@@ -0,0 +1,47 @@
+from py_uds_demo.core.replay import REQUEST, RESPONSE, CaptureWriter, iter_log, iter_recording, replay
+from py_uds_demo.core.server import UdsServer
+
+
+LOG = [
+    "2025-08-01 10:00:00,000 [UDS_SIM_UI] [INFO] 💉 10 03\n",
+    "2025-08-01 10:00:00,010 [UDS_SIM_UI] [INFO] 🟢 50 03 00 32 13 88\n",
+    "2025-08-01 10:00:00,020 [UDS_SIM_UI] [INFO] 💾 image written: 16 bytes in 1 segment(s)\n",
+    "2025-08-01 10:00:00,030 [UDS_SIM_UI] [INFO] 💉 3D 00 08 00 00 ... 🔴 7F 3D 31\n",
+    "2025-08-01 10:00:00,040 [UDS_SIM_UI] [INFO] 💉 3E 80\n",
+    "2025-08-01 10:00:00,050 [UDS_SIM_UI] [INFO] 🟢 \n",
+    "2025-08-01 10:00:00,060 [UDS_SIM_UI] [INFO] 💉 22 12 34\n",
+    "2025-08-01 10:00:00,070 [UDS_SIM_UI] [INFO] 🔴 7F 22 13\n",
+]
+
+
+def test_log_is_parsed_into_exchanges():
+    exchanges = list(iter_log(iter(LOG)))
+    assert [exchange.request for exchange in exchanges] == [[0x10, 0x03], [0x3E, 0x80], [0x22, 0x12, 0x34]]
+    assert exchanges[1].response == []
+    assert round(exchanges[2].timestamp - exchanges[0].timestamp, 3) == 0.06
+
+
+def test_replay_reports_mismatches(tmp_path):
+    path = tmp_path / "uds_simulator.log"
+    path.write_text("".join(LOG), encoding="utf-8")
+    report = replay(iter_recording(str(path)))
+    assert report.exchanges == 3 and report.compared == 3
+    assert report.mismatch_count == 1
+    assert report.mismatches[0]["expected"] == "7F 22 13" and report.mismatches[0]["actual"] == "7F 22 31"
+    assert "2/3 responses match" in report.format()
+
+
+def test_capture_replay_recomputes_security_keys(tmp_path):
+    recorded = UdsServer()
+    path = str(tmp_path / "session.udscap")
+    with CaptureWriter(path) as capture:
+        for timestamp, request in enumerate([[0x10, 0x03], [0x27, 0x01], None, [0x22, 0xF1, 0x90]]):
+            if request is None:
+                seed = response[2:]
+                request = [0x27, 0x02, *recorded.security_access.levels[1].algorithm.compute_key(seed)]
+            response = recorded.process_request(request)
+            capture.write(REQUEST, request, timestamp * 0.01)
+            capture.write(RESPONSE, response, timestamp * 0.01 + 0.001)
+    report = replay(iter_recording(path), speed=1.0)
+    assert report.ok, report.format()
+    assert report.compared == 4 and report.duration >= 0.03
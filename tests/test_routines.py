@@ -0,0 +1,83 @@
+import binascii
+import time
+import zlib
+from py_uds_demo.core.client import UdsClient
+from py_uds_demo.core.utils.helpers import Nrc, Sfid, Sid
+from py_uds_demo.core.utils.routines import COMPLETED, IN_PROGRESS, STOPPED
+
+
+SELF_TEST = [0x02, 0x00]
+ERASE_MEMORY = [0xFF, 0x00]
+CHECK_MEMORY = [0x02, 0x02]
+CHECK_DEPENDENCIES = [0xFF, 0x01]
+
+
+def _results(client, routine_id, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        response = client.send_request([Sid().RC, Sfid().RRR, *routine_id], False)
+        if response[4] != IN_PROGRESS or time.monotonic() > deadline:
+            return response
+        time.sleep(0.01)
+
+
+def test_routine_runs_in_background_and_reports_progress():
+    client = UdsClient()
+    assert client.send_request([Sid().RC, Sfid().STR, *SELF_TEST], False) == [Sid().RC + 0x40, Sfid().STR, *SELF_TEST]
+    response = client.send_request([Sid().RC, Sfid().RRR, *SELF_TEST], False)
+    assert response[4] == IN_PROGRESS and response[5] < 100
+    assert client.send_request([Sid().RC, Sfid().STR, *SELF_TEST], False) == [0x7F, Sid().RC, Nrc().RSE]
+    assert _results(client, SELF_TEST) == [Sid().RC + 0x40, Sfid().RRR, *SELF_TEST, COMPLETED, 100, 0x00]
+
+
+def test_stop_routine_cancels_it():
+    client = UdsClient()
+    assert client.send_request([Sid().RC, Sfid().STPR, *SELF_TEST], False) == [0x7F, Sid().RC, Nrc().RSE]
+    assert client.send_request([Sid().RC, Sfid().RRR, *SELF_TEST], False) == [0x7F, Sid().RC, Nrc().RSE]
+    client.send_request([Sid().RC, Sfid().STR, *SELF_TEST], False)
+    assert client.send_request([Sid().RC, Sfid().STPR, *SELF_TEST], False) == [Sid().RC + 0x40, Sfid().STPR, *SELF_TEST]
+    assert _results(client, SELF_TEST)[4] == STOPPED
+    assert client.send_request([Sid().RC, Sfid().STR, 0x12, 0x34], False) == [0x7F, Sid().RC, Nrc().ROOR]
+
+
+def test_flash_routines_erase_check_and_dependencies():
+    client = UdsClient()
+    region = client.server.memory.flash.find(0x00080000, 1)
+    region.write(0x00080000, b"\x01\x02")
+    region.write(0x00081000, b"\x03")
+    erase = [0x24, 0x00, 0x08, 0x00, 0x00, 0x00, 0x10]
+    client.send_request([Sid().RC, Sfid().STR, *ERASE_MEMORY, *erase], False)
+    assert _results(client, ERASE_MEMORY)[4:] == [COMPLETED, 100, 0x00]
+    assert region.data[:2] == b"\xFF\xFF" and region.data[0x1000] == 0x03
+    assert list(region.erase_counts[:2]) == [1, 0]
+
+    region.write(0x00080000, b"\xAA" * 0x1000)
+    check = [0x24, 0x00, 0x08, 0x00, 0x00, 0x10, 0x00]
+    expected = list(zlib.crc32(b"\xAA" * 0x1000).to_bytes(4, "big"))
+    client.send_request([Sid().RC, Sfid().STR, *CHECK_DEPENDENCIES], False)
+    assert _results(client, CHECK_DEPENDENCIES)[6:] == [0x01]
+    client.send_request([Sid().RC, Sfid().STR, *CHECK_MEMORY, *check, 0, 0, 0, 0], False)
+    assert _results(client, CHECK_MEMORY)[6:] == [0x01, *expected]
+    client.send_request([Sid().RC, Sfid().STR, *CHECK_MEMORY, *check, *expected], False)
+    assert _results(client, CHECK_MEMORY)[6:] == [0x00, *expected]
+    client.send_request([Sid().RC, Sfid().STR, *CHECK_DEPENDENCIES], False)
+    assert _results(client, CHECK_DEPENDENCIES)[6:] == [0x01]
+    crc16 = list(binascii.crc_hqx(bytes(region.data[0x1000:0x2000]), 0xFFFF).to_bytes(2, "big"))
+    client.send_request([Sid().RC, Sfid().STR, *CHECK_MEMORY, 0x24, 0x00, 0x08, 0x10, 0x00, 0x10, 0x00, *crc16], False)
+    assert _results(client, CHECK_MEMORY)[6:] == [0x00, *crc16]
+    client.send_request([Sid().RC, Sfid().STR, *CHECK_DEPENDENCIES], False)
+    assert _results(client, CHECK_DEPENDENCIES)[6:] == [0x00]
+    assert client.send_request([Sid().RC, Sfid().STR, *CHECK_MEMORY, 0x14, 0, 0, 0, 0, 0, 1], False) == [
+        0x7F, Sid().RC, Nrc().ROOR
+    ]
+
+
+def test_erase_memory_without_range_erases_the_addressed_bank():
+    client = UdsClient()
+    bank = client.server.memory.flash.addressed_bank
+    bank.write(0x00080000, b"\x01\x02")
+    bank.write(0x000BF000, b"\x03")
+    client.send_request([Sid().RC, Sfid().STR, *ERASE_MEMORY], False)
+    assert _results(client, ERASE_MEMORY)[4:] == [COMPLETED, 100, 0x00]
+    assert bank.read(0x00080000, 2).tobytes() == b"\xFF\xFF" and bank.read(0x000BF000, 1).tobytes() == b"\xFF"
+    assert bank.erase_counts.min() == 1 and bank.programmed == []
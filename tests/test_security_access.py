@@ -0,0 +1,59 @@
+import pytest
+from py_uds_demo.core.client import UdsClient
+from py_uds_demo.core.server import UdsServer
+from py_uds_demo.core.utils.helpers import Nrc, Sfid, Sid
+from py_uds_demo.core.utils.seed_key import SeedKeyAlgorithm, create_algorithm
+
+
+@pytest.fixture
+def extended_client():
+    client = UdsClient()
+    client.send_request([Sid().DSC, Sfid().EXTENDED_SESSION], False)
+    return client
+
+
+def test_seed_key_algorithms_batch_matches_single():
+    algorithm = create_algorithm("rotate_add", rotation=8, constant=1)
+    assert algorithm.compute_key([0x12, 0x34, 0x56, 0x78]) == bytes([0x34, 0x56, 0x78, 0x13])
+    assert create_algorithm("or_mask").compute_key([0, 0, 0, 0]) == bytes([0x11, 0x22, 0x33, 0x44])
+    with pytest.raises(ValueError):
+        create_algorithm("unknown")
+    with pytest.raises(TypeError):
+        SeedKeyAlgorithm()
+
+
+def test_security_access_levels_and_attempt_counter(extended_client):
+    server = extended_client.server
+    assert extended_client.unlock(level=0x09) == [True]
+    assert server.security_access.security_level == 0x09
+    assert extended_client.send_request([Sid().SA, 0x11], False) == [Sid().SA + 0x40, 0x11, 0, 0, 0, 0]
+    assert extended_client.send_request([Sid().SA, 0x04], False) == [0x7F, Sid().SA, Nrc().SFNS]
+    assert extended_client.send_request([Sid().SA, 0x02, 0, 0, 0, 0], False) == [0x7F, Sid().SA, Nrc().RSE]
+    for expected in (Nrc().IK, Nrc().IK, Nrc().ENOA):
+        extended_client.send_request([Sid().SA, 0x01], False)
+        assert extended_client.send_request([Sid().SA, 0x02, 0, 0, 0, 0], False) == [0x7F, Sid().SA, expected]
+    assert extended_client.send_request([Sid().SA, 0x01], False) == [0x7F, Sid().SA, Nrc().RTDNE]
+    server.security_access.levels[0x01].delay_until = 0.0
+    assert extended_client.unlock() == [True]
+    extended_client.send_request([Sid().DSC, Sfid().EXTENDED_SESSION], False)
+    assert server.security_access.security_level == 0
+
+
+def test_client_unlocks_many_servers_in_one_batch(extended_client):
+    servers = [UdsServer() for _ in range(20)]
+    for server in servers:
+        server.process_request([Sid().DSC, Sfid().EXTENDED_SESSION])
+    servers[3].process_request([Sid().DSC, Sfid().DEFAULT_SESSION])
+    results = extended_client.unlock(servers=servers)
+    assert results == [index != 3 for index in range(20)]
+
+
+def test_client_unlock_uses_each_server_algorithm_and_accepts_unlocked_servers(extended_client):
+    servers = [UdsServer() for _ in range(4)]
+    for server in servers:
+        server.process_request([Sid().DSC, Sfid().EXTENDED_SESSION])
+    servers[1].security_access.levels[0x01].algorithm = create_algorithm("xor_mask")
+    servers[2].security_access.levels[0x01].algorithm = create_algorithm("rotate_add")
+    assert extended_client.unlock(servers=servers) == [True] * 4
+    assert extended_client.unlock(servers=servers) == [True] * 4
+    assert all(server.security_access.security_level == 0x01 for server in servers)
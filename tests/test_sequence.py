@@ -0,0 +1,62 @@
+import asyncio
+
+from py_uds_demo.core.async_client import AsyncUdsClient
+from py_uds_demo.core.sequence import Sequence
+from py_uds_demo.core.server import UdsServer
+from py_uds_demo.core.utils.transports import InProcessTransport
+
+
+DOCUMENT = {"name": "smoke", "steps": [
+    {"name": "extended", "request": "10 03", "expect": "50 03 *"},
+    {"request": "22 F4 0D", "expect": "62 F4 0D ??", "capture": {"did_low": [2, 3]}},
+    {"loop": 2, "steps": [{"wait": 0.001}, {"request": "3E 00", "expect": "7E 00"}]},
+    {"name": "captured", "request": "22 F4 {low}", "params": {"low": "$did_low"}, "expect": "62 F4 0D *"},
+    {"name": "missing", "request": "22 12 34", "expect": "62 12 34 *"},
+]}
+
+
+def test_sequence_compiles_loops_and_shares_matchers():
+    sequence = Sequence.from_dict(DOCUMENT)
+    assert [step.name for step in sequence.steps] == [
+        "extended", "22 F4 0D", "wait 0.001[0]", "3E 00[0]", "wait 0.001[1]", "3E 00[1]", "captured", "missing",
+    ]
+    assert sequence.steps[3].matcher is sequence.steps[5].matcher
+    assert sequence.steps[0].request == b"\x10\x03" and sequence.steps[6].request is None
+
+
+def test_sequence_runs_concurrently_and_reports():
+    sequence = Sequence.from_dict(DOCUMENT)
+
+    async def scenario():
+        clients = [AsyncUdsClient(InProcessTransport(UdsServer()), keep_alive_interval=None) for _ in range(5)]
+        return await sequence.run(clients)
+
+    report = asyncio.run(scenario())
+    assert report.passed.shape == (5, 8)
+    assert report.passed[:, :7].all() and not report.passed[:, 7].any()
+    assert not report.ok
+    summary = report.summary()
+    assert summary[7] == {**summary[7], "step": "missing", "passed": 0, "failed": 5}
+    assert report.to_dict()["ecus_passed"] == 0
+    assert "missing" in report.format()
+
+
+def test_sequence_skips_captures_of_short_responses():
+    sequence = Sequence.from_dict({"steps": [
+        {"request": "22 12 34", "capture": {"value": [3, 5]}},
+        {"request": "22 F4 {low}", "params": {"low": "$value"}},
+    ]})
+
+    async def scenario():
+        client = AsyncUdsClient(InProcessTransport(UdsServer()), keep_alive_interval=None)
+        return await sequence.run_ecu(client)
+
+    responses, _, errors = asyncio.run(scenario())
+    assert responses[0][0] == 0x7F and responses[1] == []
+    assert len(errors) == 1 and "KeyError" in errors[0]
+
+
+def test_sequence_shards_over_processes():
+    sequence = Sequence.from_dict({"steps": [{"request": "22 F1 90", "expect": "62 F1 90 *"}]})
+    report = sequence.run_simulated(6, processes=2)
+    assert report.ecu_count == 6 and report.ok
@@ -0,0 +1,66 @@
+import numpy as np
+from py_uds_demo.core.client import UdsClient
+from py_uds_demo.core.server import UdsServer
+from py_uds_demo.core.utils.helpers import Nrc, Sfid, Sid
+from py_uds_demo.core.utils.signal_model import COLUMNS, SIGNALS, Preconditions, SignalModel
+
+
+def test_fleet_model_steps_all_ecus_within_limits():
+    model = SignalModel(ecus=500, seed=3)
+    model.start_rate = 1.0
+    model.override(7, "engine_speed", 9000.0)
+    model.step(steps=300)
+    values = model.values
+    running = values[:, COLUMNS["engine_running"]] == 1.0
+    assert running.mean() > 0.9
+    assert (values[running, COLUMNS["engine_speed"]] >= 800.0).all()
+    assert values[running, COLUMNS["coolant_temperature"]].mean() > 30.0
+    assert (values >= [signal.minimum for signal in SIGNALS]).all()
+    assert (values <= [signal.maximum for signal in SIGNALS]).all()
+    assert values[7, COLUMNS["engine_speed"]] == 8000.0
+    model.release(7, "engine_speed")
+    model.step()
+    assert values[7, COLUMNS["engine_speed"]] < 8000.0
+
+
+def test_signal_dids_are_scaled_from_the_model():
+    client = UdsClient()
+    model = client.server.signals.model
+    model.set("engine_speed", 1000.0)
+    model.set("coolant_temperature", 90.0)
+    model.set("battery_voltage", 12.5)
+    assert client.send_request([Sid().RDBI, 0xF4, 0x0C, 0xF4, 0x05, 0xF4, 0x42], False) == [
+        Sid().RDBI + 0x40, 0xF4, 0x0C, 0x0F, 0xA0, 0xF4, 0x05, 130, 0xF4, 0x42, 0x30, 0xD4
+    ]
+
+
+def test_bind_connects_servers_to_fleet_rows():
+    servers = [UdsServer(), UdsServer()]
+    model = SignalModel(ecus=2)
+    model.bind(servers)
+    model.set("vehicle_speed", 42.0, 1)
+    assert servers[0].signals.value("vehicle_speed") == 0.0
+    assert servers[1].signals.value("vehicle_speed") == 42.0
+
+
+def test_environmental_preconditions():
+    client = UdsClient()
+    model = client.server.signals.model
+    model.set("vehicle_speed", 30.0)
+    assert client.send_request([Sid().DSC, Sfid().PROGRAMMING_SESSION], False) == [0x7F, Sid().DSC, Nrc().VSTH]
+    assert client.send_request([Sid().ER, Sfid().HARD_RESET], False) == [0x7F, Sid().ER, Nrc().VSTH]
+    assert client.send_request([Sid().ER, 0x81], False) == [0x7F, Sid().ER, Nrc().VSTH]
+    model.set("vehicle_speed", 0.0)
+    model.set("battery_voltage", 10.5)
+    assert client.send_request([Sid().DSC, Sfid().PROGRAMMING_SESSION], False) == [0x7F, Sid().DSC, Nrc().VTL]
+    model.set("battery_voltage", 12.5)
+    model.set("engine_running", 1.0)
+    assert client.send_request([Sid().DSC, Sfid().PROGRAMMING_SESSION], False) == [0x7F, Sid().DSC, Nrc().EIR]
+    assert client.send_request([Sid().DSC, Sfid().EXTENDED_SESSION], False)[0] == Sid().DSC + 0x40
+
+    preconditions = Preconditions.from_dict(
+        {"preconditions": [{"request": ["0x22"], "conditions": [{"signal": "shifter_position", "min": 1}]}]}
+    )
+    assert preconditions.check([0x22, 0xF1, 0x90], client.server.signals) == Nrc().CNC
+    assert preconditions.check([0x2E, 0xF1, 0x90], client.server.signals) is None
+    assert np.isinf(preconditions.rules[(0x22,)][2]).all()
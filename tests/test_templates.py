@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from py_uds_demo.core.client import UdsClient
+from py_uds_demo.core.utils.templates import RequestTemplate, ResponseMatcher, evaluate
+
+
+def test_request_template_slots():
+    template = RequestTemplate("23 44 {address:4} {size:4}")
+    assert template.slots == {"address": (2, 4), "size": (6, 4)}
+    assert template.build(address=0x00080000, size=0x10) == bytes.fromhex("23440008000000000010")
+    many = template.build_many(address=[0x00080000, 0x12345678], size=[1, 2])
+    assert many.shape == (2, 10)
+    assert bytes(many[1]) == bytes.fromhex("23441234567800000002")
+    assert RequestTemplate("3E 00").build() == b"\x3e\x00"
+    with pytest.raises(ValueError):
+        template.build(address=1)
+
+
+def test_response_matcher_masks_and_wildcards():
+    matcher = ResponseMatcher("62 F1 ?? 1? *")
+    assert matcher.matches([0x62, 0xF1, 0x90, 0x12, 0xFF])
+    assert not matcher.matches([0x62, 0xF1, 0x90, 0x22])
+    assert not matcher.matches([0x62, 0xF1])
+    exact = ResponseMatcher("7F 22 31")
+    responses = [[0x7F, 0x22, 0x31], [0x7F, 0x22, 0x31, 0x00], [0x62, 0xF1, 0x90, 0x10]]
+    assert exact.match_many(responses).tolist() == [True, False, False]
+    assert evaluate(responses, [exact, exact, matcher]).tolist() == [True, False, True]
+
+
+def test_client_runs_template_sequences():
+    client = UdsClient()
+    template = RequestTemplate("22 {did:2}")
+    requests = template.build_many(did=np.array([0xF190, 0xF18C, 0x1234] * 100))
+    positive, negative = ResponseMatcher("62 ?? ?? *"), ResponseMatcher("7F 22 31")
+    responses, passed = client.run_steps(requests, [positive, positive, negative] * 100)
+    assert passed.all() and len(responses) == 300
+    _, passed = client.run_steps([template.build(did=0x1234)], positive)
+    assert passed.tolist() == [False]